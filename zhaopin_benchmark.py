@@ -0,0 +1,460 @@
+"""
+离线性能基准
+用保存下来的列表页和详情页HTML（benchmark_fixtures/）在本地HTTP服务器上模拟智联招聘，
+不需要登录和联网，端到端运行 crawl_page / extract_job_detail / save_to_csv，
+输出每秒职位数、每个职位的WebDriver调用次数、峰值内存和输出字节数，
+并可以保存为基准结果，之后的运行与基准比较，发现性能退化
+
+用法：
+    python zhaopin_benchmark.py --pages 5 --latency 0.05 --save-baseline
+    python zhaopin_benchmark.py --pages 5 --latency 0.05            # 与基准比较，退化时返回非0
+    python zhaopin_benchmark.py --driver chrome                     # 使用本机Chrome（无界面）
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import http.client
+import threading
+import argparse
+import tempfile
+import logging
+import random
+import shutil
+import json
+import time
+import sys
+import os
+import re
+
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException
+
+from zhaopin_crawler import ZhaopinCrawler
+from zhaopin_parser import LIST_HARVEST_SCRIPT, parse_job_cards
+from zhaopin_sink import CsvSink
+from zhaopin_wait import _DETAIL_READY_SCRIPT, _LIST_STATE_SCRIPT, NAVIGATE_SCRIPT
+from zhaopin_logging import setup_logging
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_fixtures')
+FIXTURE_HOST = 'https://www.zhaopin.com'
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# 这些配置相同时结果才有可比性
+CONFIG_KEYS = ('driver', 'fetch_mode', 'detail_workers', 'pages', 'latency')
+
+# 与基准比较的指标：名称 -> 数值越大越好(True)还是越小越好(False)
+COMPARED_METRICS = {
+    'jobs_per_second': True,
+    'parse_per_second': True,
+    'rpc_per_job': False,
+    'peak_rss_mb': False,
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureServer:
+    """
+    在本地线程中提供固定的列表页和详情页
+    /sou/...pN 返回第N页列表，/jobdetail/<职位ID>.htm 返回对应的详情页；
+    每个请求先等待latency秒（加上0~jitter秒的随机抖动），模拟网络和服务器耗时
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.list_html = load_fixture('list.html')
+        self.detail_html = load_fixture('detail.html')
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.base_url = f'http://{host}:{self.httpd.server_address[1]}'
+        self._thread = None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                body = server.render(self.path)
+                if server.latency or server.jitter:
+                    time.sleep(server.latency + random.uniform(0, server.jitter))
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_sent += len(data)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def render(self, path):
+        """按路径生成页面，不认识的路径返回None"""
+        path = urlsplit(path).path
+        match = re.search(r'/jobdetail/([^/?#]+?)\.htm', path)
+        if match:
+            html = self.detail_html.replace('__JOB_ID__', match.group(1))
+        elif path.startswith('/sou/'):
+            page = re.search(r'/p(\d+)', path)
+            html = self.list_html.replace('__PAGE__', page.group(1) if page else '1')
+        else:
+            return None
+        return html.replace(FIXTURE_HOST, self.base_url)
+
+    def list_url(self, page):
+        return f'{self.base_url}/sou/jl801/p{page}?ct=9'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        self._driver._call()
+        if handle not in self._driver._tabs:
+            raise KeyError(f'no such window: {handle}')
+        self._driver.current_window_handle = handle
+
+
+class FixtureDriver:
+    """
+    模拟爬虫用到的WebDriver接口：用HTTP长连接读取本地服务器的页面，用lxml回答爬虫的脚本调用
+    每次调用计为一次WebDriver往返（rpc_count），与真实浏览器的命令数对应
+    """
+
+    user_agent = 'Mozilla/5.0 (FixtureDriver)'
+
+    def __init__(self):
+        self.rpc_count = 0
+        self._tabs = {'list': {'url': 'about:blank', 'source': '', 'root': None}}
+        self.current_window_handle = 'list'
+        self.switch_to = _SwitchTo(self)
+        self._connections = {}
+
+    def _call(self):
+        self.rpc_count += 1
+
+    @property
+    def _tab(self):
+        return self._tabs[self.current_window_handle]
+
+    @property
+    def window_handles(self):
+        self._call()
+        return list(self._tabs)
+
+    @property
+    def current_url(self):
+        self._call()
+        return self._tab['url']
+
+    @property
+    def page_source(self):
+        self._call()
+        return self._tab['source']
+
+    def _root(self):
+        tab = self._tab
+        if tab['root'] is None and tab['source']:
+            tab['root'] = lxml_html.document_fromstring(tab['source'])
+        return tab['root']
+
+    def get(self, url):
+        self._call()
+        self._load(url)
+
+    def _load(self, url):
+        parts = urlsplit(url)
+        connection = self._connections.get(parts.netloc)
+        if connection is None:
+            connection = self._connections[parts.netloc] = http.client.HTTPConnection(parts.netloc, timeout=30)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        connection.request('GET', path)
+        response = connection.getresponse()
+        source = response.read().decode('utf-8')
+        self._tabs[self.current_window_handle] = {'url': url, 'source': source, 'root': None}
+
+    def new_tab(self):
+        """相当于 window.open('')"""
+        handle = f'tab{len(self._tabs)}'
+        self._tabs[handle] = {'url': 'about:blank', 'source': '', 'root': None}
+        return handle
+
+    def execute_script(self, script, *args):
+        self._call()
+        tab = self._tab
+        if script == _DETAIL_READY_SCRIPT:
+            root = self._root()
+            found = root is not None and bool(root.xpath(args[0])) and bool(root.xpath(args[1]))
+            return [tab['url'], 'complete', found]
+        if script == _LIST_STATE_SCRIPT:
+            root = self._root()
+            links = root.xpath('//a[contains(@href, "jobdetail/")]/@href') if root is not None else []
+            return [tab['url'], len(links), links[0] if links else None]
+        if script == LIST_HARVEST_SCRIPT:
+            return parse_job_cards(tab['source'], tab['url']) if tab['source'] else []
+        if script == NAVIGATE_SCRIPT:
+            # 模拟驱动中导航是同步完成的，多标签页模式下不能体现并行加载的收益
+            self._load(args[0])
+            return None
+        if script.strip() == "window.open('');":
+            self.new_tab()
+            return None
+        if 'navigator.userAgent' in script:
+            return self.user_agent
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._call()
+        return {}
+
+    def get_cookies(self):
+        self._call()
+        return []
+
+    def find_element(self, by, value):
+        self._call()
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        self._call()
+        return []
+
+    def close(self):
+        self._call()
+        del self._tabs[self.current_window_handle]
+
+    def maximize_window(self):
+        self._call()
+
+    def quit(self):
+        for connection in self._connections.values():
+            connection.close()
+        self._connections = {}
+
+
+def count_driver_rpcs(driver):
+    """统计真实WebDriver的命令数：所有命令都经过 driver.execute"""
+    driver.rpc_count = 0
+    execute = driver.execute
+
+    def counted_execute(*args, **kwargs):
+        driver.rpc_count += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counted_execute
+    return driver
+
+
+def peak_rss_mb():
+    """本进程的峰值内存（MB），无法获取时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux上单位为KB，macOS上为字节
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def benchmark_parse(iterations=200):
+    """只测详情页解析：extract_job_detail 处理已获取的HTML"""
+    crawler = ZhaopinCrawler(job_buffer_size=0)
+    crawler.metrics_path = None
+    html = load_fixture('detail.html')
+    pages = [html.replace('__JOB_ID__', f'CCPARSE{i}') for i in range(iterations)]
+    start = time.perf_counter()
+    for page in pages:
+        crawler.extract_job_detail(page)
+    elapsed = time.perf_counter() - start
+    return round(iterations / elapsed, 1) if elapsed else None
+
+
+def run_benchmark(pages=3, latency=0.0, jitter=0.0, driver_type='fake', fetch_mode='browser',
+                  detail_workers=1, keep_pacing=False, output_dir=None, settings=None):
+    """
+    端到端运行爬虫的列表页和详情页处理流程
+    :param pages: 爬取的列表页数（每页20个职位）
+    :param latency: 本地服务器每个请求的固定延迟（秒）
+    :param jitter: 额外的随机延迟上限（秒）
+    :param driver_type: 'fake'使用FixtureDriver，'chrome'使用本机Chrome（无界面）
+    :param fetch_mode: 详情页抓取方式，见 ZhaopinCrawler.fetch_mode
+    :param detail_workers: 详情页并行数，见 ZhaopinCrawler.detail_workers
+    :param keep_pacing: 是否保留访问间隔（默认去掉，只测处理开销）
+    :param output_dir: 输出目录，None表示使用临时目录并在结束后删除
+    :param settings: 需要设置到爬虫上的其他属性
+    :return: 结果字典
+    """
+    server = FixtureServer(latency, jitter).start()
+    work_dir = output_dir or tempfile.mkdtemp(prefix='zhaopin_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+    sink = CsvSink('bench', directory=work_dir)
+    crawler = ZhaopinCrawler(sink=sink, job_buffer_size=None)
+    crawler.interactive = False
+    crawler.metrics_path = None
+    crawler.fetch_mode = fetch_mode
+    crawler.detail_workers = detail_workers
+    for name, value in (settings or {}).items():
+        setattr(crawler, name, value)
+    if not keep_pacing:
+        crawler.pacing.intervals = {}
+        crawler.max_request_rate = 1000.0
+
+    if driver_type == 'chrome':
+        crawler.user_data_dir = os.path.join(work_dir, 'chrome_profile')
+        crawler.driver = count_driver_rpcs(crawler.create_driver(crawler.user_data_dir, headless=True))
+    else:
+        crawler.driver = FixtureDriver()
+    crawler.driver.get(server.list_url(1))
+    crawler.list_window = crawler.driver.current_window_handle
+    crawler.open_detail_window()
+    rpc_before = crawler.driver.rpc_count
+
+    snapshot_path = os.path.join(work_dir, 'bench_snapshot.csv')
+    start = time.perf_counter()
+    try:
+        for page in range(1, pages + 1):
+            if page > 1:
+                crawler.driver.switch_to.window(crawler.list_window)
+                crawler.driver.get(server.list_url(page))
+            crawler.current_page = page
+            if not crawler.crawl_page():
+                break
+        crawler.save_to_csv(snapshot_path)
+        crawler.finish_output()
+        elapsed = time.perf_counter() - start
+        rpc_count = crawler.driver.rpc_count - rpc_before
+    finally:
+        crawler.close_detail_pool()
+        crawler.driver.quit()
+        server.stop()
+
+    output_files = list(sink.files) + [snapshot_path]
+    output_bytes = sum(os.path.getsize(path) for path in output_files if os.path.exists(path))
+    if output_dir is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    jobs = crawler.job_count
+    return {
+        'driver': driver_type,
+        'fetch_mode': fetch_mode,
+        'detail_workers': detail_workers,
+        'pages': pages,
+        'latency': latency,
+        'jobs': jobs,
+        'elapsed_seconds': round(elapsed, 3),
+        'jobs_per_second': round(jobs / elapsed, 2) if elapsed else None,
+        'rpc_per_job': round(rpc_count / jobs, 2) if jobs else None,
+        'server_requests': server.requests,
+        'output_bytes': output_bytes,
+        'peak_rss_mb': peak_rss_mb(),
+        'phases': crawler.metrics.snapshot()['phases'],
+    }
+
+
+def compare_with_baseline(result, baseline, tolerance=0.1):
+    """
+    与基准结果比较
+    :param tolerance: 允许的相对变化，超过即视为退化
+    :return: 退化的指标列表
+    """
+    different = [key for key in CONFIG_KEYS if result.get(key) != baseline.get(key)]
+    if different:
+        print(f"本次运行与基准的配置不同（{', '.join(different)}），不做比较")
+        return []
+
+    regressions = []
+    for name, higher_is_better in COMPARED_METRICS.items():
+        current, previous = result.get(name), baseline.get(name)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        flag = '（退化）' if worse > tolerance else ''
+        print(f"{name}: {previous} -> {current}（{change:+.1%}）{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='离线性能基准')
+    parser.add_argument('--pages', type=int, default=3, help='列表页数（每页20个职位）')
+    parser.add_argument('--latency', type=float, default=0.0, help='本地服务器每个请求的延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外的随机延迟上限（秒）')
+    parser.add_argument('--driver', choices=['fake', 'chrome'], default='fake', help='模拟驱动或本机Chrome')
+    parser.add_argument('--fetch-mode', choices=['browser', 'http'], default='browser', help='详情页抓取方式')
+    parser.add_argument('--workers', type=int, default=1, help='详情页并行数')
+    parser.add_argument('--keep-pacing', action='store_true', help='保留访问间隔')
+    parser.add_argument('--parse-iterations', type=int, default=200, help='解析基准的详情页数量，0表示跳过')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基准结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='允许的相对变化')
+    parser.add_argument('--output', help='把本次结果另存为JSON')
+    args = parser.parse_args()
+
+    # 只输出警告，避免日志开销影响结果（爬虫模块的日志在各入口的main中配置，导入时不配置）
+    setup_logging(None, level=logging.WARNING)
+
+    result = run_benchmark(args.pages, args.latency, args.jitter, args.driver, args.fetch_mode, args.workers,
+                           args.keep_pacing)
+    if args.parse_iterations:
+        result['parse_per_second'] = benchmark_parse(args.parse_iterations)
+
+    summary = {key: value for key, value in result.items() if key != 'phases'}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"已保存基准结果到 {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.tolerance)
+        if regressions:
+            print(f"性能退化: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+断点续爬日志
+以追加方式记录当前搜索URL、页码、该页的职位URL列表以及每个URL的完成情况，
+程序崩溃或被中断后，下次运行可以直接跳到中断的页并只处理剩下的URL。
+每个搜索URL使用单独的日志文件，调度器或守护进程交替爬取多个搜索页时不会删除彼此未完成的日志
+"""
+
+from datetime import datetime
+import hashlib
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointJournal:
+    """追加写入的断点日志（JSON Lines）"""
+
+    def __init__(self, path='zhaopin_checkpoint.jsonl', fsync=True):
+        """
+        :param path: 日志文件路径，实际文件名加上搜索URL的哈希（见path_for）
+        :param fsync: 每条记录写入后是否fsync，保证崩溃时不丢失
+        """
+        self.base_path = path
+        self.path = path
+        self.fsync = fsync
+        self.file = None
+
+    def path_for(self, search_url):
+        """搜索URL对应的日志文件，例如 zhaopin_checkpoint_1a2b3c4d5e6f.jsonl"""
+        root, ext = os.path.splitext(self.base_path)
+        digest = hashlib.sha1(search_url.encode('utf-8')).hexdigest()[:12]
+        return f'{root}_{digest}{ext}'
+
+    def _append(self, event, **data):
+        """追加一条记录"""
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+            # 崩溃时最后一行可能不完整，先换行再继续追加
+            if self.file.tell() > 0:
+                self.file.write('\n')
+        data['event'] = event
+        data['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.file.write(json.dumps(data, ensure_ascii=False) + '\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def load(self):
+        """
+        重放日志，得到上一次运行的状态
+        :return: 状态字典（search_url、page、urls、done、finished），没有日志时返回None
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        state = None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                event = record.get('event')
+                if event == 'start':
+                    state = {'search_url': record['search_url'], 'page': 1, 'urls': [],
+                             'done': set(), 'finished': False}
+                elif state is None:
+                    continue
+                elif event == 'page':
+                    state['page'] = record['page']
+                    state['urls'] = record['urls']
+                    state['done'] = set()
+                elif event == 'done':
+                    state['done'].add(record['url'])
+                elif event == 'finish':
+                    state['finished'] = True
+        return state
+
+    def begin(self, search_url, resume=True):
+        """
+        开始一次爬取
+        :param search_url: 搜索页URL
+        :param resume: 是否尝试从上一次中断的位置继续
+        :return: 可以继续的状态字典，没有可继续的状态时返回None
+        """
+        self.close()
+        self.path = self.path_for(search_url)
+        state = self.load() if resume else None
+        if state and not state['finished'] and state['search_url'] == search_url:
+            remaining = len([url for url in state['urls'] if url not in state['done']])
+            logger.info(f"发现未完成的爬取：第 {state['page']} 页，剩余 {remaining} 个职位")
+            self._append('resume', search_url=search_url, page=state['page'])
+            return state
+
+        # 没有可继续的状态，重新开始记录（只删除这个搜索URL的日志）
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._append('start', search_url=search_url)
+        return None
+
+    def record_page(self, page, urls):
+        """
+        记录开始处理某一页
+        :param page: 页码
+        :param urls: 该页需要处理的职位URL
+        """
+        self._append('page', page=page, urls=list(urls))
+
+    def mark_done(self, url):
+        """记录一个职位URL已处理完成"""
+        self._append('done', url=url)
+
+    def finish(self):
+        """爬取正常结束，删除日志"""
+        self._append('finish')
+        self.close()
+        os.remove(self.path)
+        logger.info("爬取正常结束，已删除断点日志")
+
+    def close(self):
+        """关闭日志文件"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
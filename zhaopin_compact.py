@@ -0,0 +1,206 @@
+"""
+快照文件合并去重
+以前每8页保存一次的快照（zhaopin_jobs_page8_*.csv、page16_*、_interrupted_* 以及最终的 zhaopin_jobs_*.csv）
+每个文件都包含之前的全部记录。本工具流式读取任意多个文件，按稳定的职位键去重，输出一份规范的数据集。
+输入较小时直接在内存中去重；超过内存预算时先按键的哈希值分区写入临时文件，再逐个分区去重，
+内存占用只与单个分区的大小有关
+
+用法：
+    python zhaopin_compact.py -o zhaopin_jobs_all.parquet "archive/zhaopin_jobs_*.csv"
+    python zhaopin_compact.py -o all.csv --memory-mb 128 archive/
+"""
+
+import argparse
+import tempfile
+import hashlib
+import logging
+import shutil
+import glob
+import json
+import math
+import csv
+import sys
+import os
+import re
+
+from zhaopin_parser import JOB_FIELDS, parse_job_id
+from zhaopin_sink import sink_for_path, pq
+
+logger = logging.getLogger(__name__)
+
+# 没有职位ID时用于生成职位键的字段（薪资、发布时间会变化，不参与）
+KEY_FIELDS = ('公司名称', '职位名称', '工作地点', '任职要求')
+MAX_PARTITIONS = 256  # 同时打开的分区文件数上限
+INPUT_EXTENSIONS = ('.csv', '.jsonl', '.parquet')
+_SPACES = re.compile(r'\s+')
+
+# 任职要求可能超过csv模块默认的单字段长度上限
+csv.field_size_limit(2 ** 31 - 1)
+
+
+def job_key(row, position):
+    """
+    记录的稳定职位键
+    有职位ID（job_id列或详情页URL）时使用职位ID，否则使用公司、职位名称、地点和任职要求的哈希值；
+    任职要求为空的记录（只爬列表页或跳过的相似职位）无法区分同一公司同名同地点的不同职位，不参与去重
+    :param position: 记录的序号，任职要求为空时用于生成唯一的键
+    """
+    job_id = row.get('job_id') or parse_job_id(row.get('url'))
+    if job_id:
+        return f'id:{job_id}'
+    if not (row.get('任职要求') or '').strip():
+        return f'row:{position}'
+    text = '\x1f'.join(_SPACES.sub(' ', row.get(field) or '').strip() for field in KEY_FIELDS)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def expand_inputs(patterns, exclude=None):
+    """
+    展开输入的文件、目录和通配符，按修改时间从旧到新排序（后面的文件中的记录优先）
+    :param exclude: 需要排除的文件（例如输出文件本身）
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern)
+        paths.update(path for path in candidates if path.lower().endswith(INPUT_EXTENSIONS))
+    if exclude:
+        paths = {path for path in paths if os.path.abspath(path) != os.path.abspath(exclude)}
+    return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+
+def read_records(path):
+    """流式读取一个输出文件中的记录"""
+    if path.lower().endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"跳过无法解析的行: {path}")
+    elif path.lower().endswith('.parquet'):
+        if pq is None:
+            raise RuntimeError("读取Parquet文件需要安装pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f)
+
+
+class Compactor:
+    """按职位键合并去重多个输出文件，同一职位保留最后读到的版本"""
+
+    def __init__(self, memory_mb=256, partitions=None, tmp_dir=None, fieldnames=None):
+        """
+        :param memory_mb: 内存预算（MB），输入文件总大小超过预算时使用分区去重
+        :param partitions: 分区数，None表示按输入大小和内存预算计算
+        :param tmp_dir: 分区临时文件目录，None表示使用系统临时目录
+        :param fieldnames: 输出字段，默认使用 JOB_FIELDS
+        """
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self.partitions = partitions
+        self.tmp_dir = tmp_dir
+        self.fieldnames = fieldnames or JOB_FIELDS
+        self.files_read = 0
+        self.rows_read = 0
+        self.rows_written = 0
+
+    def _rows(self, paths):
+        """依次读取所有文件，产生(序号, 职位键, 记录)"""
+        for path in paths:
+            logger.info(f"读取 {path}")
+            self.files_read += 1
+            for row in read_records(path):
+                self.rows_read += 1
+                yield self.rows_read, job_key(row, self.rows_read), {field: row.get(field) or '' for field in self.fieldnames}
+
+    def _partition_count(self, paths):
+        if self.partitions:
+            return self.partitions
+        total = sum(os.path.getsize(path) for path in paths)
+        # 内存中的字典约为文件大小的3倍，留出余量
+        return min(MAX_PARTITIONS, max(1, math.ceil(total * 3 / self.memory_bytes)))
+
+    def run(self, paths, output):
+        """
+        合并去重并写入输出文件
+        :param paths: 输入文件列表（按优先级从低到高）
+        :param output: 输出文件，格式由扩展名决定（.csv、.jsonl、.parquet）
+        :return: 输出的记录数
+        """
+        partitions = self._partition_count(paths)
+        with sink_for_path(output, fieldnames=self.fieldnames) as sink:
+            if partitions == 1:
+                logger.info("输入较小，直接在内存中去重")
+                self._write_unique(self._rows(paths), sink)
+            else:
+                logger.info(f"输入超过内存预算，分为 {partitions} 个分区去重")
+                self._compact_partitioned(paths, partitions, sink)
+        logger.info(f"共读取 {self.files_read} 个文件 {self.rows_read} 条记录，去重后 {self.rows_written} 条，"
+                    f"已写入 {output}")
+        return self.rows_written
+
+    def _write_unique(self, rows, sink):
+        """在内存中去重：同一职位保留最后一个版本，按第一次出现的顺序输出（分区模式下为分区内的顺序）"""
+        latest = {}
+        for seq, key, record in rows:
+            previous = latest.get(key)
+            latest[key] = (previous[0] if previous else seq, record)
+        for _, record in sorted(latest.values(), key=lambda item: item[0]):
+            sink.write(record)
+            self.rows_written += 1
+
+    def _compact_partitioned(self, paths, partitions, sink):
+        """按职位键的哈希值把记录分到多个临时文件，再逐个分区在内存中去重"""
+        work_dir = tempfile.mkdtemp(prefix='zhaopin_compact_', dir=self.tmp_dir)
+        columns = ['_seq', '_key'] + list(self.fieldnames)
+        try:
+            files = [open(os.path.join(work_dir, f'part{i:04d}.csv'), 'w', newline='', encoding='utf-8')
+                     for i in range(partitions)]
+            writers = [csv.writer(f) for f in files]
+            try:
+                for seq, key, record in self._rows(paths):
+                    index = int(hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest(), 16) % partitions
+                    writers[index].writerow([seq, key] + [record[field] for field in self.fieldnames])
+            finally:
+                for f in files:
+                    f.close()
+
+            for f in files:
+                self._write_unique(self._read_partition(f.name, columns), sink)
+                os.remove(f.name)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _read_partition(self, path, columns):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for values in csv.reader(f):
+                row = dict(zip(columns, values))
+                yield int(row.pop('_seq')), row.pop('_key'), row
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='合并去重快照文件')
+    parser.add_argument('inputs', nargs='+', help='输入文件、目录或通配符（.csv、.jsonl、.parquet）')
+    parser.add_argument('-o', '--output', required=True, help='输出文件，格式由扩展名决定')
+    parser.add_argument('--memory-mb', type=int, default=256, help='内存预算（MB）')
+    parser.add_argument('--partitions', type=int, help='分区数，默认按输入大小和内存预算计算')
+    parser.add_argument('--tmp-dir', help='分区临时文件目录')
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs, exclude=args.output)
+    if not paths:
+        print("没有找到输入文件")
+        return 1
+    Compactor(args.memory_mb, args.partitions, args.tmp_dir).run(paths, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -18,34 +18,136 @@ from datetime import datetime
 import logging
 import subprocess
 import os
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('zhaopin_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+import re
+import shutil
+import threading
+from collections import deque
+
+from zhaopin_parser import (
+    JobDetailParser, JOB_FIELDS, NEAR_DUPLICATE_FIELD, empty_job_info, card_to_job_info,
+    LIST_HARVEST_SCRIPT, CARD_CLASSES, CARD_FIELD_CLASSES,
+)
+from zhaopin_wait import PageReadiness, PacingPolicy, TokenBucket, is_verify_url
+from zhaopin_sink import CsvSink, export_records
+from zhaopin_store import JobStore, parse_job_id
+from zhaopin_checkpoint import CheckpointJournal
+from zhaopin_workers import DetailTabPool, DetailDriverPool
+from zhaopin_http import HttpDetailFetcher, export_browser_session
+from zhaopin_metrics import Metrics
+from zhaopin_logging import setup_logging
+from zhaopin_records import RecordPool
+from zhaopin_neardup import NearDuplicateIndex
+from zhaopin_lifecycle import BrowserLifecycle, RECYCLE_TAB, RESTART_DRIVER
+from zhaopin_stats import MarketStats
+from zhaopin_normalize import parse_publish_date
+from zhaopin_profile import (
+    DEFAULT_BLOCKED_RESOURCES, PageCostMonitor, apply_lean_options, blocked_url_patterns, enable_url_blocking,
 )
+
 logger = logging.getLogger(__name__)
 
 
 class ZhaopinCrawler:
-    def __init__(self):
-        """初始化爬虫"""
+    def __init__(self, sink=None, job_buffer_size=None, store=None, checkpoint=None):
+        """
+        初始化爬虫
+        :param sink: 流式输出（例如CsvSink），每提取一条记录立即追加写入；None表示沿用save_to_csv快照
+        :param job_buffer_size: job_data最多保留的最近记录数，None表示保留全部
+        :param store: 职位数据库（JobStore），用于跨运行去重；None表示不使用
+        :param checkpoint: 断点日志（CheckpointJournal），用于中断后继续；None表示不使用
+        """
         self.driver = None
-        self.job_data = []
+        self.sink = sink
+        self.store = store
+        self.checkpoint = checkpoint
+        self.current_page = 1  # 当前正在爬取的页码
+        self.interactive = True  # 遇到安全验证时是否等待用户在控制台按Enter
+        self.request_count = 0  # 本次运行打开的页面数（列表页+详情页），用于请求预算统计
+        self.skip_known_jobs = True  # 是否跳过数据库中已有的职位
+        self.seen_stores = []  # 其他只读的职位数据库（例如分片爬取时的主数据库），其中已有的职位同样跳过
+        self.list_only = False  # 只保存列表页上的字段，不打开详情页（没有任职要求等字段）
+        # 相似职位检测：按任职要求的MinHash签名把重复发布的职位归为一簇（NearDuplicateIndex），None表示不使用
+        # 列表页卡片与已知的重复簇相同时不再打开详情页；设置near_duplicate_path后每次运行载入和保存索引
+        self.near_duplicates = None
+        self.near_duplicate_path = None
+        self.skip_near_duplicates = True
+        self.search_index = None  # 全文索引（JobSearchIndex），每保存一条记录就加入索引；None表示不使用
+        # 实时市场统计（MarketStats），每记录一条职位就更新；设置market_stats_path后每页保存一次，启动时与已有文件合并
+        self.market_stats = None
+        self.market_stats_path = None
+        # 增量模式：连续遇到stop_after_seen个已抓取过的职位，或一页职位的发布日期都早于上次记录的最新发布日期时停止翻页
+        # 高水位标记保存在职位数据库中，没有数据库时增量模式不起作用
+        self.incremental = False
+        self.stop_after_seen = 20
+        self.high_water_size = 100  # 高水位标记中保存的最新职位ID数量
+        self.search_url = None
+        self.seen_streak = 0  # 当前连续遇到的已抓取职位数
+        self.high_water_ids = set()  # 上一次爬取时列表最前面的职位ID
+        self.high_water_publish_time = None  # 上一次爬取时看到的最新发布日期（date）
+        self._run_ids = []  # 本次列表中最前面的职位ID，结束时保存为新的高水位标记
+        self._run_publish_time = None
+        self._page_publish_times = []  # 当前页已保存职位的发布日期
+        # 内存中的记录缓冲区，设置上限后只保留最近的记录，长时间运行内存不再增长
+        self.job_data = [] if job_buffer_size is None else deque(maxlen=job_buffer_size)
+        # 缓冲区中的记录使用紧凑格式（JobRecord）：重复字段共用字符串，任职要求压缩保存
+        self.compact_records = True
+        self.record_pool = RecordPool()
+        self.snapshot_format = 'csv'  # 不使用流式输出时快照文件的格式：'csv'、'jsonl'或'parquet'
+        self.job_count = 0  # 本次运行提取到的记录总数
         self.wait_timeout = 10
-        self.page_delay_range = (3, 6)  # 增加延迟范围，减少访问频率
+        self.page_delay_range = (3, 6)  # 翻页间隔，增加延迟范围，减少访问频率
+        self.detail_delay_range = (2, 4)  # 打开详情页的间隔
         self.list_window = None  # 列表页标签页
         self.detail_window = None  # 详情页标签页
-
-    def init_driver(self):
-        """初始化Chrome浏览器驱动"""
-        logger.info("正在初始化浏览器...")
-
+        self.detail_parser = JobDetailParser()  # 详情页HTML解析器
+        self.user_data_dir = os.path.join(os.getcwd(), 'chrome_user_data')  # 浏览器用户数据目录
+        # 详情页并行抓取：detail_workers为1时逐个打开详情页
+        # worker_mode为'tabs'时在同一浏览器中开多个标签页，为'drivers'时启动多个浏览器实例
+        self.detail_workers = 1
+        self.worker_mode = 'tabs'
+        # 所有工作者共享的总请求速率上限（次/秒），None表示按detail_delay_range的平均间隔计算
+        self.max_request_rate = None
+        self.rate_limiter = None
+        self.detail_pool = None
+        # 详情页抓取方式：'browser'用浏览器打开；'http'复用浏览器Cookie直接请求，失败时交回浏览器
+        self.fetch_mode = 'browser'
+        self.http_concurrency = 4  # HTTP抓取的最大并发数
+        self.http_fetcher = None
+        # 精简浏览器配置：屏蔽图片、字体、媒体和统计脚本
+        self.lean_profile = False
+        self.blocked_resources = DEFAULT_BLOCKED_RESOURCES
+        self.page_load_strategy = 'normal'  # 'eager'：DOM加载完即返回；'none'：不等待加载
+        self.headless_after_login = False  # 登录完成后以无界面模式重启浏览器
+        self.headless = False  # 当前浏览器是否为无界面模式
+        # 启动浏览器时打开的远程调试端口，其他进程可以通过 127.0.0.1:端口 连接到这个已登录的浏览器
+        self.remote_debugging_port = None
+        self.attached = False  # 是否连接到已经运行的浏览器（结束时不关闭浏览器）
+        # 浏览器生命周期管理（BrowserLifecycle）：按内存和加载耗时回收详情页标签页或重启浏览器，None表示不使用
+        self.lifecycle = None
+        # 页面开销统计：记录每个详情页的传输字节数和加载时间
+        self.measure_page_cost = False
+        self.page_cost_baseline = 'page_cost_baseline.json'  # 普通模式的统计结果，作为比较基准
+        self.page_cost = None
+        # 运行指标：各阶段耗时、回退和安全验证次数，每页导出一次JSON汇总和Prometheus textfile
+        self.metrics = Metrics()
+        self.metrics_path = 'zhaopin_metrics'  # 导出文件路径前缀（.json和.prom），None表示不导出
+        self._detail_lock = threading.RLock()
+        # 页面就绪等待：条件满足即返回，最多等待wait_timeout秒
+        self.readiness = PageReadiness(timeout=self.wait_timeout)
+        # 访问节奏：与页面加载等待分开配置
+        self.pacing = PacingPolicy({
+            'detail': self.detail_delay_range,
+            'page': self.page_delay_range,
+        })
+
+    def build_chrome_options(self, user_data_dir, headless=False):
+        """
+        构造Chrome启动参数
+        :param user_data_dir: 用户数据目录（保存登录状态）
+        :param headless: 是否使用无界面模式
+        """
         chrome_options = Options()
+        chrome_options.page_load_strategy = self.page_load_strategy
 
         # 添加用户代理，模拟真实浏览器
         chrome_options.add_argument(
@@ -64,25 +166,144 @@ class ZhaopinCrawler:
         chrome_options.add_argument('--disable-plugins-discovery')
         chrome_options.add_argument('--start-maximized')
 
+        # 精简配置：屏蔽图片等只读文字时用不到的资源
+        if self.lean_profile:
+            apply_lean_options(chrome_options, self.blocked_resources)
+
+        if headless:
+            chrome_options.add_argument('--headless=new')
+            chrome_options.add_argument('--window-size=1920,1080')
+
         # 尝试使用已存在的用户数据目录（绕过安全验证）
-        user_data_dir = os.path.join(os.getcwd(), 'chrome_user_data')
         if not os.path.exists(user_data_dir):
             os.makedirs(user_data_dir)
 
         chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
+        if self.remote_debugging_port:
+            chrome_options.add_argument(f'--remote-debugging-port={self.remote_debugging_port}')
+        return chrome_options
 
+    def create_driver(self, user_data_dir, headless=False):
+        """
+        启动一个Chrome浏览器
+        :param user_data_dir: 用户数据目录
+        :param headless: 是否使用无界面模式
+        :return: WebDriver
+        """
+        driver = webdriver.Chrome(options=self.build_chrome_options(user_data_dir, headless))
+        if not headless:
+            driver.maximize_window()
+        self.setup_tab(driver)
+        return driver
+
+    def setup_tab(self, driver):
+        """
+        初始化当前标签页（CDP命令只对当前标签页生效，新建标签页后需要再次调用）
+        :param driver: WebDriver，当前窗口为要初始化的标签页
+        """
+        # 执行CDP命令移除webdriver属性
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '''
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                })
+            '''
+        })
+        if self.lean_profile:
+            enable_url_blocking(driver, blocked_url_patterns(self.blocked_resources))
+
+    def restart_headless(self):
+        """登录完成后以无界面模式重启浏览器"""
+        logger.info("正在以无界面模式重启浏览器...")
+        self.restart_driver(headless=True)
+        logger.info("已切换到无界面模式")
+
+    def restart_driver(self, headless=None):
+        """
+        重启浏览器，释放长时间运行积累的内存
+        登录状态保存在用户数据目录中，重启后回到原来的列表页和页码
+        :param headless: 是否使用无界面模式，None表示与当前相同
+        """
+        if self.attached:
+            # 连接的浏览器由其他程序共用，不能关闭后重新启动
+            logger.warning("连接到已有的浏览器时不重启浏览器")
+            return
+        if headless is not None:
+            self.headless = headless
+        self.driver.switch_to.window(self.list_window)
+        list_url = self.driver.current_url
+        self.close_detail_pool()
+        self.driver.quit()
+        self.driver = self.create_driver(self.user_data_dir, headless=self.headless)
+        self.list_window = self.driver.current_window_handle
+        self.restore_list_position(list_url)
+        self.open_detail_window()
+
+    def restore_list_position(self, list_url):
+        """
+        重启浏览器后回到原来的列表页
+        URL中有页码时直接打开当前页，否则重新打开列表页并点击"最新发布"和页码按钮
+        :param list_url: 重启前列表页的URL
+        """
+        page_url = self.get_page_url(list_url, self.current_page)
+        self.driver.get(page_url)
+        self.request_count += 1
+        self.readiness.wait_for_list(self.driver)
+        if self.current_page != 1 and not re.search(r'/p\d+', list_url):
+            logger.info(f"列表页URL中没有页码，通过翻页按钮回到第 {self.current_page} 页")
+            self.click_latest_publish_button()
+            if not self.click_page_button(self.current_page):
+                logger.warning(f"无法回到第 {self.current_page} 页，翻页将从当前页继续")
+
+    def recycle_detail_tab(self):
+        """关闭详情页标签页并打开一个新的，释放该标签页渲染进程的内存"""
+        if self.detail_pool is not None:
+            # 并行抓取的标签页在下一页重新打开
+            self.close_detail_pool()
+        self.driver.switch_to.window(self.detail_window)
+        self.driver.close()
+        self.driver.switch_to.window(self.list_window)
+        self.open_detail_window()
+
+    def maintain_browser(self, seconds=None, pages=1):
+        """
+        记录加载的详情页，需要时回收详情页标签页或重启浏览器
+        :param seconds: 详情页加载耗时（秒），None表示只计数
+        :param pages: 详情页数
+        """
+        if self.lifecycle is None:
+            return
+        self.lifecycle.record(seconds, pages)
+        action = self.lifecycle.check(self.driver)
+        if action is None:
+            return
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.maximize_window()
+            if action == RESTART_DRIVER and self.attached:
+                # 连接的浏览器不能重启，只回收详情页标签页；lifecycle仍按重启重置计数，避免每页都触发
+                logger.info("连接到已有的浏览器，不重启浏览器，改为回收详情页标签页...")
+                with self.metrics.time('tab_recycle'):
+                    self.recycle_detail_tab()
+                self.metrics.inc('tab_recycles')
+            elif action == RESTART_DRIVER:
+                logger.info("正在重启浏览器...")
+                with self.metrics.time('driver_restart'):
+                    self.restart_driver()
+                self.metrics.inc('driver_restarts')
+            else:
+                logger.info("正在回收详情页标签页...")
+                with self.metrics.time('tab_recycle'):
+                    self.recycle_detail_tab()
+                self.metrics.inc('tab_recycles')
+        except Exception as e:
+            logger.exception("回收浏览器资源失败: %s", e)
+        self.lifecycle.reset(action)
 
-            # 执行CDP命令移除webdriver属性
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                'source': '''
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    })
-                '''
-            })
+    def init_driver(self):
+        """初始化Chrome浏览器驱动"""
+        logger.info("正在初始化浏览器...")
+
+        try:
+            self.driver = self.create_driver(self.user_data_dir)
 
             logger.info("浏览器初始化成功")
             logger.info("提示：如果出现安全验证，请在浏览器中手动完成验证")
@@ -92,10 +313,30 @@ class ZhaopinCrawler:
             logger.error("请确保已安装Chrome浏览器和ChromeDriver")
             return False
     
-    def manual_login(self, url):
+    def attach_driver(self, debugger_address):
+        """
+        连接到已经运行的Chrome（以 --remote-debugging-port 启动，并已登录），不需要重新启动浏览器和登录
+        :param debugger_address: 远程调试地址，例如 '127.0.0.1:9222'
+        :return: 是否连接成功
+        """
+        logger.info(f"正在连接浏览器 {debugger_address}...")
+        try:
+            chrome_options = Options()
+            chrome_options.add_experimental_option('debuggerAddress', debugger_address)
+            self.driver = webdriver.Chrome(options=chrome_options)
+            self.setup_tab(self.driver)
+            self.attached = True
+            logger.info("已连接到浏览器")
+            return True
+        except Exception as e:
+            logger.error(f"连接浏览器失败: {e}")
+            return False
+
+    def manual_login(self, url, wait_for_user=True):
         """
         手动登录
         打开页面后等待用户手动登录
+        :param wait_for_user: 是否等待用户在控制台确认；浏览器已经登录（例如连接到已有浏览器）时设为False
         """
         logger.info(f"正在打开页面: {url}")
         self.driver.get(url)
@@ -104,6 +345,10 @@ class ZhaopinCrawler:
         self.list_window = self.driver.current_window_handle
         logger.info(f"列表页窗口句柄: {self.list_window}")
 
+        if not wait_for_user:
+            self.open_detail_window()
+            return
+
         logger.info("=" * 60)
         logger.info("请在浏览器中完成以下步骤：")
         logger.info("1. 如果页面未登录，请点击登录按钮")
@@ -113,29 +358,33 @@ class ZhaopinCrawler:
 
         input("登录完成后，请在控制台按 Enter 键继续...")
 
-        # 打开一个新的标签页用于显示职位详情
+        self.open_detail_window()
+        logger.info("开始爬取职位数据...")
+
+    def open_detail_window(self):
+        """打开一个新的标签页用于显示职位详情，完成后切回列表页"""
         self.driver.execute_script("window.open('');")
         # 切换到新标签页
-        self.detail_window = self.driver.window_handles[1]
+        self.detail_window = [h for h in self.driver.window_handles if h != self.list_window][-1]
         self.driver.switch_to.window(self.detail_window)
+        self.setup_tab(self.driver)
         logger.info(f"详情页窗口句柄: {self.detail_window}")
         logger.info(f"已创建详情页标签页，标签页数量: {len(self.driver.window_handles)}")
 
         # 切回列表页
         self.driver.switch_to.window(self.list_window)
-        logger.info("开始爬取职位数据...")
     
     def random_delay(self):
-        """随机延迟，避免请求过快"""
-        delay = random.uniform(*self.page_delay_range)
-        time.sleep(delay)
+        """随机延迟，避免请求过快（按翻页节奏策略计算剩余间隔）"""
+        with self.metrics.time('page_pacing'):
+            self.pacing.wait('page')
     
     def get_job_list_elements(self):
         """获取职位列表中的所有职位元素"""
         try:
             # 等待页面加载
             logger.info("等待职位列表加载...")
-            time.sleep(3)  # 给页面足够的时间加载
+            self.readiness.wait_for_list(self.driver)
 
             # 首先尝试找到所有职位详情页的链接
             job_links = self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="jobdetail/"]')
@@ -174,148 +423,84 @@ class ZhaopinCrawler:
             logger.error(f"获取职位列表失败: {e}")
             return []
     
-    def extract_job_detail(self):
-        """从职位详情页提取信息"""
-        job_info = {
-            '职位名称': '',
-            '薪资': '',
-            '工作地点': '',
-            '公司名称': '',
-            '任职要求': '',
-            '学历要求': '',
-            '招聘人数': '',
-            '发布时间': ''
-        }
-
+    def harvest_job_cards(self):
+        """
+        一次脚本调用取出列表页的所有职位
+        返回按职位ID去重后的URL以及卡片上已有的职位名称、薪资、公司名称、工作地点
+        :return: 卡片字典列表，失败时返回空列表
+        """
         try:
-            # 等待页面加载完成
-            logger.info("等待详情页加载...")
-            time.sleep(4)  # 给足够的时间让页面完全加载
-
-            # 打印当前URL，确认是否在详情页
-            current_url = self.driver.current_url
-            logger.info(f"当前页面URL: {current_url}")
-
-            if 'jobdetail' not in current_url:
-                logger.warning("当前不在详情页！")
-
-            # 职位名称 - 使用精确XPath
-            try:
-                job_title = self.driver.find_element(By.XPATH, '/html/body/div/div[4]/div[1]/div/h3').text.strip()
-                if job_title and len(job_title) > 2 and len(job_title) < 100:
-                    job_info['职位名称'] = job_title
-                    logger.info(f"职位名称: {job_title}")
-            except Exception as e:
-                logger.warning(f"未找到职位名称: {e}")
-
-            # 薪资 - 使用精确XPath
-            try:
-                salary = self.driver.find_element(By.XPATH, '/html/body/div/div[4]/div[1]/div/div[2]/div[1]/span').text.strip()
-                if salary:
-                    job_info['薪资'] = salary
-                    logger.info(f"薪资: {salary}")
-            except Exception as e:
-                logger.warning(f"未找到薪资信息: {e}")
-                job_info['薪资'] = '面议'
+            logger.info("等待职位列表加载...")
+            self.readiness.wait_for_list(self.driver)
+            cards = self.driver.execute_script(LIST_HARVEST_SCRIPT, CARD_CLASSES, CARD_FIELD_CLASSES) or []
+            logger.info(f"找到 {len(cards)} 个职位")
+            return cards
+        except Exception as e:
+            logger.warning(f"批量获取职位列表失败: {e}")
+            return []
 
-            # 工作地点和学历要求 - 从UL元素中提取
-            try:
-                # 获取包含工作地点、经验要求等的UL元素
-                ul_element = self.driver.find_element(By.XPATH, '/html/body/div/div[4]/div[1]/div/div[2]/div[1]/ul')
-
-                # 获取所有li元素
-                li_elements = ul_element.find_elements(By.TAG_NAME, 'li')
-                if li_elements:
-                    location_text = li_elements[0].text.strip()
-                    if location_text:
-                        job_info['工作地点']  = location_text    
-                        logger.info(f"工作地点：{location_text}")                  
-                # 遍历所有li元素，提取工作地点、学历要求和招聘人数
-                for li in li_elements:
-                    text = li.text.strip()
-                    if not text:
-                        continue
-
-                    # 检查是否包含招聘人数（格式：招×人）
-                    if '招' in text and '人' in text:
-                        # 提取"招"和"人"之间的数字
-                        import re
-                        match = re.search(r'招(\d+)人', text)
-                        if match:
-                            recruit_num = match.group(1)  # 只提取数字
-                            job_info['招聘人数'] = recruit_num
-                            logger.info(f"招聘人数: {recruit_num}")
-
-                    # 检查是否包含学历关键字
-                    education_keywords = ['大专', '本科', '硕士', '博士', '高中', '中专', '初中', '学历不限']
-                    for keyword in education_keywords:
-                        if keyword in text:
-                            job_info['学历要求'] = text
-                            logger.info(f"学历要求: {text}")
-                            break
+    def extract_job_detail(self, page_html=None):
+        """
+        从职位详情页提取信息
+        一次性获取page_source后在进程内解析所有字段，避免逐字段的WebDriver往返
+        :param page_html: 已获取的页面HTML，None表示从当前浏览器页面获取
+        """
+        job_info = empty_job_info()
 
+        try:
+            if page_html is None:
+                # 等待页面加载完成
+                logger.info("等待详情页加载...")
+                self.readiness.wait_for_detail(self.driver)
 
-            except Exception as e:
-                logger.warning(f"未找到工作地点或学历要求: {e}")
+                # 打印当前URL，确认是否在详情页
+                current_url = self.driver.current_url
+                logger.info(f"当前页面URL: {current_url}")
 
-            # 公司名称 - 使用精确XPath
-            try:
-                company_element = self.driver.find_element(By.XPATH, '/html/body/div/div[5]/div[2]/div/div[3]/a[1]')
-                company_name = company_element.text.strip()
-                if company_name:
-                    job_info['公司名称'] = company_name
-                    logger.info(f"公司名称: {company_name}")
-            except Exception as e:
-                logger.warning(f"未找到公司名称: {e}")
+                if 'jobdetail' not in current_url:
+                    logger.warning("当前不在详情页！")
 
-            # 任职要求 - 使用精确XPath
-            try:
-                # 使用class="describtion__detail-content"来定位
-                job_desc = self.driver.find_element(By.XPATH, '//div[@class="describtion__detail-content"]').text.strip()
-                if job_desc and len(job_desc) > 10:
-                    job_info['任职要求'] = job_desc
-                    logger.info(f"任职要求: {job_desc[:50]}...")
-            except Exception as e:
-                logger.warning(f"未找到任职要求（使用主要选择器）: {e}")
-                # 备选方案：尝试其他可能的选择器
-                try:
-                    job_desc = self.driver.find_element(By.CSS_SELECTOR, '.describtion__detail-content').text.strip()
-                    if job_desc and len(job_desc) > 10:
-                        job_info['任职要求'] = job_desc
-                        logger.info(f"任职要求: {job_desc[:50]}...")
-                except Exception as e2:
-                    logger.warning(f"未找到任职要求（使用备选选择器）: {e2}")
-                    job_info['任职要求'] = '无'
-
-            # 发布时间 - 使用精确XPath
-            try:
-                publish_time = self.driver.find_element(By.XPATH, '/html/body/div/div[4]/div[1]/div/div[1]/div[1]/span').text.strip()
-                if publish_time:
-                    job_info['发布时间'] = publish_time
-                    logger.info(f"发布时间: {publish_time}")
-            except Exception as e:
-                logger.warning(f"未找到发布时间: {e}")
-                job_info['发布时间'] = datetime.now().strftime('%Y-%m-%d')
+                with self.metrics.time('page_source'):
+                    page_html = self.driver.page_source
 
-            # 检查是否至少提取到了一些数据
-            if any(job_info.values()):
-                self.job_data.append(job_info)
-                logger.info(f"成功提取职位信息，当前共 {len(self.job_data)} 条")
-            else:
-                logger.warning("未能提取到任何职位信息")
+            with self.metrics.time('extract'):
+                job_info = self.detail_parser.parse(page_html)
 
         except Exception as e:
-            logger.error(f"提取职位详情失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.metrics.inc('extract_errors')
+            logger.exception("提取职位详情失败: %s", e)
 
         return job_info
     
+    def add_job(self, job_info):
+        """
+        记录一条提取到的职位信息（写入缓冲区和流式输出）
+        :return: 是否记录成功
+        """
+        # 检查是否至少提取到了一些数据
+        if not any(job_info.values()):
+            logger.warning("未能提取到任何职位信息")
+            return False
+
+        # job_buffer_size=0时缓冲区不保留记录，不需要转换为JobRecord
+        if getattr(self.job_data, 'maxlen', None) != 0:
+            self.job_data.append(self.record_pool.make(job_info) if self.compact_records else job_info)
+        self.job_count += 1
+        if self.sink:
+            with self.metrics.time('write'):
+                self.sink.write(job_info)
+        if self.market_stats is not None:
+            with self.metrics.time('stats'):
+                self.market_stats.add(job_info)
+        self.metrics.job_done()
+        logger.debug("成功提取职位信息，当前共 %d 条", self.job_count)
+        return True
+
     def go_back(self):
         """返回上一页"""
         try:
             self.driver.back()
-            time.sleep(2)  # 等待页面加载
+            self.readiness.wait_for_list(self.driver)
         except Exception as e:
             logger.error(f"返回失败: {e}")
     
@@ -351,9 +536,10 @@ class ZhaopinCrawler:
             if next_button:
                 # 滚动到按钮位置
                 self.driver.execute_script("arguments[0].scrollIntoView();", next_button)
-                time.sleep(1)
-                next_button.click()
+                previous_first = self.readiness.first_job_link(self.driver)
                 self.random_delay()
+                next_button.click()
+                self.readiness.wait_for_list(self.driver, previous_first)
                 logger.info("成功点击下一页")
                 return True
             else:
@@ -363,96 +549,388 @@ class ZhaopinCrawler:
             logger.error(f"点击下一页失败: {e}")
             return False
     
-    def crawl_page(self):
-        """爬取当前页面的所有职位"""
+    def collect_job_urls(self):
+        """
+        从当前列表页获取需要处理的职位URL
+        :return: (职位URL列表, 职位卡片列表)，获取失败时URL列表为None
+        """
+        # 一次脚本调用取出所有职位卡片（已按职位ID去重）
+        with self.metrics.time('list_harvest'):
+            cards = self.harvest_job_cards()
+        if cards:
+            job_urls = [card['url'] for card in cards]
+        else:
+            # 回退：先获取所有职位元素，再逐个获取URL
+            self.metrics.inc('list_harvest_fallbacks')
+            job_elements = self.get_job_list_elements()
+            if not job_elements:
+                logger.error("未找到任何职位元素")
+                return None, []
+
+            # 提前获取所有职位的URL，避免元素失效问题
+            job_urls = []
+            for elem in job_elements:
+                try:
+                    if elem.tag_name == 'a':
+                        url = elem.get_attribute('href')
+                        if url and 'jobdetail' in url:
+                            job_urls.append(url)
+                except:
+                    pass
+
+        logger.info(f"成功提取 {len(job_urls)} 个职位URL")
+
+        if not job_urls:
+            logger.error("没有获取到任何职位URL")
+            return None, []
+
+        # 跳过数据库中已有的职位，省去打开详情页的开销
+        job_urls = self.filter_known_urls(job_urls)
+        job_urls = self.filter_near_duplicates(job_urls, cards)
+        return job_urls, cards
+
+    def crawl_page(self, job_urls=None):
+        """
+        爬取当前页面的所有职位
+        :param job_urls: 直接处理这些职位URL，不再从列表页获取（断点续爬时使用）
+        """
         logger.info("=" * 60)
         logger.info("开始爬取当前页面")
 
         # 确保在列表页标签页
         self.driver.switch_to.window(self.list_window)
 
-        # 先获取所有职位的URL，避免元素失效问题
-        job_elements = self.get_job_list_elements()
-        if not job_elements:
-            logger.error("未找到任何职位元素")
-            return False
-
-        # 提前获取所有职位的URL
-        job_urls = []
-        for elem in job_elements:
-            try:
-                if elem.tag_name == 'a':
-                    url = elem.get_attribute('href')
-                    if url and 'jobdetail' in url:
-                        job_urls.append(url)
-            except:
-                pass
+        cards = []
+        if job_urls is None:
+            job_urls, cards = self.collect_job_urls()
+            if job_urls is None:
+                return False
+        elif self.list_only and job_urls:
+            # 断点续爬时只有URL，重新获取当前页的卡片
+            with self.metrics.time('list_harvest'):
+                cards = self.harvest_job_cards()
+
+        if self.checkpoint:
+            self.checkpoint.record_page(self.current_page, job_urls)
+
+        # 只用列表页信息：不打开详情页，任职要求等详情页字段留空
+        if self.list_only:
+            if job_urls and not cards:
+                # 批量获取卡片失败：不退回到逐个打开详情页，保留断点日志，下次从这一页继续
+                logger.warning(f"第 {self.current_page} 页没有获取到职位卡片，只保存列表页信息时不打开详情页")
+                self.metrics.inc('list_only_failures')
+                return False
+            cards_by_url = {card['url']: card for card in cards}
+            for job_url in job_urls:
+                if job_url in cards_by_url:
+                    self.save_job(job_url, card_to_job_info(cards_by_url[job_url]))
+            return True
 
-        logger.info(f"成功提取 {len(job_urls)} 个职位URL")
+        # HTTP抓取模式：先用HTTP获取，失败的再交给浏览器
+        if self.fetch_mode == 'http':
+            job_urls = self.fetch_details_over_http(job_urls)
+            if not job_urls:
+                return True
 
-        if not job_urls:
-            logger.error("没有获取到任何职位URL")
-            return False
+        # 并行抓取详情页
+        if self.detail_workers > 1:
+            self.get_detail_pool().run(job_urls)
+            self.driver.switch_to.window(self.list_window)
+            self.maintain_browser(pages=len(job_urls))
+            return True
 
         # 遍历职位URL
         for idx, job_url in enumerate(job_urls, 1):
             try:
-                logger.info(f"\n正在处理第 {idx}/{len(job_urls)} 个职位")
+                logger.info("正在处理第 %d/%d 个职位: %s", idx, len(job_urls), job_url,
+                            extra={'job_id': parse_job_id(job_url), 'url': job_url})
 
-                logger.info(f"职位URL: {job_url}")
-
-                # 增加随机延迟，避免频繁访问
-                time.sleep(random.uniform(2, 4))
+                # 按节奏策略保持访问间隔，避免频繁访问
+                with self.metrics.time('detail_pacing'):
+                    self.pacing.wait('detail')
+                    if self.max_request_rate:
+                        self.get_rate_limiter().acquire()
 
                 # 切换到详情页标签页
-                logger.info("切换到详情页标签页...")
-                self.driver.switch_to.window(self.detail_window)
-                self.driver.get(job_url)
-
-                # 等待详情页加载并验证
-                time.sleep(random.uniform(3, 5))
-                new_url = self.driver.current_url
-                logger.info(f"详情页URL: {new_url}")
-
-                # 检查是否进入安全验证页
-                if 'verify' in new_url or 'captcha' in new_url or 'validate' in new_url:
-                    logger.warning("=" * 60)
-                    logger.warning("检测到安全验证页面！")
-                    logger.warning("=" * 60)
-                    logger.info("请在浏览器中手动完成验证（滑动、点击等）")
-                    logger.info("验证完成后，请在控制台按 Enter 键继续...")
-                    input()
-                    new_url = self.driver.current_url
-                    logger.info(f"验证后URL: {new_url}")
-
-                if 'jobdetail' not in new_url:
-                    logger.warning("警告：URL中没有'jobdetail'，可能没有成功进入详情页")
-                    # 检查是否需要重新验证
-                    logger.info("请在浏览器中确认页面状态，然后按 Enter 键继续...")
-                    input()
-
-                # 提取职位详情
-                self.extract_job_detail()
+                logger.debug("切换到详情页标签页...")
+                with self.metrics.time('switch_window'):
+                    self.driver.switch_to.window(self.detail_window)
+                load_started = time.perf_counter()
+                with self.metrics.time('navigate'):
+                    self.driver.get(job_url)
+
+                # 等待详情页就绪（或跳转到安全验证页）
+                with self.metrics.time('wait_detail'):
+                    self.readiness.wait_for_detail(self.driver)
+                load_seconds = time.perf_counter() - load_started
+                self.process_detail_page(self.driver, job_url)
 
                 # 切换回列表页标签页
-                logger.info("切换回列表页标签页...")
-                self.driver.switch_to.window(self.list_window)
-                time.sleep(random.uniform(1, 2))
+                logger.debug("切换回列表页标签页...")
+                with self.metrics.time('switch_window'):
+                    self.driver.switch_to.window(self.list_window)
+                self.maintain_browser(load_seconds)
 
             except Exception as e:
-                logger.error(f"处理第 {idx} 个职位时出错: {e}")
-                import traceback
-                traceback.print_exc()
+                self.metrics.inc('detail_errors')
+                logger.exception("处理第 %d 个职位时出错: %s", idx, e,
+                                 extra={'job_id': parse_job_id(job_url), 'url': job_url})
                 # 尝试切换回列表页
                 try:
                     self.driver.switch_to.window(self.list_window)
-                    time.sleep(1)
                 except:
                     pass
                 continue
 
         return True
     
+    def check_detail_page(self, driver):
+        """
+        检查详情页是否正常打开，遇到安全验证页时等待用户手动处理
+        :param driver: 当前详情页所在的WebDriver
+        :return: 最终的页面URL；非交互模式下页面不可用时返回None
+        """
+        new_url = driver.current_url
+        logger.debug("详情页URL: %s", new_url)
+
+        # 非交互模式（例如分片的子进程）无法等待用户处理，直接跳过
+        if not self.interactive and (is_verify_url(new_url) or 'jobdetail' not in new_url):
+            self.metrics.inc('verification_pages' if is_verify_url(new_url) else 'non_detail_pages')
+            logger.warning(f"非交互模式下遇到安全验证或非详情页，跳过: {new_url}")
+            return None
+
+        # 检查是否进入安全验证页
+        if is_verify_url(new_url):
+            logger.warning("=" * 60)
+            logger.warning("检测到安全验证页面！")
+            logger.warning("=" * 60)
+            logger.info("请在浏览器中手动完成验证（滑动、点击等）")
+            logger.info("验证完成后，请在控制台按 Enter 键继续...")
+            self.metrics.inc('verification_pages')
+            with self.metrics.time('verification'):
+                input()
+            new_url = driver.current_url
+            logger.info(f"验证后URL: {new_url}")
+
+        if 'jobdetail' not in new_url:
+            logger.warning("警告：URL中没有'jobdetail'，可能没有成功进入详情页")
+            # 检查是否需要重新验证
+            logger.info("请在浏览器中确认页面状态，然后按 Enter 键继续...")
+            self.metrics.inc('non_detail_pages')
+            with self.metrics.time('verification'):
+                input()
+        return new_url
+
+    def process_detail_page(self, driver, job_url):
+        """
+        处理已经加载好的详情页：检查页面、提取字段并保存
+        并行抓取时由多个工作者调用，内部加锁保证输出顺序写入
+        :param driver: 详情页所在的WebDriver（当前窗口为该详情页）
+        :param job_url: 详情页URL
+        :return: 职位信息字典
+        """
+        with self._detail_lock:
+            self.request_count += 1
+            if self.check_detail_page(driver) is None:
+                return empty_job_info()
+            with self.metrics.time('page_source'):
+                page_html = driver.page_source
+            job_info = self.extract_job_detail(page_html)
+            self.save_job(job_url, job_info)
+            if self.page_cost:
+                self.page_cost.record(driver)
+        return job_info
+
+    def save_job(self, job_url, job_info):
+        """记录提取到的职位（add_job）并写入数据库，记录断点和本次看到的最新发布时间"""
+        if self.add_job(job_info):
+            logger.info("已保存职位 %s %s（当前共 %d 条）", job_info['职位名称'], job_info['公司名称'], self.job_count,
+                        extra={'job_id': parse_job_id(job_url), 'url': job_url, 'page': self.current_page,
+                               'fields': {'职位名称': job_info['职位名称'], '公司名称': job_info['公司名称'],
+                                          '薪资': job_info['薪资'], '发布时间': job_info['发布时间']}})
+        if self.store and any(job_info.values()):
+            with self.metrics.time('store'):
+                self.store.upsert(job_url, job_info)
+        if self.search_index is not None and any(job_info.values()):
+            with self.metrics.time('index'):
+                self.search_index.add(parse_job_id(job_url) or job_url, job_info, job_url)
+        if self.near_duplicates is not None and job_info['任职要求']:
+            with self.metrics.time('near_duplicate'):
+                cluster, matches = self.near_duplicates.add(parse_job_id(job_url) or job_url, job_info)
+            if matches:
+                self.metrics.inc('near_duplicates')
+                logger.info("职位 %s 与已有的 %d 个职位相似（簇 %s）", job_info['职位名称'], len(matches), cluster,
+                            extra={'job_id': parse_job_id(job_url), 'url': job_url})
+        if self.checkpoint:
+            # 先把数据库缓冲区写入，避免崩溃后断点日志中已完成的职位没有进入数据库
+            if self.store:
+                self.store.flush()
+            self.checkpoint.mark_done(job_url)
+        published = parse_publish_date(job_info['发布时间']) if job_info['发布时间'] else None
+        if published:
+            self._page_publish_times.append(published)
+            if self._run_publish_time is None or published > self._run_publish_time:
+                self._run_publish_time = published
+
+    def get_http_fetcher(self):
+        """返回HTTP详情页抓取器，每次调用时同步浏览器当前的Cookie"""
+        cookies, user_agent = export_browser_session(self.driver)
+        if self.http_fetcher is None:
+            self.http_fetcher = HttpDetailFetcher(
+                cookies, user_agent, concurrency=self.http_concurrency,
+                rate_limiter=self.get_rate_limiter(), timeout=self.wait_timeout,
+                parser=self.detail_parser,
+            )
+        else:
+            self.http_fetcher.update_session(cookies, user_agent)
+        return self.http_fetcher
+
+    def fetch_details_over_http(self, job_urls):
+        """
+        用HTTP抓取一批详情页
+        :param job_urls: 详情页URL列表
+        :return: 需要交回浏览器抓取的URL列表
+        """
+        try:
+            self.request_count += len(job_urls)
+            with self.metrics.time('http_fetch'):
+                results = self.get_http_fetcher().fetch(job_urls)
+        except Exception as e:
+            self.metrics.inc('http_errors')
+            self.metrics.inc('http_fallbacks', len(job_urls))
+            logger.error(f"HTTP抓取失败，全部交回浏览器处理: {e}")
+            return job_urls
+
+        fallback = []
+        for job_url in job_urls:
+            job_info = results.get(job_url)
+            if job_info is None:
+                fallback.append(job_url)
+                continue
+            with self._detail_lock:
+                self.save_job(job_url, job_info)
+        self.metrics.inc('http_fallbacks', len(fallback))
+        logger.info(f"HTTP抓取成功 {len(job_urls) - len(fallback)} 个，交回浏览器 {len(fallback)} 个")
+        return fallback
+
+    def get_rate_limiter(self):
+        """返回所有详情页工作者共享的令牌桶"""
+        if self.rate_limiter is None:
+            rate = self.max_request_rate or 2.0 / sum(self.detail_delay_range)
+            self.rate_limiter = TokenBucket(rate, burst=1)
+            logger.info(f"详情页总请求速率上限: {rate:.2f} 次/秒")
+        return self.rate_limiter
+
+    def create_worker_driver(self, index):
+        """
+        为并行抓取启动一个浏览器实例
+        复制一份已登录的用户数据目录，避免多个Chrome同时占用同一目录
+        :param index: 工作者序号
+        :return: WebDriver，失败时返回None
+        """
+        worker_dir = f'{self.user_data_dir}_worker{index + 1}'
+        try:
+            shutil.copytree(self.user_data_dir, worker_dir, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns('Singleton*', '*.lock', 'lockfile'))
+            return self.create_driver(worker_dir)
+        except Exception as e:
+            logger.error(f"启动第 {index + 1} 个浏览器实例失败: {e}")
+            return None
+
+    def get_detail_pool(self):
+        """按worker_mode创建详情页并行抓取池"""
+        if self.detail_pool is None:
+            if self.worker_mode == 'drivers':
+                self.detail_pool = DetailDriverPool(
+                    self.create_worker_driver, self.process_detail_page,
+                    workers=self.detail_workers, rate_limiter=self.get_rate_limiter(),
+                    readiness=self.readiness,
+                )
+            else:
+                self.detail_pool = DetailTabPool(
+                    self.driver, self.process_detail_page, tabs=self.detail_workers,
+                    rate_limiter=self.get_rate_limiter(), timeout=self.wait_timeout,
+                    setup_tab=self.setup_tab,
+                )
+                self.detail_pool.open(self.detail_window)
+        return self.detail_pool
+
+    def close_detail_pool(self):
+        """关闭并行抓取池"""
+        if self.detail_pool is None:
+            return
+        if isinstance(self.detail_pool, DetailTabPool):
+            self.detail_pool.close(keep_handle=self.detail_window)
+        else:
+            self.detail_pool.close()
+        self.detail_pool = None
+
+    def filter_known_urls(self, job_urls):
+        """
+        按职位ID去掉重复的URL，并跳过数据库中已经抓取过的职位
+        :param job_urls: 列表页提取到的职位URL
+        :return: 需要打开详情页的URL列表
+        """
+        unique = {}
+        for url in job_urls:
+            unique.setdefault(parse_job_id(url) or url, url)
+
+        if len(self._run_ids) < self.high_water_size:
+            self._run_ids.extend(list(unique)[:self.high_water_size - len(self._run_ids)])
+
+        if not self.incremental and not ((self.store or self.seen_stores) and self.skip_known_jobs):
+            return list(unique.values())
+
+        known = self.high_water_ids & unique.keys()
+        for store in [self.store] + self.seen_stores:
+            if store:
+                known |= store.known_ids(list(unique))
+
+        # 按列表顺序统计连续遇到的已抓取职位数（跨页累计）
+        for job_id in unique:
+            self.seen_streak = self.seen_streak + 1 if job_id in known else 0
+
+        if not self.skip_known_jobs:
+            return list(unique.values())
+        if known:
+            logger.info(f"跳过 {len(known)} 个已抓取过的职位")
+        return [url for job_id, url in unique.items() if job_id not in known]
+
+    def filter_near_duplicates(self, job_urls, cards):
+        """
+        与已知重复簇相同的职位卡片（公司名称、职位名称、工作地点相同）不打开详情页，
+        只保存卡片上的字段和所属簇的代表职位ID
+        :param job_urls: 需要打开详情页的URL列表
+        :param cards: 列表页卡片，没有卡片时不过滤
+        :return: 过滤后的URL列表
+        """
+        if self.near_duplicates is None or not self.skip_near_duplicates or not cards:
+            return job_urls
+        cards_by_url = {card['url']: card for card in cards}
+        remaining = []
+        for url in job_urls:
+            card = cards_by_url.get(url)
+            cluster = self.near_duplicates.match_card(card) if card else None
+            if cluster is None:
+                remaining.append(url)
+                continue
+            logger.debug("跳过相似职位的详情页 %s（簇 %s）", url, cluster)
+            job_info = card_to_job_info(card)
+            job_info[NEAR_DUPLICATE_FIELD] = cluster
+            self.save_job(url, job_info)
+        skipped = len(job_urls) - len(remaining)
+        if skipped:
+            self.metrics.inc('near_duplicate_skips', skipped)
+            logger.info(f"{skipped} 个职位与已知重复簇相同，只保存了列表页信息")
+        return remaining
+
+    @property
+    def output_fields(self):
+        """快照文件的字段：启用相似职位检测时追加相似职位列"""
+        if self.near_duplicates is not None:
+            return JOB_FIELDS + [NEAR_DUPLICATE_FIELD]
+        return JOB_FIELDS
+
     def save_to_csv(self, filename):
         """保存数据到CSV文件"""
         if not self.job_data:
@@ -461,16 +939,102 @@ class ZhaopinCrawler:
         
         logger.info(f"正在保存数据到 {filename}...")
         
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            fieldnames = ['职位名称', '薪资', '工作地点', '公司名称', '任职要求', '学历要求', '招聘人数', '发布时间']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        with self.metrics.time('save_csv'), open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.output_fields)
             
             writer.writeheader()
             for job in self.job_data:
                 writer.writerow(job)
         
         logger.info(f"成功保存 {len(self.job_data)} 条数据到 {filename}")
+
+    def save_snapshot(self, filename):
+        """
+        把job_data保存为快照文件，格式由扩展名决定
+        :param filename: .csv使用save_to_csv，.jsonl和.parquet使用对应的输出
+        """
+        if filename.endswith('.csv'):
+            self.save_to_csv(filename)
+            return
+        if not self.job_data:
+            logger.warning("没有数据可保存")
+            return
+
+        logger.info(f"正在保存数据到 {filename}...")
+        with self.metrics.time('save_snapshot'):
+            count = export_records(filename, self.job_data, fieldnames=self.output_fields)
+        logger.info(f"成功保存 {count} 条数据到 {filename}")
     
+    def finish_output(self, interrupted=False):
+        """
+        爬取结束时收尾输出
+        使用流式输出时关闭文件；否则把job_data保存为一个CSV快照
+        :param interrupted: 是否为用户中断
+        """
+        if self.checkpoint:
+            self.checkpoint.close()
+
+        if self.store:
+            self.save_high_water_mark()
+            self.store.close()
+            logger.info(f"职位数据库 {self.store.path} 已更新")
+
+        if self.search_index is not None:
+            self.search_index.close()
+
+        if self.http_fetcher is not None:
+            self.http_fetcher.close()
+            self.http_fetcher = None
+
+        self.save_market_stats()
+
+        if self.sink:
+            self.sink.close()
+            if self.sink.files:
+                logger.info(f"数据已写入: {', '.join(self.sink.files)}")
+            return
+
+        if self.job_data:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            if interrupted:
+                filename = f'zhaopin_jobs_interrupted_{timestamp}.{self.snapshot_format}'
+            else:
+                filename = f'zhaopin_jobs_{timestamp}.{self.snapshot_format}'
+            self.save_snapshot(filename)
+
+    def report_page_cost(self):
+        """输出页面开销统计；普通模式下同时保存为基准"""
+        if not self.page_cost or not self.page_cost.pages:
+            return
+        if self.lean_profile:
+            self.page_cost.report(self.page_cost_baseline)
+        else:
+            self.page_cost.report()
+            self.page_cost.save(self.page_cost_baseline)
+
+    def export_metrics(self):
+        """导出运行指标（JSON汇总和Prometheus textfile），解析器回退和等待超时次数一并计入"""
+        if not self.metrics_path:
+            return
+        extra = dict(self.detail_parser.fallbacks)
+        extra['wait_timeouts'] = self.readiness.timeouts
+        extra['wait_retries'] = self.readiness.retries
+        try:
+            self.metrics.export_json(f'{self.metrics_path}.json', extra)
+            self.metrics.export_prometheus(f'{self.metrics_path}.prom', extra)
+        except OSError as e:
+            logger.warning(f"导出运行指标失败: {e}")
+
+    def save_market_stats(self):
+        """保存实时市场统计（汇总和统计状态），看板直接读取该文件"""
+        if self.market_stats is None or not self.market_stats_path:
+            return
+        try:
+            with self.metrics.time('stats'):
+                self.market_stats.save(self.market_stats_path)
+        except OSError as e:
+            logger.warning(f"保存市场统计失败: {e}")
+
     def click_latest_publish_button(self):
         """点击'最新发布'按钮以加载职位列表"""
         # 确保在列表页标签页
@@ -479,8 +1043,9 @@ class ZhaopinCrawler:
         try:
             logger.info("尝试点击'最新发布'按钮...")
             latest_button = self.driver.find_element(By.XPATH, '/html/body/div[1]/div[4]/div[2]/div[1]/ul/li[3]/a')
+            previous_first = self.readiness.first_job_link(self.driver)
             latest_button.click()
-            time.sleep(random.uniform(2, 3))
+            self.readiness.wait_for_list(self.driver, previous_first)
             logger.info("成功点击'最新发布'按钮")
             return True
         except Exception as e:
@@ -495,7 +1060,6 @@ class ZhaopinCrawler:
         :return: 完整URL
         """
         # 将URL中的pN替换为pn，例如p1替换为p2
-        import re
         return re.sub(r'/p\d+', f'/p{page_num}', base_url)
 
     def click_page_button(self, page_num):
@@ -506,115 +1070,312 @@ class ZhaopinCrawler:
         try:
             # 查找指定页码的按钮
             page_button = self.driver.find_element(By.XPATH, f'//a[contains(@class, "soupager__index") and text()="{page_num}"]')
-            page_button.click()
+            previous_first = self.readiness.first_job_link(self.driver)
+            self.random_delay()
+            with self.metrics.time('page_click'):
+                page_button.click()
+            self.request_count += 1
             logger.info(f"成功点击第 {page_num} 页按钮")
-            time.sleep(random.uniform(3, 5))
+            with self.metrics.time('wait_list'):
+                self.readiness.wait_for_list(self.driver, previous_first)
             return True
         except Exception as e:
             logger.warning(f"未找到或无法点击第 {page_num} 页按钮: {e}")
             return False
 
-    def crawl(self, start_url, max_pages=None):
+    def load_high_water_mark(self, search_url):
+        """读取上一次爬取该搜索URL时的高水位标记，用于增量模式"""
+        self.search_url = search_url
+        self.seen_streak = 0
+        self._run_ids = []
+        self._run_publish_time = None
+        if self.incremental and not self.store:
+            logger.warning("增量模式需要职位数据库保存高水位标记，没有设置store时将爬取所有页")
+        if self.store and self.incremental:
+            self.high_water_ids, publish_time = self.store.load_high_water_mark(search_url)
+            # 标记中保存的是日期（YYYY-MM-DD）
+            self.high_water_publish_time = parse_publish_date(publish_time) if publish_time else None
+            logger.info(f"增量模式：上次记录了 {len(self.high_water_ids)} 个最新职位，"
+                        f"最新发布时间 {self.high_water_publish_time}")
+
+    def resume_from_checkpoint(self, state):
         """
-        开始爬取
-        :param start_url: 起始URL
-        :param max_pages: 最大爬取页数，None表示爬取所有页
+        从断点日志恢复：直接打开中断时所在的列表页
+        :param state: CheckpointJournal.begin 返回的状态
+        :return: (页码, 该页剩余未处理的职位URL)
         """
-        # 初始化浏览器
-        if not self.init_driver():
-            return False
+        page_num = state['page']
+        remaining = [url for url in state['urls'] if url not in state['done']]
 
-        try:
-            # 手动登录
-            self.manual_login(start_url)
+        self.driver.switch_to.window(self.list_window)
+        current_url = self.driver.current_url
+        page_url = self.get_page_url(current_url, page_num)
+        if page_url != current_url:
+            logger.info(f"断点续爬：直接打开第 {page_num} 页 {page_url}")
+            self.driver.get(page_url)
+            self.readiness.wait_for_list(self.driver)
+        elif page_num != 1:
+            logger.warning(f"当前URL中没有页码，无法直接跳到第 {page_num} 页，将从第1页开始")
+            page_num = 1
 
-            # 点击"最新发布"按钮加载职位列表
-            self.click_latest_publish_button()
+        logger.info(f"断点续爬：第 {page_num} 页还剩 {len(remaining)} 个职位")
+        return page_num, remaining
 
-            # 开始爬取
-            page_num = 1
-            save_interval = 8  # 每8页保存一次
-            while True:
-                logger.info(f"\n{'=' * 60}")
-                logger.info(f"正在爬取第 {page_num} 页")
-                logger.info(f"{'=' * 60}")
-
-                # 爬取当前页
-                success = self.crawl_page()
-                if not success:
-                    break
-
-                # 检查是否达到最大页数
-                if max_pages and page_num >= max_pages:
-                    logger.info(f"已达到最大页数 {max_pages}，停止爬取")
-                    break
-
-                # 每8页保存一次数据
-                if page_num % save_interval == 0:
+    def start_session(self, start_url, wait_for_login=True):
+        """
+        打开浏览器并完成登录，之后可以连续爬取多个搜索页
+        :param start_url: 登录时打开的页面
+        :param wait_for_login: 是否等待用户手动登录，用户数据目录中已有登录状态时可以设为False
+        """
+        if self.measure_page_cost or self.lean_profile:
+            self.page_cost = PageCostMonitor('lean' if self.lean_profile else 'full')
+        if self.near_duplicates is not None and self.near_duplicate_path:
+            self.near_duplicates.load(self.near_duplicate_path)
+        fieldnames = getattr(self.sink, 'fieldnames', None)
+        if self.near_duplicates is not None and fieldnames is not None and NEAR_DUPLICATE_FIELD not in fieldnames:
+            logger.warning(f"已启用相似职位检测，但输出文件没有 {NEAR_DUPLICATE_FIELD} 列，"
+                           f"创建输出时可以传入 fieldnames=JOB_FIELDS + [NEAR_DUPLICATE_FIELD]")
+        if self.market_stats is not None and self.market_stats_path and os.path.exists(self.market_stats_path):
+            # 之前运行的统计与本次运行累加
+            self.market_stats.merge(MarketStats.load(self.market_stats_path))
+            logger.info(f"已载入市场统计 {self.market_stats_path}，{len(self.market_stats)} 条职位")
+
+        # 手动登录
+        self.manual_login(start_url, wait_for_login)
+        if self.headless_after_login:
+            self.restart_headless()
+
+    def close_session(self, interrupted=False):
+        """保存数据并关闭浏览器"""
+        # 保存数据（只保存一次）
+        self.finish_output(interrupted)
+        self.report_page_cost()
+        if self.near_duplicates is not None and self.near_duplicate_path:
+            try:
+                self.near_duplicates.save(self.near_duplicate_path)
+            except Exception as e:
+                logger.warning(f"保存相似职位索引失败: {e}")
+        self.export_metrics()
+        self.metrics.log_summary()
+
+        # 关闭浏览器
+        try:
+            self.close_detail_pool()
+        except Exception as e:
+            logger.warning(f"关闭详情页并行抓取池失败: {e}")
+        if self.driver and self.attached:
+            # 连接的浏览器继续运行，只关闭本次打开的详情页标签页
+            logger.info("正在断开与浏览器的连接...")
+            try:
+                self.driver.switch_to.window(self.detail_window)
+                self.driver.close()
+            except Exception as e:
+                logger.warning(f"关闭详情页标签页失败: {e}")
+            self.driver.quit()
+            self.driver = None
+        elif self.driver:
+            logger.info("正在关闭浏览器...")
+            self.driver.quit()
+            self.driver = None
+
+    def save_high_water_mark(self):
+        """保存当前搜索的高水位标记"""
+        if self.store and self.search_url and self._run_ids:
+            publish_time = self._run_publish_time.isoformat() if self._run_publish_time else None
+            self.store.save_high_water_mark(self.search_url, self._run_ids, publish_time)
+            self._run_ids = []
+
+    def crawl_search(self, search_url, max_pages=None, incremental=None, resume=True, max_requests=None):
+        """
+        在已登录的浏览器中爬取一个搜索页
+        :param search_url: 搜索页URL
+        :param max_pages: 最大爬取页数，None表示爬取所有页
+        :param incremental: 是否使用增量模式，None表示使用self.incremental
+        :param resume: 有断点日志时是否从中断的位置继续
+        :param max_requests: 本次最多打开的页面数（列表页+详情页），预计下一页会超出时停止翻页，None表示不限制
+        :return: 本次搜索提取到的记录数
+        """
+        if incremental is not None:
+            self.incremental = incremental
+        if max_requests is not None and max_requests <= 0:
+            logger.info(f"本次请求预算已用完（剩余 {max_requests} 次），跳过搜索页 {search_url}")
+            return 0
+        jobs_before = self.job_count
+        requests_before = self.request_count
+        pages_done = 0
+
+        # 切换到新的搜索页（登录时已经打开的页面不需要重新打开）
+        self.driver.switch_to.window(self.list_window)
+        if self.driver.current_url != search_url:
+            logger.info(f"正在打开搜索页: {search_url}")
+            self.driver.get(search_url)
+            self.request_count += 1
+            self.readiness.wait_for_list(self.driver)
+
+        # 点击"最新发布"按钮加载职位列表
+        self.click_latest_publish_button()
+        self.load_high_water_mark(search_url)
+
+        # 开始爬取
+        page_num = 1
+        resume_urls = None
+        if self.checkpoint:
+            state = self.checkpoint.begin(search_url, resume=resume)
+            if state:
+                page_num, resume_urls = self.resume_from_checkpoint(state)
+        save_interval = 8  # 每8页保存一次
+        finished = False  # 是否正常结束（到达最后一页、最大页数或增量模式的停止条件）
+        while True:
+            logger.info(f"\n{'=' * 60}")
+            logger.info(f"正在爬取第 {page_num} 页")
+            logger.info(f"{'=' * 60}")
+
+            # 爬取当前页
+            self.current_page = page_num
+            self._page_publish_times = []
+            success = self.crawl_page(resume_urls)
+            resume_urls = None
+            self.export_metrics()
+            self.save_market_stats()
+            logger.info(f"当前速率 {self.metrics.jobs_per_hour(recent=True):.0f} 条/小时")
+            if not success:
+                # 列表页获取失败或遇到验证页：保留断点日志，下次从这一页继续
+                logger.warning(f"第 {page_num} 页爬取失败，停止爬取")
+                break
+            pages_done += 1
+
+            # 检查是否达到最大页数
+            if max_pages and page_num >= max_pages:
+                logger.info(f"已达到最大页数 {max_pages}，停止爬取")
+                finished = True
+                break
+
+            # 增量模式：最新发布排序下，连续出现已抓取过的职位说明后面都是旧数据
+            if self.incremental and self.seen_streak >= self.stop_after_seen:
+                logger.info(f"增量模式：连续 {self.seen_streak} 个职位已抓取过，停止翻页")
+                finished = True
+                break
+            if (self.incremental and self.high_water_publish_time and self._page_publish_times
+                    and max(self._page_publish_times) < self.high_water_publish_time):
+                logger.info(f"增量模式：本页职位的发布日期都早于上次的最新发布日期 "
+                            f"{self.high_water_publish_time}，停止翻页")
+                finished = True
+                break
+
+            # 请求预算：按已爬页的平均请求数估计下一页，超出时停止（保留断点日志，下次从下一页继续）
+            used = self.request_count - requests_before
+            if max_requests is not None and used + used / pages_done > max_requests:
+                logger.info(f"已使用 {used} 次请求，下一页将超出本次预算 {max_requests} 次，停止翻页")
+                break
+
+            # 每8页保存一次数据（使用流式输出时数据已逐条写入，只需落盘）
+            if page_num % save_interval == 0:
+                if self.store:
+                    self.store.flush()
+                if self.search_index is not None:
+                    self.search_index.commit()
+                if self.sink:
+                    self.sink.flush(fsync=True)
+                    logger.info(f"已爬取 {page_num} 页，当前共 {self.job_count} 条数据")
+                else:
                     logger.info(f"\n已爬取 {page_num} 页，正在保存数据...")
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f'zhaopin_jobs_page{page_num}_{timestamp}.csv'
-                    self.save_to_csv(filename)
+                    filename = f'zhaopin_jobs_page{page_num}_{timestamp}.{self.snapshot_format}'
+                    self.save_snapshot(filename)
                     logger.info(f"已保存到 {filename}，当前共 {len(self.job_data)} 条数据")
 
-                # 翻页
-                page_num += 1
-                logger.info(f"准备翻到第 {page_num} 页...")
+            # 翻页
+            page_num += 1
+            logger.info(f"准备翻到第 {page_num} 页...")
+
+            # 点击下一页按钮
+            if not self.click_page_button(page_num):
+                logger.info("无法找到下一页按钮，可能已到最后一页")
+                finished = True
+                break
+
+        if finished:
+            if self.checkpoint:
+                self.checkpoint.finish()
+            # 中途停止时不更新高水位标记，否则下次增量爬取会在新标记处停止，到不了中断后的页
+            self.save_high_water_mark()
+        else:
+            self._run_ids = []
+        return self.job_count - jobs_before
+
+    def crawl(self, start_url, max_pages=None, incremental=None, resume=True):
+        """
+        开始爬取
+        :param start_url: 起始URL
+        :param max_pages: 最大爬取页数，None表示爬取所有页
+        :param incremental: 是否使用增量模式，None表示使用self.incremental
+        :param resume: 有断点日志时是否从中断的位置继续
+        """
+        # 初始化浏览器
+        if not self.init_driver():
+            return False
 
-                # 点击下一页按钮
-                if not self.click_page_button(page_num):
-                    logger.info("无法找到下一页按钮，可能已到最后一页")
-                    break
+        interrupted = False
+        try:
+            self.start_session(start_url)
+            self.crawl_search(start_url, max_pages, incremental, resume)
 
-            # 保存数据
-            if self.job_data:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'zhaopin_jobs_{timestamp}.csv'
-                self.save_to_csv(filename)
-            else:
+            if not self.job_count:
                 logger.warning("没有爬取到任何数据")
 
-            logger.info(f"爬取完成！共爬取 {len(self.job_data)} 条职位信息")
+            logger.info(f"爬取完成！共爬取 {self.job_count} 条职位信息")
             return True
 
         except KeyboardInterrupt:
             logger.info("\n用户中断爬取")
-            if self.job_data:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'zhaopin_jobs_interrupted_{timestamp}.csv'
-                self.save_to_csv(filename)
+            interrupted = True
             return False
         except Exception as e:
             logger.error(f"爬取过程中出现错误: {e}")
             return False
         finally:
-            # 保存数据
-            if self.job_data:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'zhaopin_jobs_{timestamp}.csv'
-                self.save_to_csv(filename)
-
-            # 关闭浏览器
-            if self.driver:
-                logger.info("正在关闭浏览器...")
-                self.driver.quit()
-
+            self.close_session(interrupted)
 
 def main():
     """主函数"""
+    # 配置日志：后台线程写入，日志文件超过20MB时滚动
+    # 需要JSON格式日志或每个字段的提取结果时，可以改为 setup_logging(json_format=True, level=logging.DEBUG)
+    setup_logging('zhaopin_crawler.log')
+
     # 目标URL - 智联招聘上市公司职位
     target_url = "https://www.zhaopin.com/sou/jl489/p1?ct=9"
     
-    # 创建爬虫实例
-    crawler = ZhaopinCrawler()
+    # 流式输出：每条记录立即追加写入，单个文件超过50MB时滚动到新文件
+    sink = CsvSink('zhaopin_jobs', flush_every=1, fsync_every=20, max_bytes=50 * 1024 * 1024)
+
+    # 职位数据库：记录已抓取的职位，下次运行时跳过
+    store = JobStore('zhaopin_jobs.db')
+
+    # 断点日志：程序中断后再次运行时从中断的页继续
+    checkpoint = CheckpointJournal('zhaopin_checkpoint.jsonl')
+
+    # 创建爬虫实例，内存中只保留最近1000条记录
+    crawler = ZhaopinCrawler(sink=sink, job_buffer_size=1000, store=store, checkpoint=checkpoint)
+
+    # 相似职位检测（需要numpy）：同一公司重复发布的相似职位不再打开详情页
+    # 启用时创建输出需要加上相似职位列：CsvSink(..., fieldnames=JOB_FIELDS + [NEAR_DUPLICATE_FIELD])
+    # crawler.near_duplicates = NearDuplicateIndex()
+    # crawler.near_duplicate_path = 'zhaopin_neardup.npz'
+
+    # 实时市场统计：薪资分位数、公司职位数、地点/学历/发布时间分布，每页更新一次
+    crawler.market_stats = MarketStats()
+    crawler.market_stats_path = 'zhaopin_stats.json'
     
     # 开始爬取
     # max_pages: 设置爬取的最大页数，例如3表示只爬取3页
     # 设置为None表示爬取所有页面
     max_pages = None  # 可以改为具体数字，如 3, 5, 10 等
+
+    # incremental: 增量模式，遇到连续已抓取过的职位后停止翻页，适合定时刷新
+    incremental = False
     
     logger.info("开始爬取智联招聘上市公司职位数据...")
-    crawler.crawl(target_url, max_pages=max_pages)
+    crawler.crawl(target_url, max_pages=max_pages, incremental=incremental)
     
     logger.info("程序执行完毕")
 
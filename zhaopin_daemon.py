@@ -0,0 +1,347 @@
+"""
+常驻爬虫进程
+每次运行 main() 都要冷启动Chrome并在控制台等待手动登录，短时间的定时刷新开销很大，也无法自动化。
+守护进程只启动（或连接）一个已登录的浏览器，在本机端口上接收爬取任务，
+任务在同一个浏览器会话中依次执行，不需要重新启动浏览器和登录，也能复用浏览器缓存。
+浏览器以远程调试端口启动，其他脚本也可以用 ZhaopinCrawler.attach_driver 连接到这个浏览器
+
+用法：
+    python zhaopin_daemon.py serve                                   # 启动浏览器，手动登录一次后等待任务
+    python zhaopin_daemon.py serve --attach 127.0.0.1:9222           # 连接到已经登录的Chrome
+    python zhaopin_daemon.py crawl "https://www.zhaopin.com/sou/jl489/p1?ct=9" --max-pages 3 -o jobs.csv
+    python zhaopin_daemon.py status
+    python zhaopin_daemon.py stop
+
+协议：每个请求和响应都是一行JSON，例如
+    {"command": "crawl", "url": "...", "max_pages": 3, "output": "jobs.csv", "wait": true}
+"""
+
+from datetime import datetime
+import socketserver
+import threading
+import argparse
+import logging
+import socket
+import queue
+import json
+import time
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'  # 只监听本机
+DEFAULT_PORT = 8765
+DEFAULT_DEBUG_PORT = 9222
+DEFAULT_START_URL = 'https://www.zhaopin.com/sou/jl489/p1?ct=9'
+
+
+class CrawlJob:
+    """一个爬取任务"""
+
+    def __init__(self, job_id, url, max_pages=None, incremental=None, output=None):
+        """
+        :param job_id: 任务编号
+        :param url: 搜索页URL
+        :param max_pages: 最多爬取的页数，None表示不限制
+        :param incremental: 是否使用增量模式，None表示使用爬虫的默认设置
+        :param output: 本次任务的输出文件（.csv、.jsonl、.parquet），None表示写入守护进程的默认输出
+        """
+        self.job_id = job_id
+        self.url = url
+        self.max_pages = max_pages
+        self.incremental = incremental
+        self.output = output
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            'job': self.job_id,
+            'url': self.url,
+            'max_pages': self.max_pages,
+            'output': self.output,
+            'submitted_at': datetime.fromtimestamp(self.submitted).strftime('%Y-%m-%d %H:%M:%S'),
+            'queued_seconds': round((self.started or time.time()) - self.submitted, 3),
+        }
+
+
+class CrawlDaemon:
+    """拥有一个已登录浏览器的常驻进程，按顺序执行收到的爬取任务"""
+
+    def __init__(self, crawler, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        :param crawler: 已经完成 start_session 的 ZhaopinCrawler
+        :param host: 监听地址，默认只接受本机连接
+        :param port: 监听端口
+        """
+        self.crawler = crawler
+        self.host = host
+        self.port = port
+        self.jobs = queue.Queue()
+        self.current = None
+        self.completed = 0
+        self.started = time.time()
+        self._next_id = 1
+        self._id_lock = threading.Lock()
+        self._server = None
+        self._stopping = False
+
+    def submit(self, url, max_pages=None, incremental=None, output=None):
+        """加入一个爬取任务，返回CrawlJob（正在停止时直接返回已取消的任务）"""
+        with self._id_lock:
+            job = CrawlJob(self._next_id, url, max_pages, incremental, output)
+            self._next_id += 1
+            if self._stopping:
+                self._cancel(job)
+                return job
+            self.jobs.put(job)
+        logger.info(f"收到任务 {job.job_id}: {url}（最多 {max_pages or '全部'} 页）")
+        return job
+
+    def status(self):
+        return {
+            'status': 'busy' if self.current else 'idle',
+            'current': self.current.to_dict() if self.current else None,
+            'queued': self.jobs.qsize(),
+            'completed': self.completed,
+            'job_count': self.crawler.job_count,
+            'request_count': self.crawler.request_count,
+            'uptime_seconds': round(time.time() - self.started, 1),
+        }
+
+    def stop(self):
+        """执行完当前任务后停止，队列中剩下的任务取消"""
+        with self._id_lock:
+            self._stopping = True
+        self.jobs.put(None)
+
+    def _cancel(self, job):
+        job.result = {'status': 'cancelled', 'job': job.job_id}
+        job.done.set()
+
+    def cancel_queued(self):
+        """取消队列中还没有执行的任务，等待结果的客户端会收到cancelled"""
+        with self._id_lock:
+            self._stopping = True
+        cancelled = 0
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                self._cancel(job)
+                cancelled += 1
+        if cancelled:
+            logger.info(f"已取消队列中的 {cancelled} 个任务")
+
+    def run_job(self, job):
+        """在浏览器会话中执行一个任务"""
+        from zhaopin_sink import sink_for_path
+
+        crawler = self.crawler
+        default_sink = crawler.sink
+        if job.output:
+            crawler.sink = sink_for_path(job.output)
+        job.started = time.time()
+        job.result = {'status': 'interrupted'}
+        try:
+            # crawl_search会切换到列表页、在需要时打开搜索页并点击"最新发布"回到第1页
+            jobs = crawler.crawl_search(job.url, max_pages=job.max_pages, incremental=job.incremental,
+                                        resume=False)
+            job.result = {'status': 'done', 'jobs': jobs}
+        except Exception as e:
+            logger.exception("任务 %d 执行失败: %s", job.job_id, e)
+            job.result = {'status': 'error', 'error': str(e)}
+        finally:
+            if job.output:
+                crawler.sink.close()
+                crawler.sink = default_sink
+            elif crawler.sink:
+                crawler.sink.flush(fsync=True)
+            if crawler.store:
+                crawler.store.flush()
+            if crawler.search_index is not None:
+                crawler.search_index.commit()
+            crawler.save_market_stats()
+            crawler.export_metrics()
+            job.finished = time.time()
+            job.result.update(job=job.job_id, output=job.output,
+                              start_latency=round(job.started - job.submitted, 3),
+                              seconds=round(job.finished - job.started, 1))
+            self.completed += 1
+            job.done.set()
+        logger.info(f"任务 {job.job_id} 完成：{job.result}")
+
+    def serve_forever(self):
+        """在后台线程监听端口，在当前线程依次执行任务（Selenium不支持多线程同时操作一个浏览器）"""
+        self._server = _DaemonServer((self.host, self.port), _RequestHandler, self)
+        thread = threading.Thread(target=self._server.serve_forever, name='daemon-server', daemon=True)
+        thread.start()
+        logger.info(f"守护进程已启动，监听 {self.host}:{self.port}")
+        try:
+            while not self._stopping:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                self.current = job
+                try:
+                    self.run_job(job)
+                finally:
+                    self.current = None
+        finally:
+            self.cancel_queued()
+            self._server.shutdown()
+            self._server.server_close()
+            logger.info("守护进程已停止")
+
+
+class _DaemonServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, handler, crawl_daemon):
+        self.crawl_daemon = crawl_daemon
+        super().__init__(address, handler)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """处理一行JSON请求"""
+
+    def _reply(self, data):
+        self.wfile.write((json.dumps(data, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self):
+        daemon = self.server.crawl_daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self._reply({'status': 'error', 'error': '请求不是有效的JSON'})
+                continue
+            command = request.get('command')
+            if command == 'crawl':
+                if not request.get('url'):
+                    self._reply({'status': 'error', 'error': '缺少url'})
+                    continue
+                job = daemon.submit(request['url'], request.get('max_pages'), request.get('incremental'),
+                                    request.get('output'))
+                self._reply({'status': 'accepted', 'job': job.job_id, 'queued': daemon.jobs.qsize()})
+                if request.get('wait', True):
+                    job.done.wait()
+                    self._reply(job.result)
+            elif command == 'status':
+                self._reply(daemon.status())
+            elif command == 'stop':
+                daemon.stop()
+                self._reply({'status': 'stopping'})
+            else:
+                self._reply({'status': 'error', 'error': f'未知命令: {command}'})
+
+
+def send_request(request, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+    """
+    向守护进程发送一个请求，逐条产生响应
+    :param request: 请求字典
+    :param timeout: 等待响应的超时秒数，None表示一直等待（等待任务完成时使用）
+    """
+    with socket.create_connection((host, port), timeout=10) as sock:
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(request, ensure_ascii=False) + '\n').encode('utf-8'))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('r', encoding='utf-8') as responses:
+            for line in responses:
+                yield json.loads(line)
+
+
+def start_daemon(args):
+    """启动或连接浏览器并开始接收任务"""
+    from zhaopin_crawler import ZhaopinCrawler
+    from zhaopin_logging import setup_logging
+    from zhaopin_sink import CsvSink
+    from zhaopin_store import JobStore
+    from zhaopin_stats import MarketStats
+
+    if args.attach and args.headless:
+        # 切换无界面模式需要重启浏览器，而连接的浏览器由其他程序共用
+        print("--headless 不能与 --attach 同时使用")
+        return 1
+    setup_logging('zhaopin_crawler.log')
+    sink = CsvSink('zhaopin_jobs', flush_every=1, fsync_every=20, max_bytes=50 * 1024 * 1024)
+    crawler = ZhaopinCrawler(sink=sink, job_buffer_size=0, store=JobStore('zhaopin_jobs.db'))
+    crawler.market_stats = MarketStats()
+    crawler.market_stats_path = 'zhaopin_stats.json'
+    crawler.headless_after_login = args.headless
+    if args.attach:
+        if not crawler.attach_driver(args.attach):
+            return 1
+    else:
+        crawler.remote_debugging_port = args.debug_port
+        if not crawler.init_driver():
+            return 1
+        logger.info(f"浏览器远程调试地址: 127.0.0.1:{args.debug_port}")
+
+    interrupted = False
+    try:
+        # 连接的浏览器已经登录；自己启动的浏览器首次需要手动登录（--no-login表示用户数据目录中已有登录状态）
+        crawler.start_session(args.start_url, wait_for_login=not (args.attach or args.no_login))
+        CrawlDaemon(crawler, args.host, args.port).serve_forever()
+    except KeyboardInterrupt:
+        logger.info("\n用户中断守护进程")
+        interrupted = True
+    finally:
+        crawler.close_session(interrupted)
+    return 0
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='常驻爬虫进程')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='守护进程监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='守护进程监听端口')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='启动守护进程')
+    serve.add_argument('--attach', help='连接到已经运行的Chrome远程调试地址，例如127.0.0.1:9222')
+    serve.add_argument('--debug-port', type=int, default=DEFAULT_DEBUG_PORT, help='启动浏览器时打开的远程调试端口')
+    serve.add_argument('--start-url', default=DEFAULT_START_URL, help='登录时打开的页面')
+    serve.add_argument('--no-login', action='store_true', help='不等待手动登录（用户数据目录中已有登录状态）')
+    serve.add_argument('--headless', action='store_true', help='登录完成后以无界面模式重启浏览器')
+
+    crawl = commands.add_parser('crawl', help='提交一个爬取任务')
+    crawl.add_argument('url', help='搜索页URL')
+    crawl.add_argument('--max-pages', type=int, help='最多爬取的页数')
+    crawl.add_argument('--incremental', action='store_true', help='使用增量模式')
+    crawl.add_argument('-o', '--output', help='本次任务的输出文件（.csv、.jsonl、.parquet）')
+    crawl.add_argument('--no-wait', action='store_true', help='提交后立即返回，不等待任务完成')
+
+    commands.add_parser('status', help='查看守护进程状态')
+    commands.add_parser('stop', help='执行完当前任务后停止守护进程')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        return start_daemon(args)
+
+    if args.command == 'crawl':
+        request = {'command': 'crawl', 'url': args.url, 'max_pages': args.max_pages,
+                   'incremental': args.incremental or None, 'wait': not args.no_wait,
+                   'output': os.path.abspath(args.output) if args.output else None}
+    else:
+        request = {'command': args.command}
+    try:
+        for response in send_request(request, args.host, args.port):
+            print(json.dumps(response, ensure_ascii=False))
+    except OSError as e:
+        print(f"无法连接守护进程 {args.host}:{args.port}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+基于HTTP的详情页抓取
+复用浏览器登录后的Cookie和User-Agent，用asyncio + aiohttp的长连接池
+并发获取详情页HTML，再用进程内解析器提取字段；
+不是可解析的详情页（验证页、跳转、页面结构不同）时交回浏览器处理
+"""
+
+import asyncio
+import logging
+
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，只有使用HTTP抓取模式时才需要
+    aiohttp = None
+
+from zhaopin_parser import JobDetailParser
+from zhaopin_wait import is_verify_url
+
+logger = logging.getLogger(__name__)
+
+
+def export_browser_session(driver):
+    """
+    导出浏览器当前的登录状态
+    :param driver: 已登录的WebDriver
+    :return: (Cookie字典, User-Agent)
+    """
+    cookies = {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
+    user_agent = driver.execute_script('return navigator.userAgent;')
+    return cookies, user_agent
+
+
+class HttpDetailFetcher:
+    """用HTTP长连接池并发抓取详情页"""
+
+    def __init__(self, cookies=None, user_agent=None, concurrency=4, rate_limiter=None,
+                 timeout=15, parser=None):
+        """
+        :param cookies: Cookie字典，通常来自 export_browser_session
+        :param user_agent: User-Agent，与浏览器保持一致
+        :param concurrency: 最大并发请求数（也是连接池大小）
+        :param rate_limiter: 共享的令牌桶（TokenBucket），None表示不限速
+        :param timeout: 单个请求超时秒数
+        :param parser: 详情页解析器，默认JobDetailParser
+        """
+        if aiohttp is None:
+            raise RuntimeError("HTTP抓取模式需要安装aiohttp: pip install aiohttp")
+        self.cookies = cookies or {}
+        self.user_agent = user_agent
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.parser = parser or JobDetailParser()
+        # 事件循环和会话在整个抓取过程中复用，各列表页之间共用同一个连接池；close时关闭
+        self._loop = None
+        self._session = None
+
+    def update_session(self, cookies, user_agent=None):
+        """更新Cookie和User-Agent（浏览器中的登录状态变化后调用）"""
+        self.cookies = cookies
+        if user_agent:
+            self.user_agent = user_agent
+        if self._session is not None:
+            self._session.cookie_jar.update_cookies(cookies)
+
+    def _get_session(self):
+        """返回长连接会话，第一次调用时在当前事件循环中创建"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, cookies=self.cookies)
+        return self._session
+
+    def _headers(self):
+        headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9',
+        }
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
+        return headers
+
+    async def _fetch_one(self, session, semaphore, job_url):
+        """获取并解析一个详情页，失败时返回None"""
+        async with semaphore:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            try:
+                async with session.get(job_url, headers=self._headers()) as response:
+                    final_url = str(response.url)
+                    if response.status != 200:
+                        logger.warning(f"HTTP {response.status}，交回浏览器处理: {job_url}")
+                        return None
+                    if is_verify_url(final_url) or 'jobdetail' not in final_url:
+                        logger.warning(f"跳转到非详情页 {final_url}，交回浏览器处理")
+                        return None
+                    page_html = await response.text(errors='replace')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"HTTP请求失败，交回浏览器处理 {job_url}: {e}")
+                return None
+
+        job_info = self.parser.parse(page_html, require_detail=True)
+        if job_info is None:
+            logger.warning(f"响应不是可解析的详情页，交回浏览器处理: {job_url}")
+        return job_info
+
+    async def fetch_async(self, job_urls):
+        """
+        并发抓取一批详情页
+        :param job_urls: 详情页URL列表
+        :return: {URL: 职位信息字典或None}
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        session = self._get_session()
+        results = await asyncio.gather(*(self._fetch_one(session, semaphore, url) for url in job_urls))
+        return dict(zip(job_urls, results))
+
+    def fetch(self, job_urls):
+        """
+        同步接口：抓取一批详情页
+        :param job_urls: 详情页URL列表
+        :return: {URL: 职位信息字典或None}，None表示需要用浏览器重新抓取
+        """
+        if not job_urls:
+            return {}
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.fetch_async(list(job_urls)))
+
+    def close(self):
+        """关闭会话（连接池）和事件循环"""
+        if self._session is not None:
+            if self._loop is not None:
+                self._loop.run_until_complete(self._session.close())
+            self._session = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
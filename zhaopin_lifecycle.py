@@ -0,0 +1,178 @@
+"""
+浏览器生命周期管理
+长时间运行时同一个详情页标签页要加载几千个页面，渲染进程内存不断增长，页面加载也越来越慢。
+BrowserLifecycle记录每个详情页的加载耗时，并定期统计浏览器进程（chromedriver及其所有子进程）的内存，
+超过阈值时建议回收详情页标签页，回收后仍然超过阈值时建议重启整个浏览器；
+登录状态保存在用户数据目录中，重启后不需要重新登录
+"""
+
+from collections import deque
+import statistics
+import logging
+import os
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，没有安装时在Linux上读取/proc
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+RECYCLE_TAB = 'tab'
+RESTART_DRIVER = 'driver'
+
+
+def _proc_children(pid):
+    """Linux：读取/proc得到所有子进程"""
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        return []
+    for child in list(children):
+        children.extend(_proc_children(child))
+    return children
+
+
+def _proc_rss(pid):
+    """Linux：读取/proc/<pid>/statm得到常驻内存（字节）"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def browser_rss_mb(driver):
+    """
+    浏览器占用的常驻内存（MB）：chromedriver及其启动的所有Chrome进程之和
+    :return: 内存大小，无法统计时返回None
+    """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for child in processes:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+    if not os.path.exists(f'/proc/{pid}'):
+        return None
+    return sum(_proc_rss(child) for child in [pid] + _proc_children(pid)) / 1024 / 1024
+
+
+class BrowserLifecycle:
+    """
+    根据页面数、加载耗时和浏览器内存决定何时回收详情页标签页或重启浏览器
+    爬虫每加载一个详情页调用一次record，然后调用check获取建议的操作，执行后调用reset
+    """
+
+    def __init__(self, tab_max_pages=500, driver_max_pages=3000, max_rss_mb=2048, latency_factor=2.0,
+                 latency_window=30, check_every=10):
+        """
+        :param tab_max_pages: 详情页标签页最多加载多少个页面后回收，None表示不限制
+        :param driver_max_pages: 浏览器最多加载多少个页面后重启，None表示不限制
+        :param max_rss_mb: 浏览器进程内存上限（MB），None表示不检查内存
+        :param latency_factor: 最近的加载耗时中位数超过基准的多少倍时回收
+        :param latency_window: 计算中位数的页面数；运行开始后的前latency_window个页面作为基准
+        :param check_every: 每加载多少个页面检查一次内存和加载耗时
+        """
+        self.tab_max_pages = tab_max_pages
+        self.driver_max_pages = driver_max_pages
+        self.max_rss_mb = max_rss_mb
+        self.latency_factor = latency_factor
+        self.latency_window = latency_window
+        self.check_every = check_every
+        self.baseline_latency = None
+        self._baseline_samples = []
+        self.last_rss_mb = None
+        self.tab_recycles = 0
+        self.driver_restarts = 0
+        self._reset_driver_state()
+
+    def _reset_driver_state(self):
+        self.tab_pages = 0
+        self.driver_pages = 0
+        self._pages_since_check = 0  # 并行抓取时一次记录多个页面，不能用页数取模判断
+        self._recent = deque(maxlen=self.latency_window)
+        self._tab_recycled = False  # 本次浏览器启动后是否已经回收过标签页
+
+    def record(self, seconds=None, pages=1):
+        """
+        记录加载的页面
+        :param seconds: 页面加载耗时（秒），None表示只计数（例如并行抓取时）
+        :param pages: 页面数
+        """
+        self.tab_pages += pages
+        self.driver_pages += pages
+        self._pages_since_check += pages
+        if seconds is None:
+            return
+        if self.baseline_latency is None:
+            self._baseline_samples.append(seconds)
+            if len(self._baseline_samples) == self.latency_window:
+                self.baseline_latency = statistics.median(self._baseline_samples)
+                logger.info(f"详情页加载耗时基准: {self.baseline_latency:.2f} 秒")
+        self._recent.append(seconds)
+
+    def recent_latency(self):
+        """最近latency_window个页面加载耗时的中位数"""
+        return statistics.median(self._recent) if self._recent else None
+
+    def check(self, driver):
+        """
+        :param driver: 当前的WebDriver
+        :return: RECYCLE_TAB、RESTART_DRIVER，或None表示不需要处理
+        """
+        if self.driver_max_pages and self.driver_pages >= self.driver_max_pages:
+            logger.info(f"浏览器已加载 {self.driver_pages} 个页面，准备重启")
+            return RESTART_DRIVER
+        if self.tab_max_pages and self.tab_pages >= self.tab_max_pages:
+            logger.info(f"详情页标签页已加载 {self.tab_pages} 个页面，准备回收")
+            return RECYCLE_TAB
+        if not self.check_every or self._pages_since_check < self.check_every:
+            return None
+        self._pages_since_check = 0
+
+        if self.max_rss_mb:
+            self.last_rss_mb = browser_rss_mb(driver)
+            if self.last_rss_mb is not None and self.last_rss_mb > self.max_rss_mb:
+                logger.info(f"浏览器内存 {self.last_rss_mb:.0f}MB 超过上限 {self.max_rss_mb}MB")
+                return self._escalate()
+
+        recent = self.recent_latency()
+        if (self.baseline_latency and recent and len(self._recent) == self.latency_window
+                and recent > self.baseline_latency * self.latency_factor):
+            logger.info(f"详情页加载耗时 {recent:.2f} 秒，超过基准 {self.baseline_latency:.2f} 秒的 "
+                        f"{self.latency_factor} 倍")
+            return self._escalate()
+        return None
+
+    def _escalate(self):
+        """先回收标签页；回收后仍然超过阈值时重启浏览器"""
+        return RESTART_DRIVER if self._tab_recycled else RECYCLE_TAB
+
+    def reset(self, action):
+        """
+        执行操作后重置计数
+        :param action: 已执行的操作（RECYCLE_TAB或RESTART_DRIVER）
+        """
+        if action == RESTART_DRIVER:
+            self.driver_restarts += 1
+            self._reset_driver_state()
+        else:
+            self.tab_recycles += 1
+            self.tab_pages = 0
+            self._recent.clear()
+            self._tab_recycled = True
@@ -0,0 +1,115 @@
+"""
+日志配置
+日志记录通过队列（QueueHandler/QueueListener）交给后台线程写入文件和控制台，爬取线程不再等待磁盘和终端输出；
+日志文件按大小滚动，可以选择输出为每行一条JSON记录，带有job_id、url等字段，方便按职位检索
+"""
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime
+import traceback
+import logging
+import atexit
+import queue
+import json
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 作为JSON字段输出的日志附加属性（通过 logger.info(..., extra={...}) 传入）
+STRUCTURED_FIELDS = ('job_id', 'url', 'page', 'fields')
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """把日志记录格式化为一行JSON"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for name in STRUCTURED_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _CrawlQueueHandler(QueueHandler):
+    """
+    放入队列前只合并消息参数和异常堆栈，真正的格式化在后台线程中完成；
+    附加属性保留在记录上，供JsonFormatter输出
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_file='zhaopin_crawler.log', level=logging.INFO, json_format=False,
+                  max_bytes=20 * 1024 * 1024, backup_count=5, console=True, use_queue=True,
+                  text_format=TEXT_FORMAT):
+    """
+    配置根日志记录器，可以重复调用以更换配置
+    :param log_file: 日志文件，None表示不写文件
+    :param level: 日志级别，设为logging.DEBUG时输出每个字段的提取结果
+    :param json_format: 日志文件是否使用JSON格式（控制台始终为文本格式）
+    :param max_bytes: 日志文件超过该大小时滚动
+    :param backup_count: 保留的历史日志文件数
+    :param console: 是否同时输出到控制台
+    :param use_queue: 是否通过后台线程写日志
+    :param text_format: 文本格式日志的格式字符串
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if log_file:
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(text_format))
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(text_format))
+        handlers.append(console_handler)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        root.addHandler(_CrawlQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+    return _listener
+
+
+def stop_logging():
+    """停止后台日志线程，写完队列中剩余的记录"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
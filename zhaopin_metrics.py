@@ -0,0 +1,188 @@
+"""
+爬取过程计时与指标导出
+按阶段（节奏等待、页面导航、切换标签页、就绪等待、字段提取、写入、人工验证等）记录耗时直方图，
+统计回退、超时、验证页等次数，计算实时的每小时职位数，
+并导出为JSON汇总和Prometheus textfile格式
+"""
+
+from contextlib import contextmanager
+from collections import Counter, deque
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# 直方图分桶上限（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class PhaseHistogram:
+    """一个阶段的耗时直方图"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """记录一次耗时"""
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        for i, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 3),
+            'avg_seconds': round(self.total / self.count, 3) if self.count else 0,
+            'min_seconds': round(self.min or 0, 3),
+            'max_seconds': round(self.max or 0, 3),
+        }
+
+
+class Metrics:
+    """爬虫运行指标"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, rate_window=600):
+        """
+        :param buckets: 直方图分桶上限（秒）
+        :param rate_window: 计算实时速率的时间窗口（秒）
+        """
+        self.buckets = buckets
+        self.rate_window = rate_window
+        self.phases = {}
+        self.counters = Counter()
+        self.started = time.time()
+        self._recent_jobs = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds):
+        """记录某个阶段的一次耗时"""
+        with self._lock:
+            if phase not in self.phases:
+                self.phases[phase] = PhaseHistogram(self.buckets)
+            self.phases[phase].observe(seconds)
+
+    @contextmanager
+    def time(self, phase):
+        """
+        计时上下文，例如：
+            with metrics.time('navigate'):
+                driver.get(url)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def inc(self, name, value=1):
+        """计数器加一"""
+        with self._lock:
+            self.counters[name] += value
+
+    def job_done(self):
+        """记录完成一条职位"""
+        now = time.time()
+        with self._lock:
+            self.counters['jobs'] += 1
+            self._recent_jobs.append(now)
+            while self._recent_jobs and now - self._recent_jobs[0] > self.rate_window:
+                self._recent_jobs.popleft()
+
+    def jobs_per_hour(self, recent=False):
+        """
+        每小时职位数
+        :param recent: True表示按最近rate_window秒计算，False表示按整个运行时间计算
+        """
+        now = time.time()
+        with self._lock:
+            if recent:
+                while self._recent_jobs and now - self._recent_jobs[0] > self.rate_window:
+                    self._recent_jobs.popleft()
+                elapsed = min(self.rate_window, now - self.started)
+                jobs = len(self._recent_jobs)
+            else:
+                elapsed = now - self.started
+                jobs = self.counters['jobs']
+        return jobs * 3600 / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self, extra_counters=None):
+        """
+        当前指标汇总
+        :param extra_counters: 其他模块的计数（例如解析器回退次数），合并到counters中
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            phases = {name: histogram.summary() for name, histogram in self.phases.items()}
+        for name, value in (extra_counters or {}).items():
+            counters[name] = counters.get(name, 0) + value
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'elapsed_seconds': round(time.time() - self.started, 1),
+            'jobs_per_hour': round(self.jobs_per_hour(), 1),
+            'recent_jobs_per_hour': round(self.jobs_per_hour(recent=True), 1),
+            'counters': counters,
+            'phases': phases,
+        }
+
+    def export_json(self, path, extra_counters=None):
+        """导出JSON汇总"""
+        _atomic_write(path, json.dumps(self.snapshot(extra_counters), ensure_ascii=False, indent=2))
+
+    def export_prometheus(self, path, extra_counters=None, prefix='zhaopin'):
+        """导出Prometheus textfile格式（供node_exporter的textfile collector读取）"""
+        snapshot = self.snapshot(extra_counters)
+        lines = [
+            f'# HELP {prefix}_jobs_per_hour Jobs extracted per hour since start.',
+            f'# TYPE {prefix}_jobs_per_hour gauge',
+            f'{prefix}_jobs_per_hour {snapshot["jobs_per_hour"]}',
+            f'# HELP {prefix}_recent_jobs_per_hour Jobs extracted per hour over the recent window.',
+            f'# TYPE {prefix}_recent_jobs_per_hour gauge',
+            f'{prefix}_recent_jobs_per_hour {snapshot["recent_jobs_per_hour"]}',
+            f'# HELP {prefix}_events_total Crawler event counters.',
+            f'# TYPE {prefix}_events_total counter',
+        ]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+
+        lines.append(f'# HELP {prefix}_phase_seconds Time spent per crawl phase.')
+        lines.append(f'# TYPE {prefix}_phase_seconds histogram')
+        with self._lock:
+            phases = list(self.phases.items())
+            for phase, histogram in phases:
+                cumulative = 0
+                for upper, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="{upper}"}} {cumulative}')
+                lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {histogram.total:.6f}')
+                lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+    def log_summary(self):
+        """在日志中输出简要汇总"""
+        snapshot = self.snapshot()
+        logger.info(f"速率: {snapshot['jobs_per_hour']} 条/小时（最近 {snapshot['recent_jobs_per_hour']} 条/小时）")
+        for phase, summary in sorted(snapshot['phases'].items(), key=lambda item: -item[1]['total_seconds']):
+            logger.info(f"  阶段 {phase}: {summary['count']} 次，共 {summary['total_seconds']} 秒，"
+                        f"平均 {summary['avg_seconds']} 秒")
+
+
+def _atomic_write(path, content):
+    """先写临时文件再替换，避免读取方看到写了一半的文件"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
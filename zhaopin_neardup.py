@@ -0,0 +1,293 @@
+"""
+相似职位检测（MinHash/LSH）
+同一家公司经常重复发布任职要求几乎相同的职位，按职位ID或内容哈希的精确去重发现不了。
+对任职要求取字符shingle（连续k个字），计算MinHash签名，用LSH分段把签名相同的段放进同一个桶，
+只比较落在同一个桶中的候选对，不需要两两比较所有记录。
+记录逐条加入，相似的职位归入同一个簇（并查集）；列表页卡片（公司名称、职位名称、工作地点）
+与已有的重复簇相同时，爬虫可以不再打开详情页
+
+用法：
+    python zhaopin_neardup.py -o zhaopin_clusters.csv zhaopin_jobs_all.csv
+"""
+
+import argparse
+import logging
+import zlib
+import csv
+import sys
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖，只有使用相似职位检测时才需要
+    np = None
+
+from zhaopin_parser import parse_job_id
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION_FIELD = '任职要求'
+CARD_KEY_FIELDS = ('公司名称', '职位名称', '工作地点')
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# 计算shingle前去掉空白和标点，只保留文字和数字
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("相似职位检测需要安装numpy: pip install numpy")
+
+
+def card_key(job_info):
+    """列表页卡片（或职位信息）的键：公司名称、职位名称和工作地点，去掉空白和标点"""
+    parts = [_NON_WORD.sub('', job_info.get(field) or '') for field in CARD_KEY_FIELDS]
+    if not parts[0] or not parts[1]:
+        return None
+    return '\x1f'.join(parts)
+
+
+class MinHasher:
+    """计算文本的MinHash签名"""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        """
+        :param num_perm: 签名长度（哈希函数个数）
+        :param shingle_size: 每个shingle的字数
+        :param seed: 随机种子，比较签名时必须相同
+        """
+        _require_numpy()
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        """文本的shingle哈希值（crc32，跨进程稳定）"""
+        text = _NON_WORD.sub('', text or '').lower()
+        k = self.shingle_size
+        if len(text) <= k:
+            return {zlib.crc32(text.encode('utf-8'))} if text else set()
+        return {zlib.crc32(text[i:i + k].encode('utf-8')) for i in range(len(text) - k + 1)}
+
+    def signature(self, text):
+        """
+        :return: 长度为num_perm的uint32数组，文本为空时返回None
+        """
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        # 乘法溢出按2^64回绕，与常见的MinHash实现一致
+        with np.errstate(over='ignore'):
+            hashed = (values[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return hashed.min(axis=0).astype(np.uint32)
+
+
+def estimate_similarity(signature, other):
+    """用两个签名中相同位置取值相等的比例估计Jaccard相似度"""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+
+class NearDuplicateIndex:
+    """
+    增量的相似职位索引
+    每条记录按职位键加入，返回所在的簇；簇的代表是簇中最早加入的记录
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, skip_min_size=2):
+        """
+        :param threshold: 估计的相似度达到该值时视为相似职位
+        :param num_perm: MinHash签名长度
+        :param bands: LSH分段数，num_perm必须能被整除；段越多召回越高、候选越多
+        :param shingle_size: 每个shingle的字数
+        :param skip_min_size: 卡片所在的簇至少有多少条记录时跳过详情页
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})必须能被bands({bands})整除")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.skip_min_size = skip_min_size
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.keys = []  # 序号 -> 职位键
+        self.signatures = []  # 序号 -> 签名
+        self._index = {}  # 职位键 -> 序号
+        self._buckets = [{} for _ in range(bands)]  # 每段：段的字节 -> 序号列表
+        self._parent = []  # 并查集
+        self._sizes = {}  # 簇的根 -> 记录数
+        self._card_clusters = {}  # 卡片键 -> 序号
+        self.candidate_pairs = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _find(self, item):
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def _union(self, item, other):
+        root, other_root = self._find(item), self._find(other)
+        if root == other_root:
+            return root
+        # 较早加入的记录作为根
+        if other_root < root:
+            root, other_root = other_root, root
+        self._parent[other_root] = root
+        self._sizes[root] = self._sizes.get(root, 1) + self._sizes.pop(other_root, 1)
+        return root
+
+    def _band_keys(self, signature):
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [data[i * width:(i + 1) * width] for i in range(self.bands)]
+
+    def add_signature(self, key, signature, card=None):
+        """
+        加入一条已计算好签名的记录
+        :return: (簇的代表职位键, 相似的已有职位键列表)
+        """
+        if key in self._index:
+            item = self._index[key]
+            return self.keys[self._find(item)], []
+        item = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        self._index[key] = item
+        self._parent.append(item)
+
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket.setdefault(band_key, [])
+            candidates.update(members)
+            members.append(item)
+        self.candidate_pairs += len(candidates)
+
+        matches = [other for other in sorted(candidates)
+                   if estimate_similarity(signature, self.signatures[other]) >= self.threshold]
+        for other in matches:
+            self._union(item, other)
+        if matches:
+            self.duplicates += 1
+
+        card = card_key(card) if card else None
+        if card:
+            self._card_clusters.setdefault(card, item)
+        return self.keys[self._find(item)], [self.keys[other] for other in matches]
+
+    def add(self, key, job_info):
+        """
+        加入一条职位记录
+        :param key: 职位键（职位ID或URL）
+        :param job_info: 职位信息（字典或JobRecord），使用任职要求计算签名
+        :return: (簇的代表职位键, 相似的已有职位键列表)；没有任职要求时返回(None, [])
+        """
+        signature = self.hasher.signature(job_info.get(DESCRIPTION_FIELD))
+        if signature is None:
+            return None, []
+        return self.add_signature(key, signature, job_info)
+
+    def cluster_of(self, key):
+        """职位所在簇的代表职位键，不在索引中时返回None"""
+        item = self._index.get(key)
+        return None if item is None else self.keys[self._find(item)]
+
+    def cluster_size(self, key):
+        item = self._index.get(key)
+        return 0 if item is None else self._sizes.get(self._find(item), 1)
+
+    def match_card(self, card):
+        """
+        列表页卡片是否属于已知的重复簇
+        :param card: 卡片字典（公司名称、职位名称、工作地点）
+        :return: 簇的代表职位键，不属于重复簇时返回None
+        """
+        key = card_key(card)
+        item = self._card_clusters.get(key) if key else None
+        if item is None:
+            return None
+        root = self._find(item)
+        if self._sizes.get(root, 1) < self.skip_min_size:
+            return None
+        return self.keys[root]
+
+    def clusters(self):
+        """返回所有包含多条记录的簇：代表职位键 -> 职位键列表"""
+        groups = {}
+        for item, key in enumerate(self.keys):
+            root = self._find(item)
+            if self._sizes.get(root, 1) > 1:
+                groups.setdefault(self.keys[root], []).append(key)
+        return groups
+
+    def save(self, path):
+        """保存签名和卡片键，下次运行时用load恢复"""
+        cards = {item: card for card, item in self._card_clusters.items()}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f, keys=np.array(self.keys, dtype=object),
+                signatures=np.array(self.signatures, dtype=np.uint32).reshape(-1, self.hasher.num_perm),
+                cards=np.array([cards.get(item, '') for item in range(len(self.keys))], dtype=object),
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"相似职位索引已保存到 {path}（{len(self.keys)} 条记录）")
+
+    def load(self, path):
+        """载入save保存的索引，重建分段桶和簇"""
+        if not os.path.exists(path):
+            return 0
+        with np.load(path, allow_pickle=True) as data:
+            if data['signatures'].shape[1:] != (self.hasher.num_perm,):
+                logger.warning(f"相似职位索引 {path} 的签名长度不同，已忽略")
+                return 0
+            for key, signature, card in zip(data['keys'], data['signatures'], data['cards']):
+                self.add_signature(key, signature)
+                if card:
+                    self._card_clusters.setdefault(card, self._index[key])
+        logger.info(f"已载入相似职位索引 {path}，{len(self.keys)} 条记录，{len(self.clusters())} 个重复簇")
+        return len(self.keys)
+
+
+def main():
+    """命令行入口：找出输出文件中的相似职位"""
+    from zhaopin_compact import expand_inputs, read_records, job_key
+
+    parser = argparse.ArgumentParser(description='按任职要求查找相似职位')
+    parser.add_argument('inputs', nargs='+', help='输入文件、目录或通配符（.csv、.jsonl、.parquet）')
+    parser.add_argument('-o', '--output', required=True, help='输出CSV：职位键、簇的代表职位键、簇大小')
+    parser.add_argument('--threshold', type=float, default=0.8, help='相似度阈值')
+    parser.add_argument('--bands', type=int, default=16, help='LSH分段数')
+    parser.add_argument('--shingle-size', type=int, default=5, help='每个shingle的字数')
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex(threshold=args.threshold, bands=args.bands, shingle_size=args.shingle_size)
+    rows = []
+    for path in expand_inputs(args.inputs, exclude=args.output):
+        logger.info(f"读取 {path}")
+        for row in read_records(path):
+            key = row.get('job_id') or parse_job_id(row.get('url')) or job_key(row, len(rows) + 1)
+            index.add(key, row)
+            rows.append((key, row.get('公司名称', ''), row.get('职位名称', '')))
+
+    with open(args.output, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['职位键', '公司名称', '职位名称', '簇', '簇大小'])
+        for key, company, title in rows:
+            writer.writerow([key, company, title, index.cluster_of(key) or '', index.cluster_size(key)])
+
+    clusters = index.clusters()
+    logger.info(f"共 {len(index)} 条记录，{len(clusters)} 个重复簇包含 {sum(map(len, clusters.values()))} 条记录，"
+                f"候选对 {index.candidate_pairs} 个，已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+字段标准化
+把详情页提取到的原始字符串转换为便于分析的列：
+薪资 -> 月薪下限/上限（元）和每年发薪月数；工作地点 -> 城市和区县；
+学历要求 -> 有序的学历等级；发布时间（"更新于 12月30日"、"今天"、"3天前"等）-> 绝对日期。
+所有转换都按列用pandas/NumPy批量完成：先对每列去重，只解析不同的取值，再按编码映射回所有行，
+重复值很多的字段每分钟可以处理数百万行。
+既可以对爬取过程中的一批记录调用 normalize_records，也可以用命令行处理历史文件
+
+用法：
+    python zhaopin_normalize.py -o zhaopin_jobs_normalized.parquet zhaopin_jobs_all.csv
+"""
+
+from datetime import date, datetime, timedelta
+import argparse
+import logging
+import os
+import re
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # 可选依赖，只有使用字段标准化时才需要
+    np = pd = None
+
+from zhaopin_parser import JOB_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# 学历等级（从低到高），"学历不限"单独排在最前
+EDUCATION_LEVELS = ['学历不限', '初中及以下', '中专/中技', '高中', '大专', '本科', '硕士', '博士']
+# 匹配顺序：先匹配较高的学历，避免"本科及以上"之类被误判
+_EDUCATION_PATTERNS = [
+    ('博士', '博士'),
+    ('硕士', '硕士|研究生'),
+    ('本科', '本科'),
+    ('大专', '大专|专科'),
+    ('高中', '高中'),
+    ('中专/中技', '中专|中技|技校'),
+    ('初中及以下', '初中'),
+    ('学历不限', '不限'),
+]
+
+# 名称超过两个字的城市（其余城市按前两个字拆分）
+LONG_CITY_NAMES = [
+    '乌鲁木齐', '呼和浩特', '齐齐哈尔', '鄂尔多斯', '巴彦淖尔', '乌兰察布', '呼伦贝尔', '克拉玛依', '西双版纳',
+    '哈尔滨', '石家庄', '张家口', '秦皇岛', '连云港', '马鞍山', '景德镇', '平顶山', '驻马店', '张家界',
+    '防城港', '攀枝花', '六盘水', '石嘴山', '嘉峪关', '吐鲁番', '牡丹江', '佳木斯', '双鸭山', '七台河',
+    '葫芦岛', '三门峡', '日喀则', '阿克苏', '喀什地区', '和田地区', '大兴安岭',
+]
+
+_SALARY_PATTERN = (
+    r'(?P<low>\d+(?:\.\d+)?)(?P<low_unit>[千万])?'
+    r'(?:\s*[-~至]\s*(?P<high>\d+(?:\.\d+)?)(?P<high_unit>[千万])?)?'
+    r'\s*(?:元)?\s*(?P<period>/天|/日|/时|/小时|/月|/年|每天|每月|每年)?'
+    r'(?:.*?(?P<months>\d+)薪)?'
+)
+_LOCATION_PATTERN = (
+    r'^\s*(?P<city>' + '|'.join(LONG_CITY_NAMES) + r'|[^\W\d_]{2})市?\s*[·\-－—\s]?\s*(?P<district>.*?)\s*$'
+)
+_FULL_DATE_PATTERN = r'(?P<year>\d{4})\s*[-/.年]\s*(?P<month>\d{1,2})\s*[-/.月]\s*(?P<day>\d{1,2})'
+_MONTH_DAY_PATTERN = r'(?P<month>\d{1,2})\s*[-/月]\s*(?P<day>\d{1,2})'
+_DAYS_AGO_PATTERN = r'(?P<days>\d+)\s*天前'
+
+# 月薪换算：日薪按每月21.75个工作日，时薪按每天8小时
+_PERIOD_FACTORS = {'/天': 21.75, '/日': 21.75, '每天': 21.75, '/时': 174.0, '/小时': 174.0,
+                   '/年': 1 / 12, '每年': 1 / 12}
+_UNIT_FACTORS = {'千': 1000.0, '万': 10000.0}
+
+NORMALIZED_COLUMNS = ['salary_min', 'salary_max', 'salary_months', 'city', 'district', 'education',
+                      'publish_date']
+
+
+def _require_pandas():
+    if pd is None:
+        raise RuntimeError("字段标准化需要安装pandas和numpy: pip install pandas numpy")
+
+
+def _by_unique(series, parse):
+    """
+    只解析不同的取值，再映射回所有行
+    :param series: 原始字符串列
+    :param parse: 接收去重后的Series，返回以同样顺序排列的DataFrame
+    """
+    codes, uniques = pd.factorize(series.fillna(''), sort=False)
+    parsed = parse(pd.Series(uniques, dtype=object))
+    result = parsed.iloc[codes].reset_index(drop=True)
+    result.index = series.index
+    return result
+
+
+def _parse_salary(values):
+    parts = values.str.extract(_SALARY_PATTERN)
+    low = parts['low'].astype(float)
+    high = parts['high'].astype(float)
+    # "1-1.5万"：下限没有单位时沿用上限的单位
+    low_unit = parts['low_unit'].fillna(parts['high_unit'])
+    high_unit = parts['high_unit'].fillna(parts['low_unit'])
+    low = low * low_unit.map(_UNIT_FACTORS).fillna(1.0)
+    high = high * high_unit.map(_UNIT_FACTORS).fillna(1.0)
+    high = high.fillna(low)
+
+    period = parts['period'].map(_PERIOD_FACTORS).fillna(1.0)
+    negotiable = values.str.contains('面议', regex=False).to_numpy()
+    months = parts['months'].astype(float).fillna(12.0)
+    return pd.DataFrame({
+        'salary_min': np.where(negotiable, np.nan, (low * period).round(0)),
+        'salary_max': np.where(negotiable, np.nan, (high * period).round(0)),
+        'salary_months': np.where(low.isna(), np.nan, months),
+    })
+
+
+def _parse_location(values):
+    parts = values.str.extract(_LOCATION_PATTERN)
+    return pd.DataFrame({
+        'city': parts['city'].fillna(''),
+        'district': parts['district'].fillna(''),
+    })
+
+
+def _parse_education(values):
+    conditions = [values.str.contains(pattern).to_numpy() for _, pattern in _EDUCATION_PATTERNS]
+    levels = np.select(conditions, [level for level, _ in _EDUCATION_PATTERNS], default='')
+    education = pd.Categorical(levels, categories=EDUCATION_LEVELS, ordered=True)
+    return pd.DataFrame({'education': education})
+
+
+def _parse_publish_date(values, reference_date):
+    reference = pd.Timestamp(reference_date)
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    full = values.str.extract(_FULL_DATE_PATTERN).astype(float)
+    has_full = full['year'].notna()
+    result[has_full] = pd.to_datetime(full[has_full].rename(columns=str), errors='coerce')
+
+    # 没有年份的"12月30日"：晚于参考日期时属于上一年
+    month_day = values.str.extract(_MONTH_DAY_PATTERN).astype(float)
+    has_month_day = ~has_full & month_day['month'].notna()
+    if has_month_day.any():
+        parts = month_day[has_month_day].assign(year=reference.year)
+        dates = pd.to_datetime(parts[['year', 'month', 'day']], errors='coerce')
+        last_year = pd.to_datetime(parts.assign(year=reference.year - 1)[['year', 'month', 'day']], errors='coerce')
+        result[has_month_day] = dates.where(dates <= reference, last_year)
+
+    days_ago = values.str.extract(_DAYS_AGO_PATTERN)['days'].astype(float)
+    relative = pd.Series(np.nan, index=values.index)
+    relative[values.str.contains('今天|刚刚|小时前|分钟前')] = 0
+    relative[values.str.contains('昨天')] = 1
+    relative[values.str.contains('前天')] = 2
+    relative = relative.fillna(days_ago)
+    has_relative = result.isna() & relative.notna()
+    result[has_relative] = reference - pd.to_timedelta(relative[has_relative], unit='D')
+    return pd.DataFrame({'publish_date': result.dt.normalize()})
+
+
+def normalize_frame(frame, reference_date=None):
+    """
+    在DataFrame上增加标准化后的列
+    :param frame: 包含 JOB_FIELDS 中各字段的DataFrame
+    :param reference_date: 相对时间（"今天"、"3天前"、没有年份的日期）的参考日期，通常为爬取日期，默认今天
+    :return: 新的DataFrame，原有列之后依次为 NORMALIZED_COLUMNS
+    """
+    _require_pandas()
+    reference_date = reference_date or date.today()
+    text = {field: frame[field].astype(object) if field in frame else pd.Series('', index=frame.index)
+            for field in ('薪资', '工作地点', '学历要求', '发布时间')}
+    parts = [
+        _by_unique(text['薪资'], _parse_salary),
+        _by_unique(text['工作地点'], _parse_location),
+        _by_unique(text['学历要求'], _parse_education),
+        _by_unique(text['发布时间'], lambda values: _parse_publish_date(values, reference_date)),
+    ]
+    normalized = pd.concat(parts, axis=1)
+    normalized['education'] = pd.Categorical(normalized['education'], categories=EDUCATION_LEVELS, ordered=True)
+    return pd.concat([frame, normalized[NORMALIZED_COLUMNS]], axis=1)
+
+
+def normalize_records(records, reference_date=None, fieldnames=None):
+    """
+    标准化一批记录（职位信息字典或JobRecord）
+    :return: DataFrame，包含原始字段和标准化后的列
+    """
+    _require_pandas()
+    fieldnames = fieldnames or JOB_FIELDS
+    records = list(records)
+    columns = {field: [record.get(field) or '' for record in records] for field in fieldnames}
+    return normalize_frame(pd.DataFrame(columns, dtype=object), reference_date)
+
+
+# 单条记录的解析，与上面按列的解析使用同样的规则（例如爬取过程中的实时统计）
+_SALARY_RE = re.compile(_SALARY_PATTERN)
+_LOCATION_RE = re.compile(_LOCATION_PATTERN)
+_EDUCATION_RES = [(level, re.compile(pattern)) for level, pattern in _EDUCATION_PATTERNS]
+_FULL_DATE_RE = re.compile(_FULL_DATE_PATTERN)
+_MONTH_DAY_RE = re.compile(_MONTH_DAY_PATTERN)
+_DAYS_AGO_RE = re.compile(_DAYS_AGO_PATTERN)
+_RELATIVE_DAYS = [('今天|刚刚|小时前|分钟前', 0), ('昨天', 1), ('前天', 2)]
+
+
+def parse_salary(text):
+    """
+    :return: (月薪下限, 月薪上限, 发薪月数)，面议或无法解析时月薪为None
+    """
+    match = _SALARY_RE.search(text or '')
+    if not match or '面议' in text:
+        return None, None, None
+    parts = match.groupdict()
+    low_unit = parts['low_unit'] or parts['high_unit']
+    high_unit = parts['high_unit'] or parts['low_unit']
+    period = _PERIOD_FACTORS.get(parts['period'], 1.0)
+    low = float(parts['low']) * _UNIT_FACTORS.get(low_unit, 1.0) * period
+    high = float(parts['high']) * _UNIT_FACTORS.get(high_unit, 1.0) * period if parts['high'] else low
+    return round(low), round(high), int(parts['months'] or 12)
+
+
+def split_location(text):
+    """
+    :return: (城市, 区县)，无法解析时为空字符串
+    """
+    match = _LOCATION_RE.search(text or '')
+    if not match:
+        return '', ''
+    return match.group('city'), match.group('district')
+
+
+def education_level(text):
+    """学历等级（EDUCATION_LEVELS 之一），无法识别时返回空字符串"""
+    for level, pattern in _EDUCATION_RES:
+        if pattern.search(text or ''):
+            return level
+    return ''
+
+
+def parse_publish_date(text, reference_date=None):
+    """
+    把发布时间转换为日期
+    :param reference_date: 相对时间的参考日期，默认今天
+    :return: date，无法解析时返回None
+    """
+    text = text or ''
+    reference_date = reference_date or date.today()
+    match = _FULL_DATE_RE.search(text)
+    if match:
+        try:
+            return date(int(match.group('year')), int(match.group('month')), int(match.group('day')))
+        except ValueError:
+            return None
+    match = _MONTH_DAY_RE.search(text)
+    if match:
+        month, day = int(match.group('month')), int(match.group('day'))
+        try:
+            result = date(reference_date.year, month, day)
+            return result if result <= reference_date else date(reference_date.year - 1, month, day)
+        except ValueError:
+            return None
+    for pattern, days in _RELATIVE_DAYS:
+        if re.search(pattern, text):
+            return reference_date - timedelta(days=days)
+    match = _DAYS_AGO_RE.search(text)
+    if match:
+        return reference_date - timedelta(days=int(match.group('days')))
+    return None
+
+
+def reference_date_for(path):
+    """
+    文件的参考日期：文件名中的时间戳（例如 zhaopin_jobs_20260104_232335.csv），否则使用修改时间
+    """
+    match = re.search(r'(\d{8})_\d{6}', os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d').date()
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+
+def _read_chunks(path, chunksize):
+    """分块读取CSV、JSONL或Parquet文件"""
+    lower = path.lower()
+    if lower.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif lower.endswith('.jsonl'):
+        yield from pd.read_json(path, lines=True, dtype=False, chunksize=chunksize)
+    else:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig', chunksize=chunksize)
+
+
+def normalize_files(paths, output, reference_date=None, chunksize=200000):
+    """
+    标准化历史文件，分块读取和写入，内存占用与chunksize有关
+    :param paths: 输入文件（.csv、.jsonl、.parquet）
+    :param output: 输出文件（.parquet或.csv）
+    :param reference_date: 参考日期，None表示按每个文件的文件名或修改时间确定
+    :param chunksize: 每块的行数
+    :return: 处理的行数
+    """
+    _require_pandas()
+    rows = 0
+    writer = None
+    started = datetime.now()
+    try:
+        for path in paths:
+            file_reference = reference_date or reference_date_for(path)
+            logger.info(f"标准化 {path}（参考日期 {file_reference}）")
+            for chunk in _read_chunks(path, chunksize):
+                frame = normalize_frame(chunk, file_reference)
+                if output.lower().endswith('.parquet'):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    frame['education'] = frame['education'].astype(str).replace('nan', '')
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output, table.schema, compression='zstd')
+                    writer.write_table(table.cast(writer.schema))
+                else:
+                    frame.to_csv(output, mode='w' if rows == 0 else 'a', header=rows == 0, index=False,
+                                 encoding='utf-8-sig' if rows == 0 else 'utf-8')
+                rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    seconds = max((datetime.now() - started).total_seconds(), 1e-6)
+    logger.info(f"共标准化 {rows} 行，用时 {seconds:.1f} 秒（{rows / seconds * 60:.0f} 行/分钟），已写入 {output}")
+    return rows
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='薪资、工作地点、学历和发布时间标准化')
+    parser.add_argument('inputs', nargs='+', help='输入文件（.csv、.jsonl、.parquet）')
+    parser.add_argument('-o', '--output', required=True, help='输出文件（.parquet或.csv）')
+    parser.add_argument('--reference-date', help='参考日期 YYYY-MM-DD，默认按文件名中的时间戳或修改时间')
+    parser.add_argument('--chunksize', type=int, default=200000, help='每块的行数')
+    args = parser.parse_args()
+
+    reference_date = datetime.strptime(args.reference_date, '%Y-%m-%d').date() if args.reference_date else None
+    normalize_files(args.inputs, args.output, reference_date, args.chunksize)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
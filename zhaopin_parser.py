@@ -0,0 +1,371 @@
+"""
+智联招聘职位详情页解析器
+一次性获取页面HTML后在进程内用预编译XPath提取全部字段，
+不依赖浏览器，也可以直接解析保存下来的HTML文件
+"""
+
+from lxml import etree, html as lxml_html
+from collections import Counter
+from datetime import datetime
+import logging
+import csv
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+# 输出字段（顺序即CSV列顺序）
+JOB_FIELDS = ['职位名称', '薪资', '工作地点', '公司名称', '任职要求', '学历要求', '招聘人数', '发布时间']
+# 启用相似职位检测时追加的输出字段：跳过详情页的职位所属重复簇的代表职位ID，其他职位为空
+NEAR_DUPLICATE_FIELD = '相似职位'
+
+# 学历关键字
+EDUCATION_KEYWORDS = ['大专', '本科', '硕士', '博士', '高中', '中专', '初中', '学历不限']
+
+# 预编译的XPath选择器，与原先逐个find_element使用的路径一致
+TITLE_PATH = '/html/body/div/div[4]/div[1]/div/h3'
+SALARY_PATH = '/html/body/div/div[4]/div[1]/div/div[2]/div[1]/span'
+XPATH_TITLE = etree.XPath(TITLE_PATH)
+XPATH_SALARY = etree.XPath(SALARY_PATH)
+XPATH_INFO_ITEMS = etree.XPath('(/html/body/div/div[4]/div[1]/div/div[2]/div[1]/ul)[1]/li')
+XPATH_COMPANY = etree.XPath('/html/body/div/div[5]/div[2]/div/div[3]/a[1]')
+XPATH_DESCRIPTION = etree.XPath('//div[@class="describtion__detail-content"]')
+# 备选方案：等价于CSS选择器 .describtion__detail-content
+XPATH_DESCRIPTION_FALLBACK = etree.XPath(
+    '//*[contains(concat(" ", normalize-space(@class), " "), " describtion__detail-content ")]'
+)
+XPATH_PUBLISH_TIME = etree.XPath('/html/body/div/div[4]/div[1]/div/div[1]/div[1]/span')
+
+RECRUIT_NUM_PATTERN = re.compile(r'招(\d+)人')
+
+# 按块级元素处理的标签，文本前后换行，与浏览器渲染的 .text 保持一致
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul',
+}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+_SPACES = re.compile(r'[ \t\r\n\f ]+')
+
+
+# 列表页职位卡片及卡片中各字段的class（按优先级排列）
+CARD_CLASSES = ['joblist-box__item', 'job-card-wrapper', 'positionlist__item']
+CARD_FIELD_CLASSES = {
+    '职位名称': ['jobinfo__name', 'job-name'],
+    '薪资': ['jobinfo__salary', 'job-salary'],
+    '公司名称': ['companyinfo__name', 'company-name'],
+    '工作地点': ['jobinfo__other-info-item', 'job-area'],
+}
+
+# 一次脚本调用取出列表页所有职位（按职位ID去重）及卡片上已有的字段
+LIST_HARVEST_SCRIPT = """
+var cardClasses = arguments[0], fieldClasses = arguments[1];
+var idPattern = /jobdetail\\/([^\\/?#]+?)(?:\\.html?)?(?:[?#]|$)/;
+var cardSelector = cardClasses.map(function (c) { return '.' + c; }).join(',');
+var fieldText = function (card, classes) {
+    for (var i = 0; i < classes.length; i++) {
+        var el = card.querySelector('.' + classes[i]);
+        if (el && el.innerText.trim()) {
+            return el.innerText.trim();
+        }
+    }
+    return '';
+};
+var seen = {}, cards = [];
+var links = document.querySelectorAll('a[href*="jobdetail/"]');
+for (var i = 0; i < links.length; i++) {
+    var link = links[i];
+    var match = link.href.match(idPattern);
+    var jobId = match ? match[1] : link.href;
+    if (seen[jobId]) {
+        continue;
+    }
+    seen[jobId] = true;
+    var card = (cardSelector && link.closest(cardSelector)) || link.parentElement;
+    var item = {job_id: jobId, url: link.href};
+    for (var field in fieldClasses) {
+        item[field] = fieldText(card, fieldClasses[field]);
+    }
+    if (!item['职位名称']) {
+        item['职位名称'] = link.innerText.trim();
+    }
+    cards.push(item);
+}
+return cards;
+"""
+# 详情页URL中的职位ID，例如 https://www.zhaopin.com/jobdetail/CC000123456J40123456789.htm
+JOB_ID_PATTERN = re.compile(r'jobdetail/([^/?#]+?)(?:\.html?)?(?:[?#]|$)')
+
+
+def parse_job_id(url):
+    """
+    从详情页URL中解析职位ID
+    :param url: 详情页URL
+    :return: 职位ID，无法解析时返回None
+    """
+    if not url:
+        return None
+    match = JOB_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def _class_xpath(class_name, prefix='.//'):
+    """按class名匹配元素的XPath，等价于CSS选择器 .class_name"""
+    return f'{prefix}*[contains(concat(" ", normalize-space(@class), " "), " {class_name} ")]'
+
+
+XPATH_JOB_LINKS = etree.XPath('//a[contains(@href, "jobdetail/")]')
+XPATH_CARD_ANCESTOR = etree.XPath(' | '.join(_class_xpath(c, 'ancestor::') for c in CARD_CLASSES))
+XPATH_CARD_FIELDS = {
+    field: [etree.XPath(_class_xpath(c)) for c in classes] for field, classes in CARD_FIELD_CLASSES.items()
+}
+
+
+def parse_job_cards(page_html, base_url=''):
+    """
+    离线解析列表页，结果与 LIST_HARVEST_SCRIPT 一致
+    :param page_html: 列表页HTML
+    :param base_url: 用于把相对链接补全为绝对URL
+    :return: 卡片字典列表，包含 job_id、url 以及职位名称、薪资、公司名称、工作地点
+    """
+    root = lxml_html.document_fromstring(page_html)
+    if base_url:
+        root.make_links_absolute(base_url)
+    seen = set()
+    cards = []
+    for link in XPATH_JOB_LINKS(root):
+        url = link.get('href')
+        job_id = parse_job_id(url) or url
+        if job_id in seen:
+            continue
+        seen.add(job_id)
+        ancestors = XPATH_CARD_ANCESTOR(link)
+        card = ancestors[-1] if ancestors else link.getparent()
+        item = {'job_id': job_id, 'url': url}
+        for field, xpaths in XPATH_CARD_FIELDS.items():
+            item[field] = ''
+            for xpath in xpaths:
+                element = _first(xpath, card)
+                if element is not None and element_text(element):
+                    item[field] = element_text(element)
+                    break
+        if not item['职位名称']:
+            item['职位名称'] = element_text(link)
+        cards.append(item)
+    return cards
+
+
+def card_to_job_info(card):
+    """把列表页卡片转换为职位信息字典（详情页才有的字段留空）"""
+    job_info = empty_job_info()
+    for field in JOB_FIELDS:
+        if card.get(field):
+            job_info[field] = card[field]
+    return job_info
+
+
+def empty_job_info():
+    """返回所有字段为空的职位信息字典"""
+    return {field: '' for field in JOB_FIELDS}
+
+
+def _collect_text(element, parts):
+    """递归收集元素文本，块级元素和<br>转换为换行"""
+    tag = element.tag if isinstance(element.tag, str) else ''
+    tag = tag.lower()
+    if tag in _SKIP_TAGS:
+        return
+    if tag == 'br':
+        parts.append('\n')
+    else:
+        block = tag in _BLOCK_TAGS
+        if block:
+            parts.append('\n')
+        if element.text:
+            parts.append(_SPACES.sub(' ', element.text))
+        for child in element:
+            _collect_text(child, parts)
+            if child.tail:
+                parts.append(_SPACES.sub(' ', child.tail))
+        if block:
+            parts.append('\n')
+
+
+def element_text(element):
+    """
+    获取元素的可见文本，效果近似Selenium的 WebElement.text
+    :param element: lxml元素
+    :return: 去除首尾空白、每行已整理的文本
+    """
+    parts = []
+    if element.text is None and len(element) == 0:
+        return ''
+    tag = element.tag.lower() if isinstance(element.tag, str) else ''
+    if tag in _SKIP_TAGS:
+        return ''
+    # 元素本身的块级换行不计入结果，只处理内部内容
+    if element.text:
+        parts.append(_SPACES.sub(' ', element.text))
+    for child in element:
+        _collect_text(child, parts)
+        if child.tail:
+            parts.append(_SPACES.sub(' ', child.tail))
+    lines = [line.strip() for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+def _first(xpath, root):
+    """返回XPath的第一个匹配元素，没有则返回None"""
+    result = xpath(root)
+    return result[0] if result else None
+
+
+class JobDetailParser:
+    """
+    职位详情页解析器
+    字段集合和回退规则与原先在浏览器中逐个查找元素时一致
+    """
+
+    def __init__(self):
+        self.fallbacks = Counter()  # 各字段使用备选选择器或默认值的次数
+
+    def parse(self, page_html, require_detail=False):
+        """
+        解析详情页HTML
+        :param page_html: 页面HTML字符串或字节
+        :param require_detail: 为True时，如果页面上没有职位标题和薪资（不是可解析的详情页）则返回None
+        :return: 职位信息字典
+        """
+        job_info = empty_job_info()
+        if not page_html:
+            logger.warning("页面HTML为空，无法解析")
+            return None if require_detail else job_info
+
+        try:
+            root = lxml_html.document_fromstring(page_html)
+        except (etree.ParserError, ValueError) as e:
+            logger.error(f"解析页面HTML失败: {e}")
+            return None if require_detail else job_info
+
+        if require_detail and (_first(XPATH_TITLE, root) is None or _first(XPATH_SALARY, root) is None):
+            return None
+
+        # 职位名称
+        title_element = _first(XPATH_TITLE, root)
+        if title_element is not None:
+            job_title = element_text(title_element)
+            if job_title and len(job_title) > 2 and len(job_title) < 100:
+                job_info['职位名称'] = job_title
+                logger.debug("职位名称: %s", job_title)
+        else:
+            logger.warning("未找到职位名称")
+
+        # 薪资
+        salary_element = _first(XPATH_SALARY, root)
+        if salary_element is not None:
+            salary = element_text(salary_element)
+            if salary:
+                job_info['薪资'] = salary
+                logger.debug("薪资: %s", salary)
+        else:
+            logger.warning("未找到薪资信息")
+            job_info['薪资'] = '面议'
+            self.fallbacks['salary_default'] += 1
+
+        # 工作地点、学历要求和招聘人数 - 从UL的li元素中提取
+        li_elements = XPATH_INFO_ITEMS(root)
+        if li_elements:
+            location_text = element_text(li_elements[0])
+            if location_text:
+                job_info['工作地点'] = location_text
+                logger.debug("工作地点：%s", location_text)
+            for li in li_elements:
+                text = element_text(li)
+                if not text:
+                    continue
+
+                # 检查是否包含招聘人数（格式：招×人）
+                if '招' in text and '人' in text:
+                    match = RECRUIT_NUM_PATTERN.search(text)
+                    if match:
+                        job_info['招聘人数'] = match.group(1)
+                        logger.debug("招聘人数: %s", match.group(1))
+
+                # 检查是否包含学历关键字
+                for keyword in EDUCATION_KEYWORDS:
+                    if keyword in text:
+                        job_info['学历要求'] = text
+                        logger.debug("学历要求: %s", text)
+                        break
+        else:
+            logger.warning("未找到工作地点或学历要求")
+
+        # 公司名称
+        company_element = _first(XPATH_COMPANY, root)
+        if company_element is not None:
+            company_name = element_text(company_element)
+            if company_name:
+                job_info['公司名称'] = company_name
+                logger.debug("公司名称: %s", company_name)
+        else:
+            logger.warning("未找到公司名称")
+
+        # 任职要求 - 主要选择器失败时使用备选选择器
+        desc_element = _first(XPATH_DESCRIPTION, root)
+        if desc_element is None:
+            logger.warning("未找到任职要求（使用主要选择器）")
+            self.fallbacks['description_fallback'] += 1
+            desc_element = _first(XPATH_DESCRIPTION_FALLBACK, root)
+            if desc_element is None:
+                logger.warning("未找到任职要求（使用备选选择器）")
+                job_info['任职要求'] = '无'
+        if desc_element is not None:
+            job_desc = element_text(desc_element)
+            if job_desc and len(job_desc) > 10:
+                job_info['任职要求'] = job_desc
+                logger.debug("任职要求: %.50s...", job_desc)
+
+        # 发布时间
+        publish_element = _first(XPATH_PUBLISH_TIME, root)
+        if publish_element is not None:
+            publish_time = element_text(publish_element)
+            if publish_time:
+                job_info['发布时间'] = publish_time
+                logger.debug("发布时间: %s", publish_time)
+        else:
+            logger.warning("未找到发布时间")
+            job_info['发布时间'] = datetime.now().strftime('%Y-%m-%d')
+            self.fallbacks['publish_time_default'] += 1
+
+        return job_info
+
+    def parse_file(self, path, encoding='utf-8'):
+        """
+        解析保存下来的详情页HTML文件
+        :param path: HTML文件路径
+        :param encoding: 文件编码
+        :return: 职位信息字典
+        """
+        with open(path, 'r', encoding=encoding, errors='replace') as f:
+            return self.parse(f.read())
+
+
+def main():
+    """命令行入口：解析若干HTML文件并输出为CSV"""
+    if len(sys.argv) < 3:
+        print("用法: python zhaopin_parser.py 输出.csv 详情页1.html [详情页2.html ...]")
+        return
+
+    output, paths = sys.argv[1], sys.argv[2:]
+    parser = JobDetailParser()
+    with open(output, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=JOB_FIELDS)
+        writer.writeheader()
+        for path in paths:
+            writer.writerow(parser.parse_file(path))
+    logger.info(f"已解析 {len(paths)} 个文件到 {output}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,164 @@
+"""
+精简浏览器配置
+爬虫只读取页面文字，不需要图片、字体、媒体和统计脚本：
+通过Chrome首选项和CDP的 Network.setBlockedURLs 屏蔽这些资源，
+并统计每个页面实际传输的字节数和加载时间，方便比较开启前后的差异
+"""
+
+from selenium.common.exceptions import WebDriverException
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+# 各类资源对应的URL模式
+RESOURCE_URL_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.mp3', '*.m3u8', '*.m4s', '*.flv', '*.mov', '*.m4a', '*.aac', '*.ogg', '*.wav'],
+    'stylesheet': ['*.css'],
+}
+
+# 常见的统计和广告脚本
+TRACKING_URL_PATTERNS = [
+    '*hm.baidu.com*',
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*cnzz.com*',
+    '*growingio.com*',
+    '*sensorsdata*',
+    '*zhugeio.com*',
+]
+
+# 默认屏蔽的资源类型（样式表会影响部分页面布局，默认不屏蔽）
+DEFAULT_BLOCKED_RESOURCES = ('image', 'font', 'media')
+
+# 一次脚本调用取出当前页面的传输字节数和加载时间
+_PAGE_COST_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? (nav.transferSize || 0) : 0;
+for (var i = 0; i < resources.length; i++) {
+    bytes += resources[i].transferSize || 0;
+}
+var loadTime = nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || nav.duration) : 0;
+return [bytes, resources.length, loadTime, nav ? nav.domContentLoadedEventEnd : 0];
+"""
+
+
+def blocked_url_patterns(resource_types=DEFAULT_BLOCKED_RESOURCES, block_tracking=True, extra_patterns=None):
+    """
+    生成需要屏蔽的URL模式列表
+    :param resource_types: 屏蔽的资源类型，见 RESOURCE_URL_PATTERNS
+    :param block_tracking: 是否屏蔽统计脚本
+    :param extra_patterns: 额外的URL模式
+    """
+    patterns = []
+    for resource_type in resource_types:
+        patterns.extend(RESOURCE_URL_PATTERNS.get(resource_type, []))
+    if block_tracking:
+        patterns.extend(TRACKING_URL_PATTERNS)
+    patterns.extend(extra_patterns or [])
+    return patterns
+
+
+def apply_lean_options(chrome_options, resource_types=DEFAULT_BLOCKED_RESOURCES):
+    """
+    在Chrome启动参数中加入精简设置
+    Chrome首选项只能关闭图片；字体、媒体等没有对应的首选项，由 enable_url_blocking 按URL屏蔽
+    :param chrome_options: selenium的Options
+    :param resource_types: 屏蔽的资源类型
+    """
+    prefs = {}
+    if 'image' in resource_types:
+        prefs['profile.managed_default_content_settings.images'] = 2
+    prefs['profile.default_content_setting_values.notifications'] = 2
+    chrome_options.add_experimental_option('prefs', prefs)
+    chrome_options.add_argument('--disable-background-networking')
+    chrome_options.add_argument('--disable-sync')
+
+
+def enable_url_blocking(driver, patterns):
+    """
+    通过CDP屏蔽URL，只对当前标签页生效，新建的标签页需要再次调用
+    :param driver: WebDriver
+    :param patterns: URL模式列表
+    :return: 是否设置成功
+    """
+    if not patterns:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+        return True
+    except WebDriverException as e:
+        logger.warning(f"设置资源屏蔽失败: {e}")
+        return False
+
+
+class PageCostMonitor:
+    """
+    统计每个页面的传输字节数和加载时间
+    普通模式下的统计结果可以保存为基准，精简模式运行时与基准比较得出节省量
+    """
+
+    def __init__(self, name='full'):
+        """
+        :param name: 本次统计的名称，例如'full'或'lean'
+        """
+        self.name = name
+        self.pages = 0
+        self.total_bytes = 0
+        self.total_resources = 0
+        self.total_load_ms = 0.0
+
+    def record(self, driver):
+        """
+        记录当前页面的开销
+        :return: (字节数, 加载毫秒数)，获取失败时返回None
+        """
+        try:
+            page_bytes, resources, load_ms, _ = driver.execute_script(_PAGE_COST_SCRIPT)
+        except WebDriverException as e:
+            logger.debug(f"获取页面开销失败: {e}")
+            return None
+        self.pages += 1
+        self.total_bytes += page_bytes or 0
+        self.total_resources += resources or 0
+        self.total_load_ms += load_ms or 0
+        logger.debug(f"页面传输 {(page_bytes or 0) / 1024:.1f} KB，{resources} 个资源，加载 {load_ms or 0:.0f} ms")
+        return page_bytes, load_ms
+
+    def summary(self):
+        """平均每页的开销"""
+        pages = self.pages or 1
+        return {
+            'name': self.name,
+            'pages': self.pages,
+            'avg_bytes': self.total_bytes / pages,
+            'avg_resources': self.total_resources / pages,
+            'avg_load_ms': self.total_load_ms / pages,
+        }
+
+    def save(self, path):
+        """保存统计结果为JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def report(self, baseline_path=None):
+        """
+        输出统计结果，有基准文件时同时输出每页节省的字节数和时间
+        :param baseline_path: 普通模式下保存的统计结果
+        """
+        if not self.pages:
+            return
+        summary = self.summary()
+        logger.info(f"页面开销（{self.name}）：共 {self.pages} 页，平均每页 {summary['avg_bytes'] / 1024:.1f} KB，"
+                    f"{summary['avg_resources']:.1f} 个资源，加载 {summary['avg_load_ms']:.0f} ms")
+        if baseline_path and os.path.exists(baseline_path):
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            saved_kb = (baseline['avg_bytes'] - summary['avg_bytes']) / 1024
+            saved_ms = baseline['avg_load_ms'] - summary['avg_load_ms']
+            logger.info(f"与基准（{baseline.get('name')}）相比，平均每页节省 {saved_kb:.1f} KB、{saved_ms:.0f} ms")
@@ -0,0 +1,181 @@
+"""
+紧凑的职位记录
+长时间爬取时job_data中保存大量记录，每条记录一个8键字典开销较大：
+公司名称、工作地点、学历要求等字段大量重复，任职要求又很长。
+JobRecord用__slots__保存字段，取值种类少的字段（公司名称、工作地点等）通过字符串池共用同一个对象，
+任职要求按UTF-8追加到共享的文本块中，写满的块用zlib压缩。
+JobRecord实现了Mapping接口，可以像字典一样读取，CsvSink、JobStore等可以直接接收
+"""
+
+from collections.abc import Mapping
+import zlib
+
+from zhaopin_parser import JOB_FIELDS
+
+# 字段名到属性名的映射（任职要求单独保存在文本块中）
+_FIELD_SLOTS = {
+    '职位名称': 'title',
+    '薪资': 'salary',
+    '工作地点': 'location',
+    '公司名称': 'company',
+    '学历要求': 'education',
+    '招聘人数': 'recruit_count',
+    '发布时间': 'publish_time',
+    '相似职位': 'duplicate_of',
+}
+DESCRIPTION_FIELD = '任职要求'
+# 只有取值种类少的字段放入字符串池；职位名称、薪资、发布时间等取值很多，放入池中只会让池一直增长
+_INTERNED_FIELDS = frozenset(['公司名称', '工作地点', '学历要求', '招聘人数'])
+
+
+class StringPool:
+    """
+    字符串池：相同内容的字符串只保留一个对象
+    与sys.intern不同，池可以随时清空，池中字符串数达到max_size后不再加入新字符串
+    """
+
+    def __init__(self, max_size=200000):
+        self.max_size = max_size
+        self._strings = {}
+
+    def intern(self, value):
+        if not value:
+            return ''
+        existing = self._strings.get(value)
+        if existing is not None:
+            return existing
+        if len(self._strings) < self.max_size:
+            self._strings[value] = value
+        return value
+
+    def clear(self):
+        self._strings.clear()
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class TextChunk:
+    """文本块：写入时为bytearray，写满后压缩为bytes"""
+
+    __slots__ = ('buffer', 'data', 'compressed')
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.data = bytearray()
+        self.compressed = False
+
+    def seal(self, level):
+        """写满后压缩，之后只读"""
+        self.data = zlib.compress(bytes(self.data), level)
+        self.compressed = True
+
+    def read(self, offset, length):
+        if not self.compressed:
+            return self.data[offset:offset + length].decode('utf-8')
+        return self.buffer.plain_data(self)[offset:offset + length].decode('utf-8')
+
+
+class TextBuffer:
+    """
+    共享的长文本缓冲区
+    文本追加到当前块中，块超过chunk_size后压缩并开始新块；
+    记录只保存(块, 偏移, 长度)，某个块的记录全部释放后该块也随之释放
+    """
+
+    def __init__(self, chunk_size=256 * 1024, compress_level=6):
+        """
+        :param chunk_size: 每个块的大小（未压缩的字节数）
+        :param compress_level: zlib压缩级别，0表示不压缩
+        """
+        self.chunk_size = chunk_size
+        self.compress_level = compress_level
+        self.current = TextChunk(self)
+        self._cached_chunk = None  # 最近一次解压的块，顺序读取时避免重复解压
+        self._cached_data = None
+
+    def add(self, text):
+        """
+        追加一段文本
+        :return: (块, 偏移, 长度)
+        """
+        encoded = text.encode('utf-8')
+        chunk = self.current
+        offset = len(chunk.data)
+        chunk.data += encoded
+        if len(chunk.data) >= self.chunk_size:
+            if self.compress_level:
+                chunk.seal(self.compress_level)
+            self.current = TextChunk(self)
+        return chunk, offset, len(encoded)
+
+    def plain_data(self, chunk):
+        """返回已压缩块解压后的内容"""
+        if self._cached_chunk is not chunk:
+            self._cached_data = zlib.decompress(chunk.data)
+            self._cached_chunk = chunk
+        return self._cached_data
+
+
+class JobRecord(Mapping):
+    """
+    一条职位记录，按 JOB_FIELDS 中的字段名读取，例如 record['公司名称']
+    由 RecordPool.make 创建
+    """
+
+    __slots__ = tuple(_FIELD_SLOTS.values()) + ('_chunk', '_offset', '_length')
+
+    def __getitem__(self, field):
+        if field == DESCRIPTION_FIELD:
+            if self._chunk is None:
+                return ''
+            return self._chunk.read(self._offset, self._length)
+        try:
+            return getattr(self, _FIELD_SLOTS[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def __iter__(self):
+        return iter(JOB_FIELDS)
+
+    def __len__(self):
+        return len(JOB_FIELDS)
+
+    def to_dict(self):
+        """转换为普通字典"""
+        return {field: self[field] for field in JOB_FIELDS}
+
+    def __repr__(self):
+        return f'JobRecord({self.title!r}, {self.company!r})'
+
+
+class RecordPool:
+    """创建JobRecord，所有记录共用一个字符串池和一个任职要求文本缓冲区"""
+
+    def __init__(self, strings=None, descriptions=None):
+        """
+        :param strings: 字符串池（StringPool），None表示新建
+        :param descriptions: 任职要求文本缓冲区（TextBuffer），None表示新建
+        """
+        # 传入的池为空时也要共用（StringPool定义了__len__，空池为假值）
+        self.strings = strings if strings is not None else StringPool()
+        self.descriptions = descriptions if descriptions is not None else TextBuffer()
+
+    def make(self, job_info):
+        """
+        把职位信息字典转换为JobRecord
+        :param job_info: 职位信息字典（或JobRecord，原样返回）
+        """
+        if isinstance(job_info, JobRecord):
+            return job_info
+        record = JobRecord.__new__(JobRecord)
+        intern = self.strings.intern
+        for field, slot in _FIELD_SLOTS.items():
+            value = job_info.get(field) or ''
+            setattr(record, slot, intern(value) if field in _INTERNED_FIELDS else value)
+        description = job_info.get(DESCRIPTION_FIELD) or ''
+        if description:
+            record._chunk, record._offset, record._length = self.descriptions.add(description)
+        else:
+            record._chunk, record._offset, record._length = None, 0, 0
+        return record
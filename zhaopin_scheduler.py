@@ -0,0 +1,234 @@
+"""
+多搜索页调度
+按优先级和刷新间隔安排多个城市（jl…）× 公司类型（ct=）搜索页的刷新，
+所有搜索共用一个已登录的浏览器和同一个请求预算，不需要为每个搜索重启浏览器或重新登录，
+并记录每个搜索的数据新鲜度（距上次刷新的时间）
+"""
+
+from datetime import datetime
+import logging
+import json
+import time
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SearchSpec:
+    """一个需要定期刷新的搜索页"""
+
+    def __init__(self, name, url, priority=0, refresh_minutes=60, max_pages=None, incremental=True):
+        """
+        :param name: 搜索名称，例如'成都-上市公司'
+        :param url: 搜索页URL
+        :param priority: 优先级，数字越大越先刷新
+        :param refresh_minutes: 刷新间隔（分钟）
+        :param max_pages: 每次最多爬取的页数，None表示不限制
+        :param incremental: 是否使用增量模式
+        """
+        self.name = name
+        self.url = url
+        self.priority = priority
+        self.refresh_minutes = refresh_minutes
+        self.max_pages = max_pages
+        self.incremental = incremental
+
+    @classmethod
+    def load_list(cls, path):
+        """
+        从JSON文件读取搜索列表
+        文件内容为数组，每项包含 name、url 以及可选的 priority、refresh_minutes、max_pages、incremental
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return [cls(**item) for item in json.load(f)]
+
+
+class SearchScheduler:
+    """在同一个浏览器会话中按计划刷新多个搜索页"""
+
+    def __init__(self, crawler, searches, requests_per_hour=None, state_path='scheduler_state.json',
+                 idle_seconds=60):
+        """
+        :param crawler: 已初始化浏览器的ZhaopinCrawler
+        :param searches: SearchSpec列表
+        :param requests_per_hour: 所有搜索合计每小时最多打开的页面数（列表页+详情页），None表示不限制
+        :param state_path: 保存各搜索刷新时间和新鲜度的文件
+        :param idle_seconds: 没有需要刷新的搜索时的等待秒数
+        """
+        self.crawler = crawler
+        self.searches = sorted(searches, key=lambda spec: -spec.priority)
+        self.requests_per_hour = requests_per_hour
+        self.state_path = state_path
+        self.idle_seconds = idle_seconds
+        self.state = self._load_state()
+        self._spent = []  # 最近一小时内各次刷新消耗的请求数 [(时间, 请求数)]
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+
+    def lag_seconds(self, spec, now=None):
+        """距上次刷新的秒数，从未刷新过时返回None"""
+        last_run = self.state.get(spec.name, {}).get('last_run')
+        if last_run is None:
+            return None
+        return (now or time.time()) - last_run
+
+    def estimated_cost(self, spec):
+        """估计一次刷新需要的请求数：上次的实际请求数，没有记录时按每页20个职位估算"""
+        last_cost = self.state.get(spec.name, {}).get('last_requests')
+        if last_cost:
+            return last_cost
+        return (spec.max_pages or 5) * 21
+
+    def remaining_budget(self, now=None):
+        """最近一小时内剩余的请求预算，不限制时返回None"""
+        if self.requests_per_hour is None:
+            return None
+        now = now or time.time()
+        self._spent = [(t, cost) for t, cost in self._spent if now - t < 3600]
+        return self.requests_per_hour - sum(cost for _, cost in self._spent)
+
+    def plan(self, now=None):
+        """
+        选出本轮需要刷新的搜索
+        到期的搜索按优先级、再按超期时间排序，在剩余预算内依次加入；
+        预算不足的搜索推迟到下一轮
+        """
+        now = now or time.time()
+        due = []
+        for spec in self.searches:
+            lag = self.lag_seconds(spec, now)
+            if lag is None or lag >= spec.refresh_minutes * 60:
+                overdue = float('inf') if lag is None else lag - spec.refresh_minutes * 60
+                due.append((spec, overdue))
+        due.sort(key=lambda item: (-item[0].priority, -item[1]))
+
+        budget = self.remaining_budget(now)
+        planned = []
+        for spec, _ in due:
+            cost = self.estimated_cost(spec)
+            if budget is not None and cost > budget and (planned or budget < self.requests_per_hour):
+                logger.info(f"请求预算不足，推迟刷新 {spec.name}（预计 {cost} 次请求，剩余 {budget:.0f} 次）")
+                continue
+            planned.append(spec)
+            if budget is not None:
+                budget -= cost
+        return planned
+
+    def refresh(self, spec):
+        """刷新一个搜索页"""
+        logger.info(f"开始刷新搜索 {spec.name}: {spec.url}")
+        started = time.time()
+        requests_before = self.crawler.request_count
+        # 计划时只按估计值检查预算，实际爬取时把剩余预算传给爬虫，超出估计的搜索也不会超过每小时上限
+        jobs = self.crawler.crawl_search(spec.url, max_pages=spec.max_pages, incremental=spec.incremental,
+                                         max_requests=self.remaining_budget(started))
+        requests = self.crawler.request_count - requests_before
+        finished = time.time()
+        self._spent.append((finished, requests))
+
+        self.state[spec.name] = {
+            'url': spec.url,
+            'last_run': finished,
+            'last_run_at': datetime.fromtimestamp(finished).strftime('%Y-%m-%d %H:%M:%S'),
+            'last_jobs': jobs,
+            'last_requests': requests,
+            'last_duration': round(finished - started, 1),
+        }
+        self._save_state()
+        logger.info(f"搜索 {spec.name} 刷新完成：新增 {jobs} 条，{requests} 次请求，用时 {finished - started:.0f} 秒")
+
+    def freshness(self, now=None):
+        """
+        各搜索的数据新鲜度
+        :return: 列表，每项包含名称、距上次刷新的分钟数、刷新间隔以及是否超期
+        """
+        now = now or time.time()
+        report = []
+        for spec in self.searches:
+            lag = self.lag_seconds(spec, now)
+            report.append({
+                'name': spec.name,
+                'lag_minutes': None if lag is None else round(lag / 60, 1),
+                'refresh_minutes': spec.refresh_minutes,
+                'overdue': lag is None or lag > spec.refresh_minutes * 60,
+            })
+        return report
+
+    def log_freshness(self):
+        """输出各搜索的数据新鲜度"""
+        for item in self.freshness():
+            lag = '从未刷新' if item['lag_minutes'] is None else f"{item['lag_minutes']} 分钟前"
+            flag = '（已超期）' if item['overdue'] else ''
+            logger.info(f"新鲜度 {item['name']}: {lag}，刷新间隔 {item['refresh_minutes']} 分钟{flag}")
+
+    def run_once(self):
+        """执行一轮：刷新所有到期且在预算内的搜索"""
+        planned = self.plan()
+        for spec in planned:
+            try:
+                self.refresh(spec)
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                logger.error(f"刷新搜索 {spec.name} 失败: {e}")
+        self.log_freshness()
+        return len(planned)
+
+    def run_forever(self, max_cycles=None):
+        """
+        循环调度，直到被中断
+        :param max_cycles: 最多执行的轮数，None表示不限制
+        """
+        cycles = 0
+        while max_cycles is None or cycles < max_cycles:
+            if not self.run_once():
+                time.sleep(self.idle_seconds)
+            cycles += 1
+
+
+def main():
+    """命令行入口：python zhaopin_scheduler.py searches.json"""
+    from zhaopin_checkpoint import CheckpointJournal
+    from zhaopin_crawler import ZhaopinCrawler
+    from zhaopin_logging import setup_logging
+    from zhaopin_sink import CsvSink
+    from zhaopin_store import JobStore
+
+    if len(sys.argv) < 2:
+        print("用法: python zhaopin_scheduler.py searches.json [每小时请求数上限]")
+        return
+
+    setup_logging('zhaopin_crawler.log')
+    searches = SearchSpec.load_list(sys.argv[1])
+    requests_per_hour = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    sink = CsvSink('zhaopin_jobs', flush_every=1, fsync_every=20, max_bytes=50 * 1024 * 1024)
+    # 每个搜索页使用单独的断点日志，因预算停止翻页的搜索下次刷新时从中断的页继续
+    checkpoint = CheckpointJournal('zhaopin_scheduler_checkpoint.jsonl')
+    crawler = ZhaopinCrawler(sink=sink, job_buffer_size=0, store=JobStore('zhaopin_jobs.db'),
+                             checkpoint=checkpoint)
+    if not crawler.init_driver():
+        return
+
+    interrupted = False
+    try:
+        crawler.start_session(searches[0].url)
+        scheduler = SearchScheduler(crawler, searches, requests_per_hour=requests_per_hour)
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("\n用户中断调度")
+        interrupted = True
+    finally:
+        crawler.close_session(interrupted)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,653 @@
+"""
+职位全文索引
+在CSV中查找"哪些职位提到了X"需要扫描全部文件，数据每天增加几千条长文本后越来越慢。
+本模块把职位名称和任职要求按中文二字组（连续两个汉字）、英文和数字按单词切分，建立磁盘上的倒排索引：
+    - 每个分段（segment）包含有序的词项表、uint32的文档号数组和varint编码的词位置，查询时用mmap映射，不需要读入内存；
+    - 新记录先在内存中缓冲，commit时写成一个新分段；分段数超过上限时在后台线程中合并相邻分段；
+    - 公司名称、工作地点、学历要求作为单独的字段建索引，可以和关键词组合过滤。
+多个关键词之间为"并且"关系，每个关键词（或引号中的短语）必须连续出现
+
+用法：
+    python zhaopin_search.py build -i zhaopin_index zhaopin_jobs_all.csv
+    python zhaopin_search.py query -i zhaopin_index "五险一金 \"数据分析\"" --location 成都 --education 本科
+"""
+
+from collections import defaultdict
+from array import array
+import threading
+import argparse
+import logging
+import shutil
+import bisect
+import mmap
+import json
+import time
+import sys
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖，只有使用全文索引时才需要
+    np = None
+
+from zhaopin_parser import parse_job_id
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'index.json'
+# 作为过滤条件建索引的字段：参数名 -> (字段名, 词项前缀)
+FILTER_FIELDS = {
+    'company': ('公司名称', 'company:'),
+    'location': ('工作地点', 'location:'),
+    'education': ('学历要求', 'education:'),
+}
+# 查询结果中返回的字段
+STORED_FIELDS = ('职位名称', '公司名称', '工作地点', '学历要求', '薪资', '发布时间')
+
+_TOKEN_PATTERN = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+|[a-zA-Z0-9][a-zA-Z0-9+#]*')
+_QUERY_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("全文索引需要安装numpy: pip install numpy")
+
+
+def _is_cjk(char):
+    return char >= '\u3400'
+
+
+def tokenize(text):
+    """
+    切分文本：连续的汉字切成二字组（只有一个字时保留单字），英文和数字按单词切分并转为小写
+    例如 "熟悉Excel办公软件" -> ['熟悉', 'excel', '办公', '公软', '软件']
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text or ''):
+        if _is_cjk(run[0]):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def parse_query(query):
+    """把查询字符串拆成短语（词项列表）的列表，引号中的内容作为一个短语"""
+    phrases = []
+    for quoted, word in _QUERY_PATTERN.findall(query or ''):
+        tokens = tokenize(quoted or word)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
+
+
+def _encode_varints(values, out):
+    """把非负整数按varint追加到bytearray"""
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def _decode_varints(data):
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def _map_array(path, dtype):
+    """用mmap映射数组文件（空文件不能映射）"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+def _map_bytes(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    """
+    一个只读分段，目录中的文件：
+        terms.txt      有序的词项，每行一个
+        terms.npy      每个词项的 (第一条倒排记录的序号, 倒排记录数)
+        postings.u32   所有词项的文档号，按词项顺序依次排列，每个词项内部有序
+        positions.idx  每条倒排记录的位置数据在positions.bin中的起始字节（uint64，多一项作为结尾）
+        positions.bin  每条倒排记录的词位置，差值后按varint编码
+        docs.bin       每个文档的存储字段（一行JSON）
+        docs.idx       每个文档在docs.bin中的起始字节（uint64，多一项作为结尾）
+        keys.txt       每个文档的职位键
+        segment.json   第一个文档号和文档数
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, 'segment.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        self.base = info['base']
+        self.count = info['count']
+        with open(os.path.join(path, 'terms.txt'), 'r', encoding='utf-8') as f:
+            self.terms = f.read().split('\n') if info['terms'] else []
+        self.term_rows = {term: row for row, term in enumerate(self.terms)}
+        self._suffix_rows = None  # 二字组的第二个字 -> 行号列表，单字查询时才建立
+        self.term_meta = np.load(os.path.join(path, 'terms.npy'))
+        self.doc_ids = _map_array(os.path.join(path, 'postings.u32'), np.uint32)
+        self.position_index = _map_array(os.path.join(path, 'positions.idx'), np.uint64)
+        self.positions = _map_bytes(os.path.join(path, 'positions.bin'))
+        self.doc_index = _map_array(os.path.join(path, 'docs.idx'), np.uint64)
+        self.docs = _map_bytes(os.path.join(path, 'docs.bin'))
+
+    def close(self):
+        for data in (self.positions, self.docs):
+            if isinstance(data, mmap.mmap):
+                data.close()
+        # np.memmap在没有引用后自动关闭
+        self.doc_ids = self.position_index = self.doc_index = None
+
+    def keys(self):
+        with open(os.path.join(self.path, 'keys.txt'), 'r', encoding='utf-8') as f:
+            return f.read().split('\n') if self.count else []
+
+    def term_rows_for(self, token, suffix=False):
+        """
+        词项在本分段中的行号列表
+        单个汉字在文档中通常只出现在二字组里，扩展为所有以该字开头的二字组（位置与该字相同）；
+        suffix为True时还包括以该字结尾的二字组（只用于不需要比较位置的单字查询）
+        """
+        word = token.rpartition(':')[2]
+        if len(word) != 1 or not _is_cjk(word):
+            row = self.term_rows.get(token)
+            return [] if row is None else [row]
+        rows = []
+        for row in range(bisect.bisect_left(self.terms, token), len(self.terms)):
+            if not self.terms[row].startswith(token):
+                break
+            if len(self.terms[row]) <= len(token) + 1:
+                rows.append(row)
+        if suffix:
+            if self._suffix_rows is None:
+                self._suffix_rows = defaultdict(list)
+                for row, term in enumerate(self.terms):
+                    prefix, _, term_word = term.rpartition(':')
+                    if len(term_word) == 2 and _is_cjk(term_word[0]):
+                        self._suffix_rows[f'{prefix}:{term_word[1]}' if prefix else term_word[1]].append(row)
+            rows.extend(self._suffix_rows.get(token, []))
+        return rows
+
+    def _postings(self, row):
+        start, count = self.term_meta[row]
+        return int(start), self.doc_ids[start:start + count]
+
+    def docs_for(self, token, suffix=False):
+        """包含该词项的文档号（有序）"""
+        rows = self.term_rows_for(token, suffix)
+        if len(rows) == 1:
+            return np.asarray(self._postings(rows[0])[1])
+        docs = [self._postings(row)[1] for row in rows]
+        return np.unique(np.concatenate(docs)) if docs else np.empty(0, dtype=np.uint32)
+
+    def position_ranges(self, token, docs):
+        """
+        词项在一组文档中的位置数据
+        :return: 每个文档一个列表，包含该词项（单字时为扩展后的各个词项）位置数据在positions.bin中的(起, 止)
+        """
+        ranges = [[] for _ in range(len(docs))]
+        for row in self.term_rows_for(token):
+            start, row_docs = self._postings(row)
+            index = np.minimum(np.searchsorted(row_docs, docs), len(row_docs) - 1)
+            found = np.flatnonzero(row_docs[index] == docs)
+            postings = start + index[found]
+            begins = self.position_index[postings].tolist()
+            ends = self.position_index[postings + 1].tolist()
+            for item, begin, end in zip(found.tolist(), begins, ends):
+                ranges[item].append((begin, end))
+        return ranges
+
+    def _positions(self, ranges):
+        result = set()
+        for begin, end in ranges:
+            position = 0
+            for delta in _decode_varints(self.positions[begin:end]):
+                position += delta
+                result.add(position)
+        return result
+
+    def document_frequency(self, token):
+        """包含该词项的文档数（单字扩展时为各词项之和，作为估计值）"""
+        return sum(int(self.term_meta[row][1]) for row in self.term_rows_for(token))
+
+    def candidates(self, tokens, within=None):
+        """
+        包含短语中所有词项的文档号（不比较位置），从最少的词项开始求交集
+        :param tokens: 短语的词项列表
+        :param within: 只在这些文档中查找，None表示不限制
+        """
+        docs = within
+        for token in sorted(set(tokens), key=self.document_frequency):
+            token_docs = self.docs_for(token, suffix=len(tokens) == 1)
+            docs = token_docs if docs is None else np.intersect1d(docs, token_docs, assume_unique=True)
+            if not len(docs):
+                break
+        return docs
+
+    def match(self, tokens, within=None):
+        """
+        包含短语（词项连续出现）的文档号
+        :param tokens: 短语的词项列表
+        :param within: 只在这些文档中查找，None表示不限制
+        """
+        return self.verify(tokens, self.candidates(tokens, within))
+
+    def verify(self, tokens, docs):
+        """在候选文档中比较词位置，保留短语连续出现的文档"""
+        if len(tokens) == 1 or not len(docs):
+            return docs
+        # 先批量定位每个词项在候选文档中的倒排记录，再逐个文档比较位置
+        ranges = [self.position_ranges(token, docs) for token in tokens]
+        matched = []
+        for item, doc in enumerate(docs.tolist()):
+            starts = self._positions(ranges[0][item])
+            for offset in range(1, len(tokens)):
+                positions = self._positions(ranges[offset][item])
+                starts = {start for start in starts if start + offset in positions}
+                if not starts:
+                    break
+            if starts:
+                matched.append(doc)
+        return np.array(matched, dtype=np.uint32)
+
+    def stored(self, doc):
+        """文档的存储字段"""
+        local = int(doc) - self.base
+        data = self.docs[int(self.doc_index[local]):int(self.doc_index[local + 1])]
+        return json.loads(bytes(data).decode('utf-8'))
+
+
+class _SegmentBuilder:
+    """内存中的分段缓冲区"""
+
+    def __init__(self, base):
+        self.base = base
+        self.postings = defaultdict(list)  # 词项 -> [(文档号, 位置列表)]
+        self.docs = []
+        self.keys = []
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, key, job_info, url=None):
+        doc = self.base + len(self.docs)
+        positions = defaultdict(list)
+        # 职位名称和任职要求在同一个字段中，中间空一个位置，短语不会跨越两部分
+        title_tokens = tokenize(job_info.get('职位名称'))
+        body = enumerate(title_tokens + [None] + tokenize(job_info.get('任职要求')))
+        for position, token in body:
+            if token is not None:
+                positions[token].append(position)
+        for field, prefix in FILTER_FIELDS.values():
+            for position, token in enumerate(tokenize(job_info.get(field))):
+                positions[prefix + token].append(position)
+        for token, token_positions in positions.items():
+            self.postings[token].append((doc, token_positions))
+
+        stored = {field: job_info.get(field) or '' for field in STORED_FIELDS}
+        stored['key'] = key
+        stored['url'] = url or job_info.get('url') or ''
+        self.docs.append(json.dumps(stored, ensure_ascii=False).encode('utf-8'))
+        self.keys.append(key)
+        return doc
+
+    def write(self, path):
+        """写入分段目录"""
+        terms = sorted(self.postings)
+        term_meta = np.zeros((len(terms), 2), dtype=np.int64)
+        doc_ids = array('I')
+        position_index = array('Q')
+        positions = bytearray()
+        for row, term in enumerate(terms):
+            term_meta[row] = (len(doc_ids), len(self.postings[term]))
+            for doc, token_positions in self.postings[term]:
+                doc_ids.append(doc)
+                position_index.append(len(positions))
+                previous = 0
+                deltas = []
+                for position in token_positions:
+                    deltas.append(position - previous)
+                    previous = position
+                _encode_varints(deltas, positions)
+        position_index.append(len(positions))
+
+        doc_index = array('Q', [0])
+        for data in self.docs:
+            doc_index.append(doc_index[-1] + len(data))
+        _write_segment(path, self.base, len(self.docs), terms, term_meta, doc_ids, position_index,
+                       positions, doc_index, b''.join(self.docs), self.keys)
+
+
+def _write_segment(path, base, count, terms, term_meta, doc_ids, position_index, positions, doc_index, docs,
+                   keys):
+    """写入分段的所有文件（先写临时目录再改名）"""
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    with open(os.path.join(tmp_path, 'terms.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(terms))
+    np.save(os.path.join(tmp_path, 'terms.npy'), term_meta)
+    for name, data in (('postings.u32', doc_ids), ('positions.idx', position_index),
+                       ('positions.bin', positions), ('docs.idx', doc_index), ('docs.bin', docs)):
+        with open(os.path.join(tmp_path, name), 'wb') as f:
+            f.write(data if isinstance(data, (bytes, bytearray)) else data.tobytes())
+    with open(os.path.join(tmp_path, 'keys.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(keys))
+    with open(os.path.join(tmp_path, 'segment.json'), 'w', encoding='utf-8') as f:
+        json.dump({'base': base, 'count': count, 'terms': len(terms)}, f)
+    os.replace(tmp_path, path)
+
+
+def merge_segments(segments, path):
+    """
+    把文档号相邻的多个分段合并为一个
+    :param segments: 按文档号排列的Segment列表
+    :param path: 新分段目录
+    """
+    terms = sorted(set().union(*(segment.term_rows for segment in segments)))
+    term_meta = np.zeros((len(terms), 2), dtype=np.int64)
+    doc_ids = []
+    position_index = []
+    positions = bytearray()
+    posting_count = 0
+    for row, term in enumerate(terms):
+        start = posting_count
+        for segment in segments:
+            segment_row = segment.term_rows.get(term)
+            if segment_row is None:
+                continue
+            first, count = (int(value) for value in segment.term_meta[segment_row])
+            doc_ids.append(segment.doc_ids[first:first + count])
+            offsets = segment.position_index[first:first + count + 1]
+            begin, end = int(offsets[0]), int(offsets[-1])
+            position_index.append(offsets[:-1].astype(np.int64) - begin + len(positions))
+            positions += segment.positions[begin:end]
+            posting_count += count
+        term_meta[row] = (start, posting_count - start)
+    position_index.append(np.array([len(positions)], dtype=np.int64))
+
+    doc_index = [np.zeros(1, dtype=np.uint64)]
+    docs = bytearray()
+    keys = []
+    for segment in segments:
+        doc_index.append(segment.doc_index[1:].astype(np.uint64) + np.uint64(len(docs)))
+        docs += segment.docs[:int(segment.doc_index[-1])] if segment.count else b''
+        keys.extend(segment.keys())
+
+    _write_segment(
+        path, segments[0].base, sum(segment.count for segment in segments), terms, term_meta,
+        np.concatenate(doc_ids).astype(np.uint32) if doc_ids else np.empty(0, dtype=np.uint32),
+        np.concatenate(position_index).astype(np.uint64), positions,
+        np.concatenate(doc_index), bytes(docs), keys,
+    )
+
+
+class JobSearchIndex:
+    """磁盘上的职位全文索引，可以边写入边查询"""
+
+    def __init__(self, path='zhaopin_index', buffer_docs=5000, max_segments=8, merge_factor=4,
+                 background_merge=True):
+        """
+        :param path: 索引目录
+        :param buffer_docs: 内存中缓冲多少条记录后写成一个分段
+        :param max_segments: 分段数超过该值时合并
+        :param merge_factor: 每次合并的相邻分段数
+        :param background_merge: 是否在后台线程中合并，False表示在commit中直接合并
+        """
+        _require_numpy()
+        self.path = path
+        self.buffer_docs = buffer_docs
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+        self.background_merge = background_merge
+        self._lock = threading.RLock()
+        self._merge_thread = None
+        os.makedirs(path, exist_ok=True)
+
+        manifest = self._read_manifest()
+        self.next_doc = manifest['next_doc']
+        self.next_segment = manifest['next_segment']
+        self.segments = [Segment(os.path.join(path, name)) for name in manifest['segments']]
+        self._remove_unused(manifest['segments'])
+        self.keys = set()
+        for segment in self.segments:
+            self.keys.update(segment.keys())
+        self.builder = _SegmentBuilder(self.next_doc)
+        logger.info(f"已打开全文索引 {path}，{len(self.segments)} 个分段，{len(self.keys)} 个职位")
+
+    def _read_manifest(self):
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return {'segments': [], 'next_doc': 0, 'next_segment': 1}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        manifest_path = os.path.join(self.path, MANIFEST)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'segments': [segment.name for segment in self.segments], 'next_doc': self.next_doc,
+                       'next_segment': self.next_segment}, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    def _remove_unused(self, names):
+        """删除不在清单中的分段目录（合并后未能删除的旧分段、写了一半的临时目录）"""
+        for name in os.listdir(self.path):
+            if name.startswith('seg') and name not in names:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _new_segment_path(self):
+        with self._lock:
+            name = f'seg{self.next_segment:06d}'
+            self.next_segment += 1
+        return os.path.join(self.path, name)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, job_info, url=None):
+        """
+        加入一条职位记录（同一职位键只索引一次）
+        :param key: 职位键（职位ID或URL）
+        :param job_info: 职位信息（字典或JobRecord）
+        :param url: 详情页URL
+        :return: 是否加入
+        """
+        if not key or key in self.keys:
+            return False
+        self.keys.add(key)
+        self.builder.add(key, job_info, url)
+        if len(self.builder) >= self.buffer_docs:
+            self.commit()
+        return True
+
+    def commit(self):
+        """把缓冲区中的记录写成一个新分段"""
+        if not len(self.builder):
+            return
+        builder = self.builder
+        path = self._new_segment_path()
+        builder.write(path)
+        with self._lock:
+            self.segments.append(Segment(path))
+            self.next_doc = builder.base + len(builder)
+            self._write_manifest()
+        self.builder = _SegmentBuilder(self.next_doc)
+        logger.debug("全文索引写入分段 %s（%d 条记录）", os.path.basename(path), len(builder))
+        self.maybe_merge()
+
+    def maybe_merge(self):
+        """分段数超过上限时合并相邻的小分段"""
+        if len(self.segments) <= self.max_segments:
+            return
+        if self._merge_thread is not None and self._merge_thread.is_alive():
+            return
+        if self.background_merge:
+            self._merge_thread = threading.Thread(target=self._merge_pending, name='index-merge', daemon=True)
+            self._merge_thread.start()
+        else:
+            self._merge_pending()
+
+    def _merge_pending(self):
+        """合并直到分段数不超过上限"""
+        while len(self.segments) > self.max_segments:
+            if not self._merge_once():
+                break
+
+    def _merge_once(self):
+        with self._lock:
+            segments = list(self.segments)
+        factor = min(self.merge_factor, len(segments))
+        # 选择文档总数最少的一组相邻分段
+        start = min(range(len(segments) - factor + 1),
+                    key=lambda i: sum(segment.count for segment in segments[i:i + factor]))
+        group = segments[start:start + factor]
+        path = self._new_segment_path()
+        started = time.time()
+        try:
+            merge_segments(group, path)
+        except Exception as e:
+            logger.exception("合并分段失败: %s", e)
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        with self._lock:
+            index = self.segments.index(group[0])
+            self.segments[index:index + factor] = [Segment(path)]
+            self._write_manifest()
+            for segment in group:
+                segment.close()
+                shutil.rmtree(segment.path, ignore_errors=True)
+        logger.info(f"全文索引合并了 {factor} 个分段（{sum(segment.count for segment in group)} 条记录），"
+                    f"用时 {time.time() - started:.1f} 秒")
+        return True
+
+    def wait_for_merges(self):
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+            self._merge_thread = None
+
+    def optimize(self):
+        """把所有分段合并为一个"""
+        self.commit()
+        self.wait_for_merges()
+        while len(self.segments) > 1:
+            self.merge_factor = len(self.segments)
+            self._merge_once()
+
+    def search(self, query='', company=None, location=None, education=None, limit=20):
+        """
+        查询职位
+        :param query: 关键词，空格分隔的多个关键词须同时出现，引号中的短语作为一个关键词
+        :param company: 公司名称包含的文字
+        :param location: 工作地点包含的文字
+        :param education: 学历要求包含的文字
+        :param limit: 最多返回的结果数（最新加入的在前）
+        :return: (匹配的总数, 结果列表)，每个结果包含职位键、URL和 STORED_FIELDS 中的字段
+        """
+        phrases = []
+        filters = {'company': company, 'location': location, 'education': education}
+        for name, value in filters.items():
+            if value:
+                prefix = FILTER_FIELDS[name][1]
+                phrases.append([prefix + token for token in tokenize(value)])
+        phrases.extend(parse_query(query))
+        if not phrases:
+            raise ValueError("查询条件为空")
+
+        total = 0
+        hits = []
+        with self._lock:
+            matches = []
+            for segment in self.segments:
+                # 先用所有短语的词项求交集，再在剩下的文档中比较位置
+                docs = None
+                for tokens in phrases:
+                    docs = segment.candidates(tokens, docs)
+                    if not len(docs):
+                        break
+                for tokens in phrases:
+                    docs = segment.verify(tokens, docs)
+                total += len(docs)
+                matches.append((segment, docs))
+            for segment, docs in reversed(matches):
+                for doc in docs[::-1][:limit - len(hits)]:
+                    hits.append(segment.stored(doc))
+                if len(hits) >= limit:
+                    break
+        return total, hits
+
+    def close(self):
+        """写入缓冲区中的记录，等待后台合并完成"""
+        self.commit()
+        self.wait_for_merges()
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
+        logger.info(f"全文索引 {self.path} 已保存，共 {len(self.keys)} 个职位")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='职位全文索引')
+    parser.add_argument('-i', '--index', default='zhaopin_index', help='索引目录')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='把输出文件加入索引')
+    build.add_argument('inputs', nargs='+', help='输入文件、目录或通配符（.csv、.jsonl、.parquet）')
+    build.add_argument('--optimize', action='store_true', help='完成后合并为一个分段')
+    query = commands.add_parser('query', help='查询')
+    query.add_argument('query', nargs='?', default='', help='关键词')
+    query.add_argument('--company', help='公司名称包含的文字')
+    query.add_argument('--location', help='工作地点包含的文字')
+    query.add_argument('--education', help='学历要求包含的文字')
+    query.add_argument('--limit', type=int, default=20, help='最多显示的结果数')
+    args = parser.parse_args()
+
+    index = JobSearchIndex(args.index)
+    try:
+        if args.command == 'build':
+            from zhaopin_compact import expand_inputs, read_records, job_key
+            position = 0
+            for path in expand_inputs(args.inputs):
+                logger.info(f"读取 {path}")
+                for row in read_records(path):
+                    position += 1
+                    index.add(row.get('job_id') or parse_job_id(row.get('url')) or job_key(row, position), row)
+            if args.optimize:
+                index.optimize()
+        else:
+            started = time.perf_counter()
+            total, hits = index.search(args.query, args.company, args.location, args.education, args.limit)
+            elapsed = (time.perf_counter() - started) * 1000
+            for hit in hits:
+                print(f"{hit['职位名称']} | {hit['公司名称']} | {hit['工作地点']} | {hit['学历要求']} | "
+                      f"{hit['薪资']} | {hit['url'] or hit['key']}")
+            print(f"共 {total} 个职位，用时 {elapsed:.1f} 毫秒")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
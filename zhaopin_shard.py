@@ -0,0 +1,276 @@
+"""
+按页码范围分片的多进程爬取
+协调进程把页码范围分给M个子进程，每个子进程使用自己的浏览器和登录配置副本，
+通过 /pN 链接直接打开分到的页；所有子进程共享一个跨进程令牌桶限制总请求速率，
+结束后协调进程合并各分片的结果并按职位ID去重
+
+使用前需要先正常运行一次主程序完成登录，登录状态保存在 chrome_user_data 中
+"""
+
+from datetime import datetime
+import multiprocessing
+import argparse
+import logging
+import shutil
+import time
+import csv
+import os
+
+from zhaopin_parser import JOB_FIELDS
+from zhaopin_stats import MarketStats
+from zhaopin_store import JobStore
+from zhaopin_wait import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    跨进程共享的令牌桶
+    状态保存在共享内存中，需要在创建子进程时作为参数传入
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: 所有进程合计每秒允许的请求数
+        :param burst: 桶容量
+        """
+        self.rate = rate
+        self.burst = burst
+        # [当前令牌数, 上次更新时间]
+        self._state = multiprocessing.Array('d', [float(burst), time.monotonic()])
+
+    def reserve(self, tokens=1):
+        with self._state.get_lock():
+            now = time.monotonic()
+            available = min(self.burst, self._state[0] + (now - self._state[1]) * self.rate)
+            self._state[1] = now
+            if available >= tokens:
+                self._state[0] = available - tokens
+                return 0.0
+            self._state[0] = available
+            return (tokens - available) / self.rate
+
+
+def split_pages(first_page, last_page, shards):
+    """
+    把页码范围交错分给各分片，例如1-10分给3个分片：[1,4,7,10] [2,5,8] [3,6,9]
+    交错分配使每个分片都同时处理较新和较旧的页
+    """
+    pages = list(range(first_page, last_page + 1))
+    return [pages[i::shards] for i in range(shards) if pages[i::shards]]
+
+
+def copy_profile(source_dir, target_dir):
+    """复制一份登录配置，跳过Chrome运行时的锁文件"""
+    shutil.copytree(source_dir, target_dir, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns('Singleton*', '*.lock', 'lockfile'))
+    return target_dir
+
+
+def run_shard(shard):
+    """
+    子进程入口：爬取分到的页
+    :param shard: 分片配置字典（见 ShardCoordinator._shard_config）
+    """
+    # 在子进程中导入，避免协调进程加载selenium和日志配置
+    from zhaopin_crawler import ZhaopinCrawler
+    from zhaopin_sink import CsvSink
+    from zhaopin_logging import setup_logging
+
+    index = shard['index']
+    # 每个分片写自己的日志文件，避免多个进程同时滚动同一个文件
+    setup_logging(os.path.join(shard['output_dir'], f'shard{index}.log'),
+                  text_format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    store = JobStore(shard['store_path'])
+    sink = CsvSink(f'shard{index}', directory=shard['output_dir'])
+    crawler = ZhaopinCrawler(sink=sink, job_buffer_size=0, store=store)
+    # 主数据库中已有的职位（主程序或之前的分片运行抓取过的）也不再打开详情页
+    main_store_path = shard['main_store_path']
+    if main_store_path and os.path.exists(main_store_path):
+        crawler.seen_stores.append(JobStore(main_store_path, read_only=True))
+    for name, value in shard['settings'].items():
+        setattr(crawler, name, value)
+    crawler.interactive = False
+    crawler.rate_limiter = shard['rate_limiter']
+    crawler.max_request_rate = shard['rate_limiter'].rate
+    # 总请求速率由共享令牌桶控制，不再叠加单进程的详情页间隔
+    crawler.pacing.intervals.pop('detail', None)
+    crawler.metrics_path = os.path.join(shard['output_dir'], f'shard{index}_metrics')
+    # 每个分片只统计自己的职位，合并时再与主统计文件相加
+    crawler.market_stats = MarketStats()
+    crawler.market_stats_path = shard['stats_path']
+
+    crawler.user_data_dir = copy_profile(shard['profile_dir'], f"{shard['profile_dir']}_shard{index}")
+    try:
+        crawler.headless = shard['headless']
+        crawler.driver = crawler.create_driver(crawler.user_data_dir, headless=crawler.headless)
+        crawler.list_window = crawler.driver.current_window_handle
+        crawler.open_detail_window()
+        for page_num in shard['pages']:
+            page_url = crawler.get_page_url(shard['search_url'], page_num)
+            logger.info(f"分片 {index}：正在爬取第 {page_num} 页 {page_url}")
+            crawler.pacing.wait('page')
+            # 列表页也计入所有分片共享的请求速率
+            shard['rate_limiter'].acquire()
+            crawler.driver.switch_to.window(crawler.list_window)
+            crawler.driver.get(page_url)
+            crawler.current_page = page_num
+            if not crawler.crawl_page():
+                logger.info(f"分片 {index}：第 {page_num} 页没有职位，结束")
+                break
+    except Exception as e:
+        logger.error(f"分片 {index} 出错: {e}")
+    finally:
+        crawler.finish_output()
+        crawler.export_metrics()
+        crawler.close_detail_pool()
+        if crawler.driver:
+            crawler.driver.quit()
+        for seen_store in crawler.seen_stores:
+            seen_store.close()
+    logger.info(f"分片 {index} 完成，共 {crawler.job_count} 条")
+
+
+class ShardCoordinator:
+    """分片协调：启动子进程、等待完成并合并结果"""
+
+    def __init__(self, search_url, first_page=1, last_page=10, shards=2, max_request_rate=0.5,
+                 output_dir='shards', profile_dir=None, headless=False, settings=None, main_store_path=None):
+        """
+        :param search_url: 搜索页URL（包含 /p1 页码）
+        :param first_page: 起始页
+        :param last_page: 结束页
+        :param shards: 子进程数量
+        :param max_request_rate: 所有子进程合计每秒最多打开的页面数
+        :param output_dir: 分片结果目录
+        :param profile_dir: 已登录的浏览器用户数据目录
+        :param headless: 子进程是否使用无界面浏览器
+        :param settings: 需要设置到每个子进程爬虫上的属性，例如 {'lean_profile': True}
+        :param main_store_path: 主数据库路径，子进程只读打开，跳过其中已有的职位；None表示不使用
+        """
+        self.search_url = search_url
+        self.first_page = first_page
+        self.last_page = last_page
+        self.shards = shards
+        self.rate_limiter = SharedTokenBucket(max_request_rate)
+        self.output_dir = output_dir
+        self.profile_dir = profile_dir or os.path.join(os.getcwd(), 'chrome_user_data')
+        self.headless = headless
+        self.settings = settings or {}
+        self.main_store_path = main_store_path
+        self.store_paths = []
+        self.stats_paths = []
+        self.started_at = None  # 本次运行的开始时间，合并时只取这之后写入的记录
+
+    def _shard_config(self, index, pages):
+        store_path = os.path.join(self.output_dir, f'shard{index}.db')
+        stats_path = os.path.join(self.output_dir, f'shard{index}_stats.json')
+        self.store_paths.append(store_path)
+        self.stats_paths.append(stats_path)
+        return {
+            'index': index,
+            'pages': pages,
+            'search_url': self.search_url,
+            'store_path': store_path,
+            'stats_path': stats_path,
+            'output_dir': self.output_dir,
+            'profile_dir': self.profile_dir,
+            'headless': self.headless,
+            'settings': self.settings,
+            'rate_limiter': self.rate_limiter,
+            'main_store_path': self.main_store_path,
+        }
+
+    def run(self):
+        """启动所有分片并等待完成"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        processes = []
+        for index, pages in enumerate(split_pages(self.first_page, self.last_page, self.shards), 1):
+            process = multiprocessing.Process(target=run_shard, args=(self._shard_config(index, pages),),
+                                              name=f'shard-{index}')
+            process.start()
+            processes.append(process)
+            logger.info(f"已启动分片 {index}，负责第 {pages[0]}-{pages[-1]} 页中的 {len(pages)} 页")
+        for process in processes:
+            process.join()
+        logger.info("所有分片已完成")
+
+    def merge(self, output_csv=None, main_store=None, stats_path=None):
+        """
+        合并各分片本次运行的结果，按职位ID去重
+        分片数据库跨运行保留（用于跳过已抓取的职位），只合并本次运行写入或再次看到的记录
+        :param output_csv: 合并后的CSV文件，None表示自动生成文件名
+        :param main_store: 主数据库（JobStore），不为None时同时写入
+        :param stats_path: 主市场统计文件，不为None时把新加入主数据库的职位累加进去，并删除各分片的统计文件
+        :return: 合并后的记录数
+        """
+        if output_csv is None:
+            output_csv = f"zhaopin_jobs_merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+        seen = set()
+        # 分片只跳过自己数据库中已有的职位，统计时按主数据库去重，避免重复计入主程序已统计过的职位
+        stats = MarketStats() if stats_path else None
+        with open(output_csv, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            # 数据库记录中还有相似职位等字段，合并结果只保留基本字段
+            writer = csv.DictWriter(csvfile, fieldnames=JOB_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for path in self.store_paths:
+                if not os.path.exists(path):
+                    continue
+                with JobStore(path) as store:
+                    for job_id, url, job_info in store.iter_records(since=self.started_at):
+                        if job_id in seen:
+                            continue
+                        seen.add(job_id)
+                        writer.writerow(job_info)
+                        if stats is not None and not (main_store and main_store.has(job_id)):
+                            stats.add(job_info)
+                        if main_store:
+                            main_store.upsert(url, job_info, job_id=job_id)
+        if main_store:
+            main_store.flush()
+        if stats is not None:
+            if os.path.exists(stats_path):
+                stats = MarketStats.load(stats_path).merge(stats)
+            stats.save(stats_path)
+            # 各分片的统计已经按主数据库去重后计入，删除分片统计文件，下次合并不会重复累加
+            for path in self.stats_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"市场统计已更新到 {stats_path}（共 {len(stats)} 条职位）")
+        logger.info(f"已合并 {len(seen)} 条记录到 {output_csv}")
+        return len(seen)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='按页码范围分片的多进程爬取')
+    parser.add_argument('search_url', help='搜索页URL，例如 https://www.zhaopin.com/sou/jl489/p1?ct=9')
+    parser.add_argument('--pages', default='1-10', help='页码范围，例如 1-40')
+    parser.add_argument('--shards', type=int, default=2, help='子进程数量')
+    parser.add_argument('--rate', type=float, default=0.5, help='所有子进程合计每秒最多打开的页面数')
+    parser.add_argument('--output-dir', default='shards', help='分片结果目录')
+    parser.add_argument('--headless', action='store_true', help='子进程使用无界面浏览器')
+    parser.add_argument('--lean', action='store_true', help='使用精简浏览器配置')
+    parser.add_argument('--store', default='zhaopin_jobs.db', help='合并结果写入的主数据库，空字符串表示不写入')
+    parser.add_argument('--stats', default='zhaopin_stats.json', help='各分片统计累加到的市场统计文件，空字符串表示不合并')
+    args = parser.parse_args()
+
+    first_page, _, last_page = args.pages.partition('-')
+    coordinator = ShardCoordinator(
+        args.search_url, int(first_page), int(last_page or first_page), shards=args.shards,
+        max_request_rate=args.rate, output_dir=args.output_dir, headless=args.headless,
+        settings={'lean_profile': args.lean}, main_store_path=args.store or None,
+    )
+    coordinator.run()
+    main_store = JobStore(args.store) if args.store else None
+    coordinator.merge(main_store=main_store, stats_path=args.stats)
+    if main_store:
+        main_store.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    main()
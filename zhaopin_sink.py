@@ -0,0 +1,358 @@
+"""
+职位数据流式输出
+每提取到一条记录就追加写入文件，按条数批量flush/fsync，
+文件按大小或时间滚动，不再每隔几页把全部数据重写一遍
+支持CSV、JSON Lines和Parquet三种格式，可以用MultiSink同时写入多种格式
+"""
+
+from datetime import datetime
+import logging
+import json
+import csv
+import sys
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖，只有使用Parquet输出时才需要
+    pa = pq = None
+
+from zhaopin_parser import JOB_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class RotatingFileSink:
+    """
+    追加写入的滚动文件输出基类
+    子类实现 _open_writer 和 _write_record
+    """
+
+    extension = ''
+    encoding = 'utf-8'
+
+    def __init__(self, prefix='zhaopin_jobs', directory='.', flush_every=1, fsync_every=0,
+                 max_bytes=None, max_seconds=None, filename=None):
+        """
+        :param prefix: 文件名前缀，文件名为 前缀_时间戳.扩展名
+        :param directory: 输出目录
+        :param flush_every: 每写入多少条flush一次，0表示只在滚动和关闭时flush
+        :param fsync_every: 每写入多少条fsync一次，0表示只在滚动和关闭时fsync
+        :param max_bytes: 单个文件最大字节数，超过后滚动到新文件，None表示不按大小滚动
+        :param max_seconds: 单个文件最长写入秒数，超过后滚动到新文件，None表示不按时间滚动
+        :param filename: 固定的输出文件（不滚动、覆盖已有文件），None表示按前缀和时间戳生成
+        """
+        self.prefix = prefix
+        self.directory = directory
+        self.flush_every = flush_every
+        self.fsync_every = fsync_every
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.fixed_filename = filename
+
+        self.file = None
+        self.filename = None
+        self.files = []  # 本次运行写过的所有文件
+        self.total_records = 0
+        self._file_records = 0
+        self._opened_at = 0.0
+        self._unflushed = 0
+        self._unsynced = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _new_filename(self):
+        """生成新的文件名，同一秒内滚动时加序号避免覆盖"""
+        if self.fixed_filename:
+            return self.fixed_filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = os.path.join(self.directory, f'{self.prefix}_{timestamp}{self.extension}')
+        index = 2
+        while os.path.exists(filename) or filename in self.files:
+            filename = os.path.join(self.directory, f'{self.prefix}_{timestamp}_{index}{self.extension}')
+            index += 1
+        return filename
+
+    def _open(self):
+        """打开新文件"""
+        self.filename = self._new_filename()
+        self.file = self._open_file(self.filename)
+        self.files.append(self.filename)
+        self._file_records = 0
+        self._opened_at = time.monotonic()
+        self._open_writer()
+        logger.info(f"开始写入输出文件 {self.filename}")
+
+    def _open_file(self, filename):
+        """打开输出文件"""
+        mode = 'w' if self.fixed_filename else 'a'
+        return open(filename, mode, newline='', encoding=self.encoding)
+
+    def _open_writer(self):
+        """文件打开后的初始化（例如写表头）"""
+        pass
+
+    def _write_record(self, record):
+        """写入一条记录"""
+        raise NotImplementedError
+
+    def _should_rotate(self):
+        """判断当前文件是否需要滚动"""
+        if self._file_records == 0 or self.fixed_filename:
+            return False
+        if self.max_seconds and time.monotonic() - self._opened_at >= self.max_seconds:
+            return True
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            return True
+        return False
+
+    def _close_file(self):
+        """flush并关闭当前文件"""
+        if self.file is None:
+            return
+        self.flush(fsync=True)
+        self.file.close()
+        logger.info(f"已关闭输出文件 {self.filename}，共 {self._file_records} 条数据")
+        self.file = None
+
+    def write(self, record):
+        """
+        追加写入一条记录
+        :param record: 职位信息字典，或其他按字段名读取的Mapping（例如JobRecord）
+        """
+        if self.file is not None and self._should_rotate():
+            self._close_file()
+        if self.file is None:
+            self._open()
+
+        self._write_record(record)
+        self.total_records += 1
+        self._file_records += 1
+        self._unflushed += 1
+        self._unsynced += 1
+
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.flush(fsync=True)
+        elif self.flush_every and self._unflushed >= self.flush_every:
+            self.flush()
+
+    def write_many(self, records):
+        """追加写入多条记录"""
+        for record in records:
+            self.write(record)
+
+    def flush(self, fsync=False):
+        """
+        把缓冲区写入文件
+        :param fsync: 是否同时fsync到磁盘
+        """
+        if self.file is None:
+            return
+        self.file.flush()
+        self._unflushed = 0
+        if fsync:
+            os.fsync(self.file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        """关闭输出"""
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+class CsvSink(RotatingFileSink):
+    """UTF-8-BOM CSV 流式输出，格式与 save_to_csv 一致"""
+
+    extension = '.csv'
+    encoding = 'utf-8-sig'
+
+    def __init__(self, prefix='zhaopin_jobs', directory='.', fieldnames=None, **kwargs):
+        """
+        :param fieldnames: CSV列名，默认使用 JOB_FIELDS
+        其余参数见 RotatingFileSink
+        """
+        self.fieldnames = fieldnames or JOB_FIELDS
+        self.writer = None
+        super().__init__(prefix, directory, **kwargs)
+
+    def _open_writer(self):
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def _write_record(self, record):
+        self.writer.writerow(record)
+
+
+class JsonlSink(RotatingFileSink):
+    """JSON Lines 流式输出，每行一条记录"""
+
+    extension = '.jsonl'
+
+    def __init__(self, prefix='zhaopin_jobs', directory='.', fieldnames=None, **kwargs):
+        """
+        :param fieldnames: 输出的字段，默认使用 JOB_FIELDS
+        其余参数见 RotatingFileSink
+        """
+        self.fieldnames = fieldnames or JOB_FIELDS
+        super().__init__(prefix, directory, **kwargs)
+
+    def _write_record(self, record):
+        row = {field: record.get(field, '') for field in self.fieldnames}
+        self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class ParquetSink(RotatingFileSink):
+    """
+    Parquet 列式输出
+    记录先按列缓存，每满row_group_size条写入一个行组；短字段使用字典编码，整个文件压缩保存。
+    文件尾在关闭（或滚动）时写入，程序崩溃时未关闭的文件无法读取，需要崩溃安全时可以配合CsvSink使用（见MultiSink）
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, prefix='zhaopin_jobs', directory='.', fieldnames=None, row_group_size=10000,
+                 compression='zstd', **kwargs):
+        """
+        :param fieldnames: 输出的字段，默认使用 JOB_FIELDS
+        :param row_group_size: 每个行组的记录数
+        :param compression: 压缩算法，例如'zstd'、'snappy'、'gzip'
+        其余参数见 RotatingFileSink
+        """
+        if pa is None:
+            raise RuntimeError("Parquet输出需要安装pyarrow: pip install pyarrow")
+        self.fieldnames = fieldnames or JOB_FIELDS
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = pa.schema([(field, pa.string()) for field in self.fieldnames])
+        self.writer = None
+        self._columns = {field: [] for field in self.fieldnames}
+        self._pending = 0
+        super().__init__(prefix, directory, **kwargs)
+
+    def _open_file(self, filename):
+        return open(filename, 'wb')
+
+    def _open_writer(self):
+        # 任职要求几乎不重复，只对其余字段使用字典编码
+        dictionary_fields = [field for field in self.fieldnames if field != '任职要求']
+        self.writer = pq.ParquetWriter(self.file, self.schema, compression=self.compression,
+                                       use_dictionary=dictionary_fields)
+
+    def _write_record(self, record):
+        for field, column in self._columns.items():
+            column.append(record.get(field) or '')
+        self._pending += 1
+        if self._pending >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        """把缓存的记录写成一个行组"""
+        if not self._pending:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self.writer.write_table(table, row_group_size=self._pending)
+        self._columns = {field: [] for field in self.fieldnames}
+        self._pending = 0
+
+    def _close_file(self):
+        if self.file is None:
+            return
+        self._write_row_group()
+        self.writer.close()
+        self.writer = None
+        super()._close_file()
+
+
+class MultiSink:
+    """同时写入多个输出，例如CSV（逐条落盘，崩溃安全）加Parquet（方便分析）"""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    @property
+    def files(self):
+        return [filename for sink in self.sinks for filename in sink.files]
+
+    @property
+    def total_records(self):
+        return self.sinks[0].total_records if self.sinks else 0
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self, fsync=False):
+        for sink in self.sinks:
+            sink.flush(fsync)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+# 文件扩展名到输出类型的映射
+SINK_TYPES = {
+    '.csv': CsvSink,
+    '.jsonl': JsonlSink,
+    '.parquet': ParquetSink,
+}
+
+
+def sink_for_path(path, **kwargs):
+    """
+    按扩展名创建写入固定文件的输出
+    :param path: 输出文件，扩展名为 .csv、.jsonl 或 .parquet
+    :param kwargs: 传给对应输出类型的其他参数
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINK_TYPES:
+        raise ValueError(f"不支持的输出格式: {path}（支持 {', '.join(SINK_TYPES)}）")
+    directory = os.path.dirname(path) or '.'
+    return SINK_TYPES[extension](directory=directory, filename=path, flush_every=0, **kwargs)
+
+
+def export_records(path, records, **kwargs):
+    """
+    把一批记录写入一个文件，格式由扩展名决定
+    :return: 写入的记录数
+    """
+    with sink_for_path(path, **kwargs) as sink:
+        sink.write_many(records)
+    return sink.total_records
+
+
+def main():
+    """命令行入口：把已有的CSV文件转换为其他格式，python zhaopin_sink.py out.parquet a.csv b.csv"""
+    if len(sys.argv) < 3:
+        print("用法: python zhaopin_sink.py 输出文件(.parquet/.jsonl/.csv) 输入CSV文件...")
+        return
+
+    def read_rows(paths):
+        for path in paths:
+            with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+                yield from csv.DictReader(f)
+
+    count = export_records(sys.argv[1], read_rows(sys.argv[2:]))
+    print(f"已写入 {count} 条记录到 {sys.argv[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""
+爬取过程中的实时市场统计
+每次爬取结束后为了统计各区县的薪资分布、各公司的职位数和学历构成，都要重新读入全部数据。
+MarketStats在每保存一条职位时增量更新统计：薪资使用流式分位数草图（DDSketch：对数分桶，
+相对误差固定，可以合并），公司、工作地点、学历要求和发布日期使用精确计数。
+统计状态和预先计算好的汇总一起保存为一个JSON文件，看板直接读取汇总，不需要扫描原始数据；
+多次运行和多个分片的统计文件可以合并
+
+用法：
+    python zhaopin_stats.py show zhaopin_stats.json
+    python zhaopin_stats.py merge -o zhaopin_stats.json shards/shard*_stats.json
+    python zhaopin_stats.py build -o zhaopin_stats.json zhaopin_jobs_*.csv
+"""
+
+from collections import Counter
+from datetime import date, datetime
+import threading
+import argparse
+import logging
+import math
+import json
+import sys
+import os
+
+from zhaopin_normalize import parse_salary, split_location, education_level, parse_publish_date
+
+logger = logging.getLogger(__name__)
+
+STATS_VERSION = 1
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# 发布时间按距统计日期的天数分段
+PUBLISH_AGE_BUCKETS = ((0, '今天'), (3, '3天内'), (7, '一周内'), (30, '一个月内'))
+
+
+def _top(counter, n=None):
+    """按个数从大到小取前n项，个数相同时按名称排序（合并顺序不影响结果）"""
+    items = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    return items if n is None else items[:n]
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class QuantileSketch:
+    """
+    流式分位数草图（DDSketch）
+    正数按 ceil(log_gamma(x)) 分桶，每个桶的代表值与桶内任意值的相对误差不超过relative_accuracy；
+    桶数只与数值范围有关，与记录数无关，两个草图按桶相加即可合并
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        """
+        :param relative_accuracy: 分位数的相对误差
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = Counter()  # 桶序号 -> 个数
+        self.zero_count = 0  # 小于等于0的值单独计数
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        """加入一个值"""
+        if value is None:
+            return
+        if value > 0:
+            self.bins[math.ceil(math.log(value) / self._log_gamma)] += count
+        else:
+            self.zero_count += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _bin_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        :param q: 0到1之间的分位数
+        :return: 估计值，没有数据时返回None
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # 代表值限制在实际最小值和最大值之间
+                return min(max(self._bin_value(key), self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        """合并另一个草图（相对误差必须相同）"""
+        if not math.isclose(other.relative_accuracy, self.relative_accuracy):
+            raise ValueError(f"分位数草图的相对误差不同: {self.relative_accuracy} 和 {other.relative_accuracy}")
+        self.bins.update(other.bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def summary(self, quantiles=QUANTILES):
+        """个数、平均值、最小值、最大值和各分位数"""
+        result = {
+            'count': self.count,
+            'mean': round(self.total / self.count) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+        }
+        for q in quantiles:
+            value = self.quantile(q)
+            result[f'p{round(q * 100)}'] = None if value is None else round(value)
+        return result
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'bins': {str(key): count for key, count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.bins = Counter({int(key): count for key, count in data['bins'].items()})
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+
+
+class MarketStats:
+    """
+    职位市场统计：薪资分布（整体、按城市、按区县）、公司职位数、工作地点、学历要求和发布日期分布
+    爬虫每保存一条职位调用一次add；save保存统计状态和汇总，load后可以继续累加或与其他文件合并
+    """
+
+    def __init__(self, relative_accuracy=0.01, top=50):
+        """
+        :param relative_accuracy: 薪资分位数的相对误差
+        :param top: 汇总中保留的公司、城市、区县个数
+        """
+        self.relative_accuracy = relative_accuracy
+        self.top = top
+        self.jobs = 0
+        self.negotiable = 0  # 薪资面议或无法解析的职位数
+        self.salary_min = QuantileSketch(relative_accuracy)
+        self.salary_max = QuantileSketch(relative_accuracy)
+        self.salary_mid = QuantileSketch(relative_accuracy)  # 月薪上下限的平均值
+        self.city_salary = {}  # 城市 -> 月薪中值草图
+        self.district_salary = {}  # 城市·区县 -> 月薪中值草图
+        self.companies = Counter()
+        self.cities = Counter()
+        self.districts = Counter()
+        self.education = Counter()
+        self.publish_dates = Counter()  # 发布日期（YYYY-MM-DD） -> 职位数
+        self.updated = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.jobs
+
+    def _sketch(self, sketches, key):
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = QuantileSketch(self.relative_accuracy)
+        return sketch
+
+    def add(self, job_info, reference_date=None):
+        """
+        加入一条职位记录
+        :param job_info: 职位信息（字典或JobRecord）
+        :param reference_date: 解析“3天前”等相对发布时间的参考日期，默认今天
+        """
+        low, high, _ = parse_salary(job_info.get('薪资'))
+        city, district = split_location(job_info.get('工作地点'))
+        education = education_level(job_info.get('学历要求')) or '未知'
+        published = parse_publish_date(job_info.get('发布时间'), reference_date)
+        company = (job_info.get('公司名称') or '').strip()
+
+        with self._lock:
+            self.jobs += 1
+            if company:
+                self.companies[company] += 1
+            if city:
+                self.cities[city] += 1
+            if district:
+                self.districts[f'{city}·{district}'] += 1
+            self.education[education] += 1
+            if published:
+                self.publish_dates[published.isoformat()] += 1
+            if low is None:
+                self.negotiable += 1
+            else:
+                middle = (low + high) / 2
+                self.salary_min.add(low)
+                self.salary_max.add(high)
+                self.salary_mid.add(middle)
+                if city:
+                    self._sketch(self.city_salary, city).add(middle)
+                if district:
+                    self._sketch(self.district_salary, f'{city}·{district}').add(middle)
+            self.updated = _now()
+
+    def merge(self, other):
+        """合并另一份统计（其他运行或分片）"""
+        with self._lock:
+            self.jobs += other.jobs
+            self.negotiable += other.negotiable
+            self.salary_min.merge(other.salary_min)
+            self.salary_max.merge(other.salary_max)
+            self.salary_mid.merge(other.salary_mid)
+            for sketches, other_sketches in ((self.city_salary, other.city_salary),
+                                             (self.district_salary, other.district_salary)):
+                for key, sketch in other_sketches.items():
+                    self._sketch(sketches, key).merge(sketch)
+            self.companies.update(other.companies)
+            self.cities.update(other.cities)
+            self.districts.update(other.districts)
+            self.education.update(other.education)
+            self.publish_dates.update(other.publish_dates)
+            self.updated = max(filter(None, (self.updated, other.updated)), default=None)
+        return self
+
+    def _publish_ages(self, today):
+        """按距今天数分段的发布时间分布"""
+        ages = Counter()
+        for day, count in self.publish_dates.items():
+            days = (today - date.fromisoformat(day)).days
+            for limit, label in PUBLISH_AGE_BUCKETS:
+                if days <= limit:
+                    ages[label] += count
+                    break
+            else:
+                ages['更早'] += count
+        return {label: ages[label] for _, label in PUBLISH_AGE_BUCKETS + ((None, '更早'),)}
+
+    def summary(self, today=None):
+        """
+        看板使用的汇总：各项分布的前top项和薪资分位数
+        :param today: 计算发布时间分段的日期，默认今天
+        """
+        today = today or date.today()
+        with self._lock:
+            return {
+                'jobs': self.jobs,
+                'negotiable': self.negotiable,
+                'updated_at': self.updated,
+                'salary': {
+                    'min': self.salary_min.summary(),
+                    'max': self.salary_max.summary(),
+                    'mid': self.salary_mid.summary(),
+                },
+                'salary_by_city': {city: self.city_salary[city].summary()
+                                   for city, _ in _top(self.cities, self.top) if city in self.city_salary},
+                'salary_by_district': {district: self.district_salary[district].summary()
+                                       for district, _ in _top(self.districts, self.top)
+                                       if district in self.district_salary},
+                'companies': dict(_top(self.companies, self.top)),
+                'company_count': len(self.companies),
+                'cities': dict(_top(self.cities, self.top)),
+                'districts': dict(_top(self.districts, self.top)),
+                'education': dict(_top(self.education)),
+                'publish_age': self._publish_ages(today),
+                'publish_dates': dict(sorted(self.publish_dates.items())),
+            }
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'version': STATS_VERSION,
+                'relative_accuracy': self.relative_accuracy,
+                'jobs': self.jobs,
+                'negotiable': self.negotiable,
+                'updated_at': self.updated,
+                'salary_min': self.salary_min.to_dict(),
+                'salary_max': self.salary_max.to_dict(),
+                'salary_mid': self.salary_mid.to_dict(),
+                'city_salary': {key: sketch.to_dict() for key, sketch in self.city_salary.items()},
+                'district_salary': {key: sketch.to_dict() for key, sketch in self.district_salary.items()},
+                'companies': dict(self.companies),
+                'cities': dict(self.cities),
+                'districts': dict(self.districts),
+                'education': dict(self.education),
+                'publish_dates': dict(self.publish_dates),
+            }
+
+    @classmethod
+    def from_dict(cls, data, top=50):
+        if data.get('version') != STATS_VERSION:
+            raise ValueError(f"不支持的统计文件版本: {data.get('version')}")
+        stats = cls(data['relative_accuracy'], top)
+        stats.jobs = data['jobs']
+        stats.negotiable = data['negotiable']
+        stats.updated = data['updated_at']
+        stats.salary_min = QuantileSketch.from_dict(data['salary_min'])
+        stats.salary_max = QuantileSketch.from_dict(data['salary_max'])
+        stats.salary_mid = QuantileSketch.from_dict(data['salary_mid'])
+        stats.city_salary = {key: QuantileSketch.from_dict(item) for key, item in data['city_salary'].items()}
+        stats.district_salary = {key: QuantileSketch.from_dict(item)
+                                 for key, item in data['district_salary'].items()}
+        for name in ('companies', 'cities', 'districts', 'education', 'publish_dates'):
+            setattr(stats, name, Counter(data[name]))
+        return stats
+
+    def save(self, path):
+        """保存汇总和统计状态；先写临时文件再替换，看板不会读到写了一半的文件"""
+        content = {'summary': self.summary(), 'state': self.to_dict()}
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, top=50):
+        """载入save保存的统计"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f)['state'], top)
+
+
+def read_summary(path):
+    """看板读取汇总（不重建统计状态）"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['summary']
+
+
+def merge_files(paths, output=None, top=50):
+    """
+    合并多个统计文件
+    :param output: 合并结果的保存路径，None表示不保存
+    :return: 合并后的MarketStats
+    """
+    merged = None
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        stats = MarketStats.load(path, top)
+        merged = stats if merged is None else merged.merge(stats)
+    if merged is None:
+        merged = MarketStats(top=top)
+    if output:
+        merged.save(output)
+        logger.info(f"已合并 {len(paths)} 个统计文件（{merged.jobs} 条职位）到 {output}")
+    return merged
+
+
+def main():
+    """命令行入口"""
+    from zhaopin_compact import expand_inputs, read_records
+    from zhaopin_normalize import reference_date_for
+
+    parser = argparse.ArgumentParser(description='职位市场统计')
+    parser.add_argument('--top', type=int, default=50, help='汇总中保留的公司、城市、区县个数')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show', help='输出统计汇总')
+    show.add_argument('path', help='统计文件')
+
+    merge = commands.add_parser('merge', help='合并多次运行或多个分片的统计文件')
+    merge.add_argument('inputs', nargs='+', help='统计文件')
+    merge.add_argument('-o', '--output', required=True, help='合并结果')
+
+    build = commands.add_parser('build', help='从已有的输出文件生成统计')
+    build.add_argument('inputs', nargs='+', help='输入文件、目录或通配符（.csv、.jsonl、.parquet）')
+    build.add_argument('-o', '--output', required=True, help='统计文件')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        print(json.dumps(read_summary(args.path), ensure_ascii=False, indent=2))
+    elif args.command == 'merge':
+        merge_files(args.inputs, args.output, args.top)
+    else:
+        stats = MarketStats(top=args.top)
+        for path in expand_inputs(args.inputs, exclude=args.output):
+            logger.info(f"读取 {path}")
+            # 相对发布时间以文件名中的爬取时间为准
+            reference_date = reference_date_for(path)
+            for row in read_records(path):
+                stats.add(row, reference_date)
+        stats.save(args.output)
+        logger.info(f"共 {stats.jobs} 条职位，已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+职位数据本地存储（SQLite，WAL模式）
+以URL中的职位ID为主键，跨多次运行去重：
+已经抓取过的职位在进入详情页之前就可以跳过
+"""
+
+from datetime import datetime
+from pathlib import Path
+import logging
+import sqlite3
+import json
+import threading
+
+from zhaopin_parser import parse_job_id
+
+logger = logging.getLogger(__name__)
+
+# 输出字段到数据库列名的映射
+FIELD_COLUMNS = {
+    '职位名称': 'title',
+    '薪资': 'salary',
+    '工作地点': 'location',
+    '公司名称': 'company',
+    '任职要求': 'description',
+    '学历要求': 'education',
+    '招聘人数': 'recruit_count',
+    '发布时间': 'publish_time',
+    '相似职位': 'duplicate_of',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    salary TEXT,
+    location TEXT,
+    company TEXT,
+    description TEXT,
+    education TEXT,
+    recruit_count TEXT,
+    publish_time TEXT,
+    duplicate_of TEXT,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company);
+CREATE INDEX IF NOT EXISTS idx_jobs_publish_time ON jobs(publish_time);
+CREATE TABLE IF NOT EXISTS crawl_state (
+    search_url TEXT PRIMARY KEY,
+    last_ids TEXT,
+    last_publish_time TEXT,
+    updated_at TEXT
+);
+"""
+
+# SQLite单条语句的参数个数上限较小，批量查询时分块
+_LOOKUP_CHUNK = 500
+
+
+class JobStore:
+    """基于SQLite的职位存储，批量写入，支持快速判断职位是否已抓取"""
+
+    def __init__(self, path='zhaopin_jobs.db', batch_size=50, read_only=False):
+        """
+        :param path: 数据库文件路径
+        :param batch_size: 累积多少条记录后批量写入
+        :param read_only: 只读打开已有的数据库（例如分片进程查询主数据库），不建表、不能写入
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = {}  # job_id -> 待写入的行
+        self._lock = threading.RLock()
+        if read_only:
+            self.conn = sqlite3.connect(Path(path).absolute().as_uri() + '?mode=ro', uri=True,
+                                        check_same_thread=False)
+            logger.info(f"已只读打开职位数据库 {path}，现有 {self.count()} 条记录")
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        # 旧版本创建的数据库没有后来加入的列
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        for column in FIELD_COLUMNS.values():
+            if column not in existing:
+                self.conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} TEXT')
+        self.conn.commit()
+        logger.info(f"已打开职位数据库 {path}，现有 {self.count()} 条记录")
+
+    def upsert(self, url, job_info, job_id=None):
+        """
+        写入或更新一条职位记录（先放入批量缓冲区）
+        :param url: 详情页URL
+        :param job_info: 职位信息字典
+        :param job_id: 职位ID，None表示从URL解析
+        :return: 职位ID，无法解析时返回None
+        """
+        job_id = job_id or parse_job_id(url)
+        if not job_id:
+            logger.warning(f"无法从URL解析职位ID，未写入数据库: {url}")
+            return None
+
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        row = {'job_id': job_id, 'url': url, 'first_seen': now, 'last_seen': now}
+        for field, column in FIELD_COLUMNS.items():
+            row[column] = job_info.get(field, '')
+
+        with self._lock:
+            self._pending[job_id] = row
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        return job_id
+
+    def flush(self):
+        """把缓冲区中的记录批量写入数据库"""
+        with self._lock:
+            if not self._pending:
+                return
+            columns = ['job_id', 'url'] + list(FIELD_COLUMNS.values()) + ['first_seen', 'last_seen']
+            updates = ', '.join(f'{c}=excluded.{c}' for c in columns if c not in ('job_id', 'first_seen'))
+            sql = (
+                f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT(job_id) DO UPDATE SET {updates}"
+            )
+            with self.conn:
+                self.conn.executemany(sql, list(self._pending.values()))
+            logger.debug(f"已批量写入 {len(self._pending)} 条记录到数据库")
+            self._pending.clear()
+
+    def has(self, job_id):
+        """判断职位是否已经抓取过"""
+        return bool(self.known_ids([job_id]))
+
+    def known_ids(self, job_ids):
+        """
+        批量判断哪些职位已经抓取过
+        :param job_ids: 职位ID列表
+        :return: 已存在的职位ID集合
+        """
+        job_ids = [job_id for job_id in job_ids if job_id]
+        with self._lock:
+            known = {job_id for job_id in job_ids if job_id in self._pending}
+            remaining = [job_id for job_id in job_ids if job_id not in known]
+            for i in range(0, len(remaining), _LOOKUP_CHUNK):
+                chunk = remaining[i:i + _LOOKUP_CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self.conn.execute(f'SELECT job_id FROM jobs WHERE job_id IN ({placeholders})', chunk)
+                known.update(row[0] for row in rows)
+        return known
+
+    def get(self, job_id):
+        """
+        读取一条职位记录
+        :return: 职位信息字典，不存在时返回None
+        """
+        with self._lock:
+            if job_id in self._pending:
+                row = self._pending[job_id]
+            else:
+                cursor = self.conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,))
+                result = cursor.fetchone()
+                if result is None:
+                    return None
+                row = dict(zip([d[0] for d in cursor.description], result))
+        return {field: row[column] for field, column in FIELD_COLUMNS.items()}
+
+    def iter_records(self, batch_size=1000, since=None):
+        """
+        按职位ID顺序遍历所有记录，分批读取，内存占用固定
+        :param since: 只返回最后一次看到的时间（last_seen）不早于该时间的记录，格式为 %Y-%m-%d %H:%M:%S
+        :return: 生成器，每项为 (职位ID, URL, 职位信息字典)
+        """
+        self.flush()
+        columns = list(FIELD_COLUMNS.values())
+        last_id = ''
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT job_id, url, {', '.join(columns)} FROM jobs WHERE job_id > ? AND last_seen >= ? "
+                    f"ORDER BY job_id LIMIT ?",
+                    (last_id, since or '', batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0], row[1], dict(zip(FIELD_COLUMNS, row[2:]))
+            last_id = rows[-1][0]
+
+    def load_high_water_mark(self, search_url):
+        """
+        读取某个搜索URL上一次爬取的高水位标记
+        :param search_url: 搜索页URL
+        :return: (最新职位ID集合, 最新发布时间)，没有记录时返回(空集合, None)
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT last_ids, last_publish_time FROM crawl_state WHERE search_url = ?', (search_url,)
+            ).fetchone()
+        if row is None:
+            return set(), None
+        return set(json.loads(row[0] or '[]')), row[1]
+
+    def save_high_water_mark(self, search_url, job_ids, publish_time=None):
+        """
+        保存某个搜索URL本次爬取的高水位标记
+        :param search_url: 搜索页URL
+        :param job_ids: 本次列表中最新的职位ID（按列表顺序）
+        :param publish_time: 本次看到的最新发布时间
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO crawl_state (search_url, last_ids, last_publish_time, updated_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(search_url) DO UPDATE SET last_ids=excluded.last_ids, '
+                'last_publish_time=COALESCE(excluded.last_publish_time, crawl_state.last_publish_time), '
+                'updated_at=excluded.updated_at',
+                (search_url, json.dumps(list(job_ids)), publish_time, now)
+            )
+
+    def count(self):
+        """数据库中的记录数（不含缓冲区）"""
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def close(self):
+        """写入剩余记录并关闭数据库"""
+        with self._lock:
+            self.flush()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
@@ -0,0 +1,236 @@
+"""
+页面就绪等待与访问节奏控制
+就绪等待：按页面类型判断页面是否可用，可用即返回，不再固定sleep
+节奏控制：单独配置的访问间隔，与页面加载等待分开
+"""
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from zhaopin_parser import TITLE_PATH, SALARY_PATH
+
+logger = logging.getLogger(__name__)
+
+# 安全验证页URL关键字
+VERIFY_KEYWORDS = ('verify', 'captcha', 'validate')
+
+# 一次脚本调用同时检查标题和薪资是否已渲染
+# 通过脚本发起导航时旧页面会被打上标记，旧页面仍在显示时不算就绪
+_DETAIL_READY_SCRIPT = """
+if (window.__zhaopinStale) {
+    return [location.href, 'loading', false];
+}
+var found = function (path) {
+    return document.evaluate(path, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+        .singleNodeValue !== null;
+};
+return [location.href, document.readyState, found(arguments[0]) && found(arguments[1])];
+"""
+
+# 一次脚本调用返回职位链接数量和第一个链接
+_LIST_STATE_SCRIPT = """
+var links = document.querySelectorAll('a[href*="jobdetail/"]');
+return [location.href, links.length, links.length ? links[0].href : null];
+"""
+
+
+# 在当前标签页中发起导航但不等待加载完成
+NAVIGATE_SCRIPT = 'window.__zhaopinStale = true; window.location.href = arguments[0];'
+
+
+def is_verify_url(url):
+    """判断URL是否为安全验证页"""
+    return any(keyword in url for keyword in VERIFY_KEYWORDS)
+
+
+class detail_page_ready:
+    """
+    详情页就绪条件：标题h3和薪资span都已出现
+    遇到安全验证页时也立即返回，交给调用方处理
+    """
+
+    def __call__(self, driver):
+        url, ready_state, found = driver.execute_script(_DETAIL_READY_SCRIPT, TITLE_PATH, SALARY_PATH)
+        if is_verify_url(url):
+            return 'verify'
+        if found:
+            return 'ready'
+        # 页面已完全加载但仍找不到元素（例如结构变化），不再继续等待
+        if ready_state == 'complete' and 'jobdetail' not in url:
+            return 'other'
+        return False
+
+
+class job_links_rendered:
+    """
+    列表页就绪条件：至少渲染出N个jobdetail链接
+    :param min_count: 最少链接数
+    :param previous_first: 翻页前的第一个链接，不为None时要求第一个链接已变化
+    """
+
+    def __init__(self, min_count=1, previous_first=None):
+        self.min_count = min_count
+        self.previous_first = previous_first
+
+    def __call__(self, driver):
+        url, count, first = driver.execute_script(_LIST_STATE_SCRIPT)
+        if is_verify_url(url):
+            return 'verify'
+        if count < self.min_count:
+            return False
+        if self.previous_first is not None and first == self.previous_first:
+            return False
+        return count
+
+
+class PageReadiness:
+    """按页面类型等待页面就绪，条件满足即返回，超时返回None"""
+
+    def __init__(self, timeout=10, poll_frequency=0.2, min_job_links=10):
+        """
+        :param timeout: 最长等待秒数
+        :param poll_frequency: 轮询间隔秒数
+        :param min_job_links: 列表页至少渲染出的职位链接数
+        """
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.min_job_links = min_job_links
+        self.timeouts = 0  # 等待超时次数
+        self.retries = 0  # 列表页放宽条件后重新等待的次数
+
+    def _wait(self, driver, condition, description, timeout=None):
+        """执行等待，超时或出错时返回None"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+            logger.debug(f"{description}就绪，用时 {time.monotonic() - start:.2f} 秒")
+            return result
+        except TimeoutException:
+            self.timeouts += 1
+            logger.warning(f"等待{description}超时（{timeout} 秒）")
+        except WebDriverException as e:
+            logger.warning(f"等待{description}时出错: {e}")
+        return None
+
+    def wait_for_detail(self, driver, timeout=None):
+        """
+        等待详情页就绪
+        :return: 'ready'、'verify'、'other'，超时返回None
+        """
+        return self._wait(driver, detail_page_ready(), "详情页", timeout)
+
+    def wait_for_list(self, driver, previous_first=None, timeout=None):
+        """
+        等待列表页渲染出足够的职位链接
+        页面上的链接少于min_job_links时（例如最后一页），超时前只要有链接也视为就绪
+        :param previous_first: 翻页前的第一个职位链接，用于确认列表已刷新
+        :return: 链接数量或'verify'，超时返回None
+        """
+        result = self._wait(driver, job_links_rendered(self.min_job_links, previous_first), "职位列表", timeout)
+        if result is None:
+            # 最后一页可能不足min_job_links条，放宽到至少1条
+            self.retries += 1
+            result = self._wait(driver, job_links_rendered(1, previous_first), "职位列表", timeout=0.5)
+        return result
+
+    def first_job_link(self, driver):
+        """返回当前列表页的第一个职位链接，用于翻页后确认列表已刷新"""
+        try:
+            return driver.execute_script(_LIST_STATE_SCRIPT)[2]
+        except WebDriverException:
+            return None
+
+
+class PacingPolicy:
+    """
+    访问节奏策略
+    每类操作之间保持一个随机的最小间隔，从上一次同类操作开始计时，
+    因此页面加载和解析的时间会计入间隔，不会叠加在固定sleep上
+    """
+
+    def __init__(self, intervals=None):
+        """
+        :param intervals: 操作类型到(最小秒数, 最大秒数)的映射，
+                          例如 {'detail': (2, 4), 'page': (3, 6)}
+        """
+        self.intervals = dict(intervals or {})
+        self._last = {}
+
+    def wait(self, action):
+        """
+        在执行某类操作前调用，必要时sleep到满足间隔
+        :param action: 操作类型，未配置的类型不等待
+        :return: 实际sleep的秒数
+        """
+        delay_range = self.intervals.get(action)
+        slept = 0.0
+        last = self._last.get(action)
+        # 第一次操作不需要等待
+        if delay_range and last is not None:
+            remaining = random.uniform(*delay_range) - (time.monotonic() - last)
+            if remaining > 0:
+                time.sleep(remaining)
+                slept = remaining
+        self._last[action] = time.monotonic()
+        return slept
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+    多个详情页工作者共享同一个实例，限制对网站的总请求速率
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: 每秒产生的令牌数，即允许的平均请求速率
+        :param burst: 桶容量，即允许的最大突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        尝试获取令牌，不阻塞
+        :return: 0表示已获取；否则返回还需等待的秒数（此时未获取）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        获取令牌，令牌不足时阻塞等待
+        :return: 实际等待的秒数
+        """
+        waited = 0.0
+        while True:
+            delay = self.reserve(tokens)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens=1):
+        """asyncio版本的acquire，等待时不阻塞事件循环"""
+        waited = 0.0
+        while True:
+            delay = self.reserve(tokens)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
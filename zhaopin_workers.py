@@ -0,0 +1,212 @@
+"""
+详情页并行抓取
+DetailTabPool：同一个浏览器中的N个详情页标签页轮流导航，页面在后台并行加载
+DetailDriverPool：N个浏览器实例（各自使用登录配置的副本），从共享队列中取URL
+两者都通过同一个令牌桶限制对网站的总请求速率
+"""
+
+from selenium.common.exceptions import WebDriverException
+from collections import deque
+import logging
+import queue
+import threading
+import time
+
+from zhaopin_wait import PageReadiness, detail_page_ready, NAVIGATE_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+
+class DetailTabPool:
+    """
+    单个浏览器内的多标签页详情抓取
+    在空闲标签页中用脚本发起导航（不阻塞），然后轮询各标签页，
+    哪个先就绪就先处理哪个
+    """
+
+    def __init__(self, driver, process, tabs=3, rate_limiter=None, timeout=15, poll_interval=0.2,
+                 setup_tab=None):
+        """
+        :param driver: 已登录的WebDriver
+        :param process: 页面就绪后的回调 process(driver, job_url)，调用时该标签页为当前窗口
+        :param setup_tab: 新建标签页后的初始化回调 setup_tab(driver)，例如设置资源屏蔽
+        :param tabs: 详情页标签页数量
+        :param rate_limiter: 共享的令牌桶（TokenBucket），None表示不限速
+        :param timeout: 单个页面最长等待秒数
+        :param poll_interval: 没有页面就绪时的轮询间隔秒数
+        """
+        self.driver = driver
+        self.process = process
+        self.tabs = tabs
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.setup_tab = setup_tab
+        self.handles = []
+        self._ready = detail_page_ready()
+
+    def open(self, existing_handle=None):
+        """
+        创建详情页标签页
+        :param existing_handle: 已有的详情页标签页，会作为第一个标签页复用
+        """
+        if existing_handle:
+            self.handles.append(existing_handle)
+        while len(self.handles) < self.tabs:
+            before = set(self.driver.window_handles)
+            self.driver.execute_script("window.open('');")
+            handle = [h for h in self.driver.window_handles if h not in before][-1]
+            self.handles.append(handle)
+            if self.setup_tab:
+                self.driver.switch_to.window(handle)
+                self.setup_tab(self.driver)
+        logger.info(f"详情页标签页数量: {len(self.handles)}")
+
+    def run(self, job_urls):
+        """
+        抓取一批详情页
+        :param job_urls: 详情页URL列表
+        """
+        if not self.handles:
+            self.open()
+
+        pending = deque(job_urls)
+        idle = list(self.handles)
+        active = {}  # 标签页 -> (URL, 开始时间)
+        total = len(pending)
+        done = 0
+
+        while pending or active:
+            # 给空闲标签页分配URL
+            while pending and idle:
+                handle = idle.pop()
+                job_url = pending.popleft()
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.execute_script(NAVIGATE_SCRIPT, job_url)
+                    active[handle] = (job_url, time.monotonic())
+                except WebDriverException as e:
+                    logger.error(f"在标签页中打开详情页失败: {e}")
+                    idle.append(handle)
+
+            # 检查各标签页是否就绪
+            finished = []
+            for handle, (job_url, started) in active.items():
+                try:
+                    self.driver.switch_to.window(handle)
+                    state = self._ready(self.driver)
+                    if not state and time.monotonic() - started < self.timeout:
+                        continue
+                    if not state:
+                        logger.warning(f"详情页加载超时: {job_url}")
+                    done += 1
+                    logger.info(f"正在处理第 {done}/{total} 个职位: {job_url}")
+                    self.process(self.driver, job_url)
+                except Exception as e:
+                    logger.error(f"处理详情页时出错 {job_url}: {e}")
+                finished.append(handle)
+
+            for handle in finished:
+                del active[handle]
+                idle.append(handle)
+            if not finished and active:
+                time.sleep(self.poll_interval)
+
+    def close(self, keep_handle=None):
+        """
+        关闭额外创建的标签页
+        :param keep_handle: 需要保留的标签页
+        """
+        for handle in self.handles:
+            if handle == keep_handle:
+                continue
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        self.handles = [keep_handle] if keep_handle else []
+
+
+class DetailDriverPool:
+    """
+    多浏览器实例的详情抓取
+    每个工作线程拥有自己的WebDriver，从共享队列中取URL，
+    所有线程共用一个令牌桶限制总请求速率
+    """
+
+    def __init__(self, driver_factory, process, workers=2, rate_limiter=None, readiness=None):
+        """
+        :param driver_factory: 创建浏览器的函数 driver_factory(index)，返回WebDriver或None
+        :param process: 页面就绪后的回调 process(driver, job_url)
+        :param workers: 浏览器实例数量
+        :param rate_limiter: 共享的令牌桶（TokenBucket），None表示不限速
+        :param readiness: 页面就绪等待（PageReadiness）
+        """
+        self.driver_factory = driver_factory
+        self.process = process
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        self.readiness = readiness or PageReadiness()
+        self.drivers = []
+        self.threads = []
+        self.queue = queue.Queue()
+
+    def start(self):
+        """启动所有工作线程"""
+        for index in range(self.workers):
+            driver = self.driver_factory(index)
+            if driver is None:
+                logger.error(f"第 {index + 1} 个浏览器实例启动失败")
+                continue
+            self.drivers.append(driver)
+            thread = threading.Thread(target=self._worker, args=(driver,), daemon=True,
+                                      name=f'detail-worker-{index + 1}')
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"已启动 {len(self.threads)} 个详情页浏览器实例")
+        return bool(self.threads)
+
+    def _worker(self, driver):
+        """工作线程：循环取URL、打开详情页并处理"""
+        while True:
+            job_url = self.queue.get()
+            try:
+                if job_url is None:
+                    return
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                driver.get(job_url)
+                self.readiness.wait_for_detail(driver)
+                self.process(driver, job_url)
+            except Exception as e:
+                logger.error(f"{threading.current_thread().name} 处理详情页时出错 {job_url}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def run(self, job_urls):
+        """
+        抓取一批详情页，全部处理完后返回
+        :param job_urls: 详情页URL列表
+        """
+        if not self.threads and not self.start():
+            return
+        for job_url in job_urls:
+            self.queue.put(job_url)
+        self.queue.join()
+
+    def close(self):
+        """停止工作线程并关闭浏览器"""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout=30)
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        self.threads = []
+        self.drivers = []